@@ -15,6 +15,8 @@ from src.core.generator import ContentGenerator
 from src.content.reel_generator import ReelGenerator
 from src.storage.excel_tracker import ExcelContentTracker
 from src.storage.google_sheets_tracker import GoogleSheetsTracker
+from src.storage.sqlite_tracker import SQLiteContentTracker
+from src.storage.async_tracker_writer import AsyncTrackerWriter
 from src.utils.article_tracker import ArticleTracker
 
 # Настройка логирования
@@ -29,11 +31,23 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-def setup_tracker(use_google_sheets=False):
-    """Инициализация трекера контента"""
+def setup_tracker(use_google_sheets=False, backend=None, async_writes=None):
+    """Инициализация трекера контента
+
+    Args:
+        use_google_sheets (bool): Использовать Google Sheets (имеет приоритет над backend)
+        backend (str): sqlite или excel, по умолчанию CONTENT_TRACKER_BACKEND
+        async_writes (bool): Записывать в фоне через AsyncTrackerWriter, по умолчанию CONTENT_TRACKER_ASYNC
+    """
     if use_google_sheets:
-        return GoogleSheetsTracker()
-    return ExcelContentTracker()
+        tracker = GoogleSheetsTracker()
+    else:
+        backend = backend or os.getenv('CONTENT_TRACKER_BACKEND', 'sqlite')
+        tracker = ExcelContentTracker() if backend == 'excel' else SQLiteContentTracker()
+
+    if async_writes is None:
+        async_writes = os.getenv('CONTENT_TRACKER_ASYNC', '1') == '1'
+    return AsyncTrackerWriter(tracker) if async_writes else tracker
 
 def process_article(article, platform, tracker, generator, reel_generator):
     """Обработка одной статьи"""
@@ -64,15 +78,19 @@ def main():
     parser.add_argument('--generate-reel', action='store_true', 
                       help='Генерация скрипта для Instagram Reels')
     parser.add_argument('--google-sheets', action='store_true',
-                      help='Использовать Google Sheets вместо Excel')
+                      help='Использовать Google Sheets вместо локального трекера')
+    parser.add_argument('--tracker', choices=['sqlite', 'excel'],
+                      help='Локальный трекер контента (по умолчанию CONTENT_TRACKER_BACKEND или sqlite)')
+    parser.add_argument('--sync-tracker', action='store_true',
+                      help='Записывать в трекер синхронно, без фоновой очереди')
     args = parser.parse_args()
 
     try:
         # Инициализация компонентов
         scraper = MENABytesNewsScraper()
-        generator = ContentGenerator()
+        tracker = setup_tracker(args.google_sheets, args.tracker, False if args.sync_tracker else None)
+        generator = ContentGenerator(content_tracker=tracker)
         reel_generator = ReelGenerator()
-        tracker = setup_tracker(args.google_sheets)
         article_tracker = ArticleTracker()
 
         # Получение статей
@@ -0,0 +1,41 @@
+import argparse
+import pandas as pd
+from parquet_archive import ParquetArchive
+from sqlite_tracker import SQLiteContentTracker
+from excel_tracker import ExcelContentTracker
+
+def main():
+    """Перенос старых строк трекера в Parquet-архив и поиск по архиву"""
+    parser = argparse.ArgumentParser(description='Parquet-архив статей, контента и логов')
+    parser.add_argument('action', choices=['roll', 'query'], help='roll: перенести старые строки в архив, query: поиск по архиву')
+    parser.add_argument('--archive-dir', type=str, default='data/archive', help='Каталог архива')
+    parser.add_argument('--tracker', choices=['sqlite', 'excel'], default='sqlite', help='Трекер, из которого переносятся строки')
+    parser.add_argument('--days', type=int, help='Переносить строки старше указанного числа дней (по умолчанию ARCHIVE_AFTER_DAYS)')
+    parser.add_argument('--table', choices=['articles', 'content', 'logs'], default='content', help='Таблица для поиска')
+    parser.add_argument('--company', type=str, help='Контент по статьям о компании')
+    parser.add_argument('--platform', type=str, help='Платформа контента, например LinkedIn')
+    parser.add_argument('--month', action='append', help='Месяц YYYY-MM (можно указать несколько раз)')
+    parser.add_argument('--columns', type=str, help='Столбцы через запятую')
+    args = parser.parse_args()
+
+    archive = ParquetArchive(args.archive_dir)
+    if args.action == 'roll':
+        tracker = ExcelContentTracker() if args.tracker == 'excel' else SQLiteContentTracker()
+        moved = archive.roll_over(tracker, args.days)
+        for table, count in moved.items():
+            print(f"{table}: {count}")
+        return
+
+    columns = args.columns.split(',') if args.columns else None
+    if args.company:
+        result = archive.content_for_company(args.company, args.platform, columns, args.month)
+    else:
+        result = archive.query(args.table, columns=columns, months=args.month,
+                               platforms=[args.platform] if args.platform and args.table == 'content' else None)
+
+    with pd.option_context('display.max_rows', None, 'display.max_colwidth', 80):
+        print(result)
+    print(f"Найдено строк: {len(result)}")
+
+if __name__ == "__main__":
+    main()
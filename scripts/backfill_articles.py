@@ -0,0 +1,67 @@
+import os
+import argparse
+from datetime import datetime
+from article_corpus import ArticleCorpus
+from article_jsonl import iter_articles
+from sqlite_tracker import SQLiteContentTracker
+from excel_tracker import ExcelContentTracker
+from async_tracker_writer import AsyncTrackerWriter
+
+def load_articles(args):
+    """Articles from the given files, or unprocessed articles of the corpus in the date range"""
+    if args.files:
+        articles = [article for path in args.files for article in iter_articles(path)]
+    else:
+        corpus = ArticleCorpus.shared(os.path.join(args.data_dir, "articles.db"), args.data_dir)
+        articles = corpus.query(args.start_date, args.end_date, status='new')
+    return articles[:args.limit] if args.limit else articles
+
+def main():
+    """Generate content for archived articles through the OpenAI Batch API"""
+    parser = argparse.ArgumentParser(description='Backfill posts and reel scripts for archived articles with one OpenAI batch')
+    parser.add_argument('files', nargs='*', help='articles_*.json(l) files; by default unprocessed articles are taken from data/articles.db')
+    parser.add_argument('--data-dir', type=str, default='data', help='Directory with articles.db')
+    parser.add_argument('--start-date', type=str, help='First scrape date YYYY-MM-DD')
+    parser.add_argument('--end-date', type=str, default=datetime.now().strftime("%Y-%m-%d"), help='Last scrape date YYYY-MM-DD')
+    parser.add_argument('--limit', type=int, help='Maximum number of articles')
+    parser.add_argument('--reels', action='store_true', help='Generate reel scripts as well')
+    parser.add_argument('--tracker', choices=['sqlite', 'excel', 'none'], default='sqlite', help='Content tracker for the results')
+    parser.add_argument('--batch-id', action='append', help='Resume waiting for an already submitted batch (repeatable)')
+    parser.add_argument('--poll-interval', type=float, help='Seconds between status checks (LLM_BATCH_POLL_INTERVAL)')
+    parser.add_argument('--timeout', type=float, help='Stop waiting for a batch after this many seconds')
+    parser.add_argument('--base-url', type=str, help='OpenAI-compatible API, e.g. http://127.0.0.1:8765/v1 for openai_stub_server.py')
+    args = parser.parse_args()
+
+    # The LLM gateway of the generators reads its endpoint from the environment
+    if args.base_url:
+        os.environ['LLM_BASE_URL'] = args.base_url
+
+    from generator import ContentGenerator
+    from reel_generator import ReelGenerator
+    from batch_backfill import BatchBackfill
+
+    tracker = None
+    if args.tracker != 'none':
+        tracker = AsyncTrackerWriter(ExcelContentTracker() if args.tracker == 'excel' else SQLiteContentTracker())
+
+    content_generator = ContentGenerator(content_tracker=tracker)
+    reel_generator = ReelGenerator(content_tracker=tracker) if args.reels else None
+    backfill = BatchBackfill(content_generator, reel_generator, poll_interval=args.poll_interval)
+
+    articles = load_articles(args)
+    print(f"Articles: {len(articles)}")
+    try:
+        article_dirs = backfill.run(articles, batch_ids=args.batch_id, timeout=args.timeout)
+    except TimeoutError as e:
+        print(f"{e}. Run again with --batch-id to publish its results")
+        return
+    finally:
+        if tracker is not None:
+            tracker.close()
+
+    for article_dir in article_dirs:
+        print(article_dir)
+    print(f"Backfilled: {len(article_dirs)}")
+
+if __name__ == "__main__":
+    main()
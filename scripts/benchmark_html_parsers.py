@@ -0,0 +1,46 @@
+import time
+import argparse
+from scraper import MENABytesNewsScraper
+from html_parser import PARSER_BACKENDS, is_backend_available
+from scraper_fixtures import FIXTURES_DIR, load_fixtures, synthetic_listing_html, synthetic_article_html
+
+def benchmark(pages, parse, iterations):
+    """Return average parse time per page in milliseconds"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for html in pages:
+            parse(html)
+    elapsed = time.perf_counter() - start
+    return elapsed / (iterations * len(pages)) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description='Сравнение скорости HTML-парсеров скрапера')
+    parser.add_argument('--fixtures', type=str, default=FIXTURES_DIR, help='Директория с сохраненными HTML-страницами')
+    parser.add_argument('--iterations', type=int, default=20, help='Количество повторов для каждой страницы')
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    listing_pages = [f['html'] for f in fixtures if f['kind'] == 'listing']
+    article_pages = [f['html'] for f in fixtures if f['kind'] == 'article']
+
+    # Без сохраненных страниц используем синтетические, похожие на MENABytes
+    if not listing_pages:
+        listing_pages = [synthetic_listing_html(seed=i) for i in range(3)]
+    if not article_pages:
+        article_pages = [synthetic_article_html(seed=i) for i in range(10)]
+
+    print(f"Страниц ленты: {len(listing_pages)}, страниц статей: {len(article_pages)}, повторов: {args.iterations}")
+    print(f"{'Парсер':<14}{'Strainer':<10}{'Лента, мс':>12}{'Статья, мс':>12}")
+
+    for backend in PARSER_BACKENDS:
+        if not is_backend_available(backend):
+            print(f"{backend:<14}не установлен")
+            continue
+        for use_strainer in (False, True):
+            scraper = MENABytesNewsScraper(parser=backend, use_strainer=use_strainer, use_cache=False)
+            listing_ms = benchmark(listing_pages, scraper.extract_articles, args.iterations)
+            article_ms = benchmark(article_pages, scraper.parse_article_details, args.iterations)
+            print(f"{backend:<14}{'да' if use_strainer else 'нет':<10}{listing_ms:>12.2f}{article_ms:>12.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import time
+import random
+import re
+import argparse
+from keyword_matcher import KeywordMatcher, STARTUP_KEYWORDS, IMPORTANT_KEYWORDS, INDUSTRY_KEYWORDS
+from scraper_fixtures import SAMPLE_TITLES
+
+def naive_is_startup_related(title, category):
+    """Прежняя реализация: проверка каждого ключевого слова через `in`"""
+    title_lower = title.lower()
+    category_lower = category.lower()
+    return any(keyword in title_lower or keyword in category_lower for keyword in STARTUP_KEYWORDS.keywords)
+
+def naive_score(title):
+    title_lower = title.lower()
+    return sum(1 for keyword in IMPORTANT_KEYWORDS.keywords if keyword in title_lower)
+
+def naive_industry(article):
+    """Прежняя реализация из ReelGenerator.extract_key_info"""
+    title, content = article
+    for keyword in INDUSTRY_KEYWORDS.keywords:
+        if keyword in title.lower() or any(keyword in p.lower() for p in content[:3] if p):
+            return keyword
+    return None
+
+def compiled_industry(article):
+    title, content = article
+    return INDUSTRY_KEYWORDS.first_match(title, *content[:3])
+
+# Поиск целых слов: отдельное регулярное выражение на каждое ключевое слово против одного общего
+WORD_PATTERNS = [(keyword, re.compile(rf'\b{re.escape(keyword)}\b')) for keyword in STARTUP_KEYWORDS.keywords]
+STARTUP_WORDS = KeywordMatcher(STARTUP_KEYWORDS.keywords, word_boundary=True)
+
+def naive_words(title):
+    title_lower = title.lower()
+    return {keyword for keyword, pattern in WORD_PATTERNS if pattern.search(title_lower)}
+
+def make_titles(count, seed=42):
+    """Сгенерировать заголовки из фрагментов реальных заголовков MENABytes"""
+    rng = random.Random(seed)
+    words = ' '.join(SAMPLE_TITLES).split() + ['regional', 'market', 'report', 'minister', 'weather', 'football']
+    return [' '.join(rng.choice(words) for _ in range(rng.randint(5, 14))) for _ in range(count)]
+
+def timed(func, items, repeat=3):
+    """Лучшее время из нескольких прогонов, чтобы разовые паузы не искажали сравнение"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [func(item) for item in items]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return results, best
+
+def main():
+    parser = argparse.ArgumentParser(description='Сравнение скорости поиска ключевых слов')
+    parser.add_argument('--titles', type=int, default=50000, help='Количество заголовков')
+    args = parser.parse_args()
+
+    titles = make_titles(args.titles)
+    # Для определения индустрии проверяются заголовок и три первых абзаца статьи
+    paragraphs = make_titles(300, seed=7)
+    articles = [(title, [' '.join(paragraphs[(i + j) % 300] for j in range(4)) for _ in range(3)])
+                for i, title in enumerate(titles)]
+
+    checks = [
+        ("is_startup_related", titles, lambda t: naive_is_startup_related(t, "Startup"), lambda t: STARTUP_KEYWORDS.matches(t, "Startup")),
+        ("score (keywords count)", titles, naive_score, IMPORTANT_KEYWORDS.count),
+        ("industry detection", articles, naive_industry, compiled_industry),
+        ("whole words", titles, naive_words, STARTUP_WORDS.find_all),
+    ]
+
+    print(f"Заголовков: {len(titles)}")
+    print(f"{'Проверка':<26}{'Старый, шт/сек':>18}{'Новый, шт/сек':>18}{'Совпадает':>12}")
+    for name, items, naive, compiled in checks:
+        naive_results, naive_time = timed(naive, items)
+        compiled_results, compiled_time = timed(compiled, items)
+        same = "да" if naive_results == compiled_results else "НЕТ"
+        print(f"{name:<26}{len(items) / naive_time:>18.0f}{len(items) / compiled_time:>18.0f}{same:>12}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import sys
+import time
+import argparse
+import logging
+import resource
+from scraper import MENABytesNewsScraper
+from scraper_fixtures import FIXTURES_DIR, FixtureStore, load_fixtures, synthetic_listing_html, synthetic_article_html
+
+def build_corpus(fixtures, num_pages, base_url):
+    """Build url -> html pages for the benchmark, reusing a small pool of page bodies"""
+    listing_pool = [f['html'] for f in fixtures if f['kind'] == 'listing'] or \
+        [synthetic_listing_html(seed=i, base_url=base_url) for i in range(5)]
+    article_pool = [f['html'] for f in fixtures if f['kind'] == 'article'] or \
+        [synthetic_article_html(seed=i, base_url=base_url) for i in range(50)]
+
+    # Roughly one listing page per 30 article pages, as on the homepage
+    num_listing = max(1, num_pages // 30)
+    listing_urls = [f"{base_url}/page/{i + 1}/" for i in range(num_listing)]
+    article_urls = [f"{base_url}/benchmark-article-{i}/" for i in range(num_pages - num_listing)]
+
+    pages = {url: listing_pool[i % len(listing_pool)] for i, url in enumerate(listing_urls)}
+    pages.update({url: article_pool[i % len(article_pool)] for i, url in enumerate(article_urls)})
+    return listing_urls, article_urls, pages
+
+def run_stage(name, items, func):
+    """Run a benchmark stage and print its throughput"""
+    start = time.perf_counter()
+    results = [func(item) for item in items]
+    elapsed = time.perf_counter() - start
+    rate = len(items) / elapsed if elapsed else float('inf')
+    print(f"{name:<24}{len(items):>8}{elapsed:>10.2f}{rate:>14.1f}")
+    return results, rate
+
+def main():
+    parser = argparse.ArgumentParser(description='Офлайн-бенчмарк скрапера на сохраненных HTML-страницах')
+    parser.add_argument('--fixtures', type=str, default=FIXTURES_DIR, help='Директория с записанными страницами')
+    parser.add_argument('--pages', type=int, default=10000, help='Общее количество страниц для прогона')
+    parser.add_argument('--parser', type=str, help='HTML-парсер (lxml или html.parser)')
+    parser.add_argument('--min-pages-per-sec', type=float, default=0,
+                        help='Минимальная скорость разбора статей; при меньшей скрипт завершится с ошибкой')
+    args = parser.parse_args()
+
+    # Логи по каждой странице искажают замеры
+    logging.disable(logging.INFO)
+
+    fixtures = load_fixtures(args.fixtures)
+    base_url = MENABytesNewsScraper(use_cache=False).base_url
+    listing_urls, article_urls, pages = build_corpus(fixtures, args.pages, base_url)
+
+    scraper = MENABytesNewsScraper(parser=args.parser, use_cache=False, replay_store=FixtureStore(None, pages))
+    source = f"{len(fixtures)} записанных" if fixtures else "синтетических"
+    print(f"Страниц: {len(pages)} (шаблоны: {source}), парсер: {scraper.parser}")
+    print(f"{'Этап':<24}{'Страниц':>8}{'Сек':>10}{'Страниц/сек':>14}")
+
+    listings, _ = run_stage("extract_articles", listing_urls,
+                            lambda url: scraper.extract_articles(scraper.fetch_page(url)))
+
+    titles = [(article['title'], article['category']) for page in listings for article in page]
+    titles = titles * max(1, len(article_urls) // max(1, len(titles)))
+    run_stage("is_startup_related", titles, lambda item: scraper.is_startup_related(*item))
+
+    _, article_rate = run_stage("get_article_details", article_urls, scraper.get_article_details)
+
+    # ru_maxrss в килобайтах на Linux и в байтах на macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    print(f"Пиковое потребление памяти (RSS): {peak_mb:.1f} МБ")
+
+    if args.min_pages_per_sec and article_rate < args.min_pages_per_sec:
+        print(f"Скорость разбора статей ниже порога {args.min_pages_per_sec} страниц/сек")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import os
+import glob
+import argparse
+from article_jsonl import convert_to_jsonl
+from article_corpus import ArticleCorpus
+
+def main():
+    """Convert day files articles_*.json into JSON Lines and optionally import them into the corpus"""
+    parser = argparse.ArgumentParser(description='Convert data/articles_*.json files to JSON Lines')
+    parser.add_argument('--data-dir', type=str, default='data', help='Directory with articles_*.json files')
+    parser.add_argument('--remove', action='store_true', help='Remove the .json files after conversion')
+    parser.add_argument('--import-corpus', action='store_true', help='Import the converted files into data/articles.db')
+    args = parser.parse_args()
+    
+    converted = []
+    for json_path in sorted(glob.glob(os.path.join(args.data_dir, "articles_*.json"))):
+        jsonl_path, count = convert_to_jsonl(json_path, remove_source=args.remove)
+        converted.append(jsonl_path)
+        print(f"{json_path} -> {jsonl_path}: {count}")
+    
+    if args.import_corpus and converted:
+        corpus = ArticleCorpus(os.path.join(args.data_dir, "articles.db"), args.data_dir)
+        print(f"Imported into corpus: {corpus.import_files(converted)}")
+        corpus.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 import os
 import json
 import logging
+from article_tracker import ArticleTracker
+from article_corpus import ArticleCorpus
 
 # Configure logging
 logging.basicConfig(
@@ -22,6 +24,9 @@ def reset_all_articles():
         logger.error(f"Database file not found: {db_file}")
         return False
     
+    # Fold the journal into the snapshot, otherwise it would bring the articles back after the reset
+    ArticleTracker(db_file).compact()
+    
     # Create backup
     backup_file = f"{db_file}.backup"
     try:
@@ -41,6 +46,9 @@ def reset_all_articles():
         with open(db_file, 'w', encoding='utf-8') as f:
             json.dump([], f)
         
+        # Let the generators pick the articles from the corpus again
+        ArticleCorpus().reset_status()
+        
         logger.info(f"Successfully reset all articles")
         logger.info(f"Reset {len(articles)} articles")
         return True
@@ -1,6 +1,7 @@
 import argparse
 import logging
 from article_tracker import ArticleTracker
+from article_corpus import ArticleCorpus
 
 # Configure logging
 logging.basicConfig(
@@ -26,6 +27,9 @@ def main():
     tracker = ArticleTracker()
     result = tracker.reset_article_processed(title)
     
+    # Let the generators pick the article from the corpus again
+    ArticleCorpus().reset_status(title)
+    
     if result:
         logger.info(f"Successfully reset article: {title}")
     else:
@@ -0,0 +1,24 @@
+import argparse
+from sqlite_tracker import SQLiteContentTracker
+
+def main():
+    """Перенос данных между SQLite-трекером и Excel-файлом"""
+    parser = argparse.ArgumentParser(description='Импорт content_tracker.xlsx в SQLite и выгрузка SQLite в Excel')
+    parser.add_argument('action', choices=['import', 'export'], help='import: Excel -> SQLite, export: SQLite -> Excel')
+    parser.add_argument('--db', type=str, default='data/content_tracker.db', help='Путь к базе SQLite')
+    parser.add_argument('--excel', type=str, default='data/content_tracker.xlsx', help='Путь к Excel-файлу')
+    args = parser.parse_args()
+    
+    # Импорт выполняется только явной командой import
+    tracker = SQLiteContentTracker(args.db, import_excel=None)
+    if args.action == 'import':
+        imported = tracker.import_from_excel(args.excel)
+        for table, count in imported.items():
+            print(f"{table}: {count}")
+    else:
+        tracker.export_to_excel(args.excel)
+        print(f"Данные выгружены в {args.excel}")
+    tracker.close()
+
+if __name__ == "__main__":
+    main()
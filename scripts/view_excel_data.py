@@ -2,24 +2,33 @@ import pandas as pd
 import argparse
 from excel_tracker import ExcelContentTracker
 
-def view_excel_data(show_content=False, article_id=None, content_id=None):
+def view_excel_data(show_content=False, article_id=None, content_id=None, archive_dir=None):
     """Просмотр данных из Excel-таблицы
     
     Args:
         show_content (bool): Показывать ли полный контент
         article_id (str): ID статьи для фильтрации
         content_id (str): ID контента для фильтрации
+        archive_dir (str): Каталог Parquet-архива, строки которого добавляются к статьям, контенту и логам
     """
     tracker = ExcelContentTracker()
     
-    # Загружаем данные из всех листов
+    # Загружаем данные из всех листов (книга разбирается один раз, дальше листы берутся из кэша трекера)
     try:
-        articles_df = pd.read_excel(tracker.excel_path, sheet_name='Статьи')
-        content_df = pd.read_excel(tracker.excel_path, sheet_name='Контент')
-        schedule_df = pd.read_excel(tracker.excel_path, sheet_name='Планирование')
-        metadata_df = pd.read_excel(tracker.excel_path, sheet_name='Метаданные')
-        reels_df = pd.read_excel(tracker.excel_path, sheet_name='Reels')
-        logs_df = pd.read_excel(tracker.excel_path, sheet_name='Логи')
+        articles_df = tracker.read_sheet('Статьи')
+        content_df = tracker.read_sheet('Контент')
+        schedule_df = tracker.read_sheet('Планирование')
+        metadata_df = tracker.read_sheet('Метаданные')
+        reels_df = tracker.read_sheet('Reels')
+        logs_df = tracker.read_sheet('Логи')
+        
+        # Добавляем строки, перенесенные в архив
+        if archive_dir:
+            from parquet_archive import ParquetArchive
+            archive = ParquetArchive(archive_dir)
+            articles_df = pd.concat([articles_df, archive.read_sheet('articles')], ignore_index=True)
+            content_df = pd.concat([content_df, archive.read_sheet('content')], ignore_index=True)
+            logs_df = pd.concat([logs_df, archive.read_sheet('logs')], ignore_index=True)
         
         # Фильтруем по article_id, если указан
         if article_id:
@@ -134,7 +143,8 @@ if __name__ == "__main__":
     parser.add_argument('--show-content', action='store_true', help='Показывать полный контент')
     parser.add_argument('--article-id', type=str, help='ID статьи для фильтрации')
     parser.add_argument('--content-id', type=str, help='ID контента для фильтрации')
+    parser.add_argument('--archive', nargs='?', const='data/archive', help='Показать также строки из Parquet-архива (по умолчанию data/archive)')
     
     args = parser.parse_args()
     
-    view_excel_data(args.show_content, args.article_id, args.content_id) 
\ No newline at end of file
+    view_excel_data(args.show_content, args.article_id, args.content_id, args.archive) 
\ No newline at end of file
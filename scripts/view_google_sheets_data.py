@@ -125,6 +125,10 @@ def view_google_sheets_data(show_content=False, article_id=None, content_id=None
                 print(f"{row['key']}: {row['value']}")
         else:
             print("Метаданных не найдено")
+        
+        stats = tracker.scheduler.stats
+        print(f"\nЗапросов к API: чтение {stats['read_calls']}, запись {stats['write_calls']}, "
+              f"повторов {stats['retries']}, получено {stats['bytes_received']} байт")
             
     except Exception as e:
         print(f"Ошибка при чтении данных из Google Sheets: {e}")
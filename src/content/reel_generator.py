@@ -1,14 +1,17 @@
 import os
-import json
 import logging
 import random
+from contextlib import nullcontext
 from datetime import datetime, timedelta
-import openai
 from dotenv import load_dotenv
 from style_config import STYLE_CONFIG, get_style_element
 from article_tracker import ArticleTracker
-from excel_tracker import ExcelContentTracker
-from google_sheets_tracker import GoogleSheetsTracker
+from article_corpus import ArticleCorpus
+from article_jsonl import iter_articles
+from keyword_matcher import IMPORTANT_KEYWORDS, INDUSTRY_KEYWORDS
+from generation_orchestrator import GenerationOrchestrator
+from llm_cache import LLMResponseCache
+from llm_gateway import LLMGateway, PartialCompletionError, stream_to_file
 
 # Load environment variables
 load_dotenv()
@@ -28,7 +31,7 @@ logger = logging.getLogger(__name__)
 class ReelGenerator:
     """Class to generate Instagram reel scripts based on startup content"""
     
-    def __init__(self):
+    def __init__(self, content_tracker=None):
         self.data_dir = "data"
         self.output_dir = "output"
         self.reels_dir = os.path.join(self.output_dir, "reels")
@@ -37,12 +40,25 @@ class ReelGenerator:
         # Initialize article tracker
         self.tracker = ArticleTracker()
         
-        # Load OpenAI API key from environment variable
-        self.api_key = os.getenv("OPENAI_API_KEY")
+        # Scraped articles and how many days back to look for unprocessed ones
+        self.corpus = ArticleCorpus.shared(os.path.join(self.data_dir, "articles.db"), self.data_dir)
+        self.lookback_days = int(os.getenv("ARTICLE_LOOKBACK_DAYS", "0"))
+        
+        # Optional content tracker (SQLite, Excel, Google Sheets or an AsyncTrackerWriter around one)
+        self.content_tracker = content_tracker
+        
+        # Concurrent LLM calls, capped process-wide, and the cache of their responses
+        self.orchestrator = GenerationOrchestrator.shared()
+        self.llm_cache = LLMResponseCache.shared(os.path.join(self.data_dir, "llm_cache.db"))
+        
+        # Shared LLM gateway: pooled client, timeouts, retries, token budget and per-call accounting
+        self.llm = LLMGateway.shared()
+        self.api_key = self.llm.api_key
         if not self.api_key:
             logger.warning("OpenAI API key not found. Please set OPENAI_API_KEY environment variable.")
-        else:
-            self.client = openai.OpenAI(api_key=self.api_key)
+        
+        # Stream AI scripts into their output files as they are generated
+        self.stream = os.getenv("LLM_STREAM", "0").lower() in ("1", "true", "yes")
     
     def load_latest_articles(self, test_file=None):
         """Load the latest scraped articles or from a test file if specified"""
@@ -50,53 +66,27 @@ class ReelGenerator:
         if test_file:
             logger.info(f"Using test file: {test_file}")
             try:
-                with open(test_file, 'r', encoding='utf-8') as f:
-                    articles = json.load(f)
+                # Both JSON arrays and JSON Lines files are accepted
+                articles = list(iter_articles(test_file))
                 logger.info(f"Loaded {len(articles)} articles from test file {test_file}")
                 return articles
             except Exception as e:
                 logger.error(f"Error loading articles from test file: {e}")
                 return None
         
-        # Otherwise, use the normal flow
-        today = datetime.now().strftime("%Y-%m-%d")
-        tomorrow = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
-        
-        logger.info(f"Looking for articles with dates: today={today}, tomorrow={tomorrow}")
-        
-        # For testing purposes, try tomorrow's file first
-        test_mode = True  # Set to True for testing with tomorrow's articles
+        # Otherwise, take unprocessed articles scraped since ARTICLE_LOOKBACK_DAYS days ago from the corpus
+        # (up to tomorrow, so articles dated ahead by the scraper's timezone are included)
+        start_date = (datetime.now() - timedelta(days=self.lookback_days)).strftime("%Y-%m-%d")
+        end_date = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+        logger.info(f"Looking for new articles scraped between {start_date} and {end_date}")
         
-        if test_mode:
-            # Try tomorrow's date first (for testing)
-            filename = os.path.join(self.data_dir, f"articles_{tomorrow}.json")
-            logger.info(f"Test mode: Checking for tomorrow's file first: {filename}")
-            
-            if os.path.exists(filename):
-                try:
-                    with open(filename, 'r', encoding='utf-8') as f:
-                        articles = json.load(f)
-                    logger.info(f"Loaded {len(articles)} articles from {filename}")
-                    return articles
-                except Exception as e:
-                    logger.error(f"Error loading articles: {e}")
-        
-        # Normal flow - try today's articles
-        filename = os.path.join(self.data_dir, f"articles_{today}.json")
-        logger.info(f"Checking for file: {filename}")
-        
-        if not os.path.exists(filename):
-            logger.info(f"No articles found for today ({today})")
-            return None
-            
-        try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                articles = json.load(f)
-            logger.info(f"Loaded {len(articles)} articles from {filename}")
-            return articles
-        except Exception as e:
-            logger.error(f"Error loading articles: {e}")
+        articles = self.corpus.query(start_date, end_date, status='new')
+        if not articles:
+            logger.info(f"No new articles found in {self.corpus.db_path}")
             return None
+        
+        logger.info(f"Loaded {len(articles)} articles from {self.corpus.db_path}")
+        return articles
     
     def extract_key_info(self, article):
         """Extract key information from an article"""
@@ -155,12 +145,7 @@ class ReelGenerator:
                         pass
         
         # Extract industry (simple heuristic)
-        industry = ""
-        industry_keywords = ['fintech', 'healthtech', 'edtech', 'proptech', 'ecommerce', 'saas', 'ai', 'blockchain']
-        for keyword in industry_keywords:
-            if keyword in title.lower() or any(keyword in p.lower() for p in content[:3] if p):
-                industry = keyword
-                break
+        industry = INDUSTRY_KEYWORDS.first_match(title, *content[:3]) or ""
         
         # If no specific industry found, use generic term
         if not industry:
@@ -174,61 +159,70 @@ class ReelGenerator:
             'content_summary': '\n'.join(content[:3]) if content else ""
         }
     
-    def generate_reel_script_with_ai(self, article_info):
+    def build_reel_request(self, article_info):
+        """Chat completion parameters of the Instagram reel script"""
+        prompt = f"""
+        Напиши сценарий для Instagram Reels о стартапе.
+        
+        Информация о стартапе:
+        Название: {article_info['company_name']}
+        Заголовок статьи: {article_info['title']}
+        Сумма инвестиций: {article_info['funding_amount']}
+        Индустрия: {article_info['industry']}
+        Краткое содержание: {article_info['content_summary'][:300]}
+        
+        Требования к сценарию:
+        1. Сценарий должен быть на русском языке
+        2. Структура: цепляющее начало (hook) → основная часть → призыв к действию
+        3. Начало должно привлечь внимание за первые 3 секунды
+        4. Общая продолжительность ролика: 30-60 секунд
+        5. Добавь идеи для визуального сопровождения
+        6. Текст должен быть энергичным и вдохновляющим
+        7. Формат ответа:
+        
+        HOOK: [текст для первых 3-5 секунд]
+        
+        ОСНОВНАЯ ЧАСТЬ: [основное содержание]
+        
+        ЗАКЛЮЧЕНИЕ: [призыв к действию]
+        
+        ВИЗУАЛЬНЫЕ ИДЕИ: [краткие идеи для визуального сопровождения]
+        
+        ХЭШТЕГИ: [5-7 релевантных хэштегов]
+        """
+        
+        return {
+            'model': "gpt-3.5-turbo",
+            'messages': [
+                {"role": "system", "content": "Ты опытный копирайтер, специализирующийся на создании сценариев для Instagram Reels."},
+                {"role": "user", "content": prompt}
+            ],
+            'temperature': 0.7,
+            'max_tokens': 800
+        }
+    
+    def generate_reel_script_with_ai(self, article_info, output_path=None, on_chunk=None):
         """Generate Instagram reel script using OpenAI API"""
         if not self.api_key:
             logger.error("OpenAI API key not set")
             return self.generate_reel_script_without_ai(article_info)
             
         try:
-            # Prepare the prompt
-            prompt = f"""
-            Напиши сценарий для Instagram Reels о стартапе.
-            
-            Информация о стартапе:
-            Название: {article_info['company_name']}
-            Заголовок статьи: {article_info['title']}
-            Сумма инвестиций: {article_info['funding_amount']}
-            Индустрия: {article_info['industry']}
-            Краткое содержание: {article_info['content_summary'][:300]}
-            
-            Требования к сценарию:
-            1. Сценарий должен быть на русском языке
-            2. Структура: цепляющее начало (hook) → основная часть → призыв к действию
-            3. Начало должно привлечь внимание за первые 3 секунды
-            4. Общая продолжительность ролика: 30-60 секунд
-            5. Добавь идеи для визуального сопровождения
-            6. Текст должен быть энергичным и вдохновляющим
-            7. Формат ответа:
-            
-            HOOK: [текст для первых 3-5 секунд]
-            
-            ОСНОВНАЯ ЧАСТЬ: [основное содержание]
-            
-            ЗАКЛЮЧЕНИЕ: [призыв к действию]
-            
-            ВИЗУАЛЬНЫЕ ИДЕИ: [краткие идеи для визуального сопровождения]
-            
-            ХЭШТЕГИ: [5-7 релевантных хэштегов]
-            """
-            
-            # Call OpenAI API with new client format
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "Ты опытный копирайтер, специализирующийся на создании сценариев для Instagram Reels."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=800
-            )
-            
-            # Extract the response text
-            script = response.choices[0].message.content.strip()
+            request = self.build_reel_request(article_info)
+            if self.stream and output_path:
+                # Stream the script into its file, chunks also go to on_chunk as they arrive
+                script = stream_to_file(self.llm, request, output_path, on_chunk, cache=self.llm_cache)
+            else:
+                # Call the LLM through the gateway, identical requests are answered from the response cache
+                script = self.llm.chat_completion(**request, cache=self.llm_cache)
             
             logger.info(f"Generated reel script with AI for {article_info['title']}")
             return script
             
+        except PartialCompletionError as e:
+            logger.error(f"Reel script stream stopped after {len(e.partial_text)} characters ({e}), "
+                         f"partial text kept in {e.partial_path}; using the template instead")
+            return self.generate_reel_script_without_ai(article_info)
         except Exception as e:
             logger.error(f"Error generating reel script with AI: {str(e)}")
             return self.generate_reel_script_without_ai(article_info)
@@ -399,18 +393,22 @@ HOOK: {hook}
         
         return f"РЕЙТИНГ ДУБСКОГО: {rating_level['symbol']} ({score}/5)\n{rating_level['description']}"
     
+    def reel_script_path(self, article_title):
+        """Path of the reel script file of an article"""
+        # Create a safe filename
+        safe_title = ''.join(c if c.isalnum() or c in ' -_' else '_' for c in article_title)
+        safe_title = safe_title[:50]  # Limit length
+        
+        today = datetime.now().strftime("%Y-%m-%d")
+        return os.path.join(self.reels_dir, f"{today}_reel_{safe_title}.md")
+    
     def save_reel_script(self, script, article_title):
         """Save generated reel script to a file"""
         if not script:
             logger.error("No script to save")
             return
             
-        # Create a safe filename
-        safe_title = ''.join(c if c.isalnum() or c in ' -_' else '_' for c in article_title)
-        safe_title = safe_title[:50]  # Limit length
-        
-        today = datetime.now().strftime("%Y-%m-%d")
-        filename = os.path.join(self.reels_dir, f"{today}_reel_{safe_title}.md")
+        filename = self.reel_script_path(article_title)
         
         try:
             with open(filename, 'w', encoding='utf-8') as f:
@@ -456,11 +454,7 @@ HOOK: {hook}
                 score += 1
                 
             # Score based on keywords in title
-            title_lower = article['title'].lower()
-            important_keywords = ['million', 'funding', 'investment', 'launch', 'startup', 'innovation', 'technology']
-            for keyword in important_keywords:
-                if keyword in title_lower:
-                    score += 1
+            score += IMPORTANT_KEYWORDS.count(article['title'])
             
             # Add to scored articles
             scored_articles.append((article, score))
@@ -477,8 +471,17 @@ HOOK: {hook}
             logger.warning("No suitable unprocessed articles found")
             return None
     
-    def run(self, test_file=None):
-        """Run the reel script generator"""
+    def generate_reel_script(self, article_info, output_path=None, on_chunk=None):
+        """Generate the reel script with AI when an API key is set, otherwise from templates"""
+        if self.api_key:
+            return self.generate_reel_script_with_ai(article_info, output_path, on_chunk)
+        return self.generate_reel_script_without_ai(article_info)
+    
+    def run(self, test_file=None, on_chunk=None):
+        """Run the reel script generator
+        
+        With LLM_STREAM=1 on_chunk('reel', text) receives the streamed script as it arrives.
+        """
         # Load the latest articles
         articles = self.load_latest_articles(test_file)
         
@@ -496,13 +499,24 @@ HOOK: {hook}
         # Extract key information from the article
         article_info = self.extract_key_info(best_article)
         
-        # Generate reel script
+        # Generate reel script (through the shared orchestrator, so the in-flight cap applies)
         logger.info("Generating Instagram Reel script")
-        if self.api_key:
-            reel_script = self.generate_reel_script_with_ai(article_info)
-        else:
-            reel_script = self.generate_reel_script_without_ai(article_info)
+        cache_stats, llm_stats = self.llm_cache.snapshot(), self.llm.snapshot()
+        chunk_callback = (lambda text: on_chunk('reel', text)) if on_chunk is not None else None
+        reel_script = self.orchestrator.gather({
+            'reel': (self.generate_reel_script, article_info, self.reel_script_path(best_article['title']), chunk_callback)
+        })['reel']
+        logger.info(self.llm_cache.report(since=cache_stats))
+        logger.info(self.llm.report(since=llm_stats))
+        
+        return self.publish_reel(best_article, article_info, reel_script)
+    
+    def publish_reel(self, best_article, article_info, reel_script, article_id=None):
+        """Save the reel script and add it to the content tracker
         
+        Args:
+            article_id (str): ID of the article in the content tracker, added there when not given
+        """
         # Generate Dubskiy rating for the reel
         dubskiy_rating = self.generate_dubskiy_rating_for_reel(article_info)
         
@@ -511,35 +525,32 @@ HOOK: {hook}
         
         logger.info(f"Reel script saved to: {script_path}")
         
-        # Если трекер - это экземпляр ExcelContentTracker или GoogleSheetsTracker,
-        # добавляем скрипт в соответствующую таблицу
-        if isinstance(self.tracker, (ExcelContentTracker, GoogleSheetsTracker)):
+        # Добавляем скрипт в трекер контента, если он подключен
+        if self.content_tracker is not None:
             logger.info("Adding reel script to tracker")
             
-            # Получаем ID статьи из трекера
-            article_id = None
-            
-            # Сначала пытаемся найти статью по URL
-            if 'link' in best_article and best_article['link']:
-                articles_df = self.tracker.get_all_articles()
-                if not articles_df.empty:
-                    matching_articles = articles_df[articles_df['source_url'] == best_article['link']]
-                    if not matching_articles.empty:
-                        article_id = matching_articles.iloc[0]['article_id']
-            
-            # Если статья не найдена по URL, добавляем ее
-            if not article_id:
-                article_id = self.tracker.add_article(best_article, best_article.get('content', ''))
-                logger.info(f"Added article to tracker with ID: {article_id}")
-            
-            # Добавляем скрипт для Instagram Reel
-            reel_id = self.tracker.add_reel(
-                article_id, 
-                f"Instagram Reel: {best_article['title']}", 
-                reel_script, 
-                f"Dubskiy Rating: {dubskiy_rating}"
-            )
-            logger.info(f"Added reel script to tracker with ID: {reel_id}")
+            # Статья и скрипт сохраняются в трекер одной записью, если трекер это поддерживает
+            batch = self.content_tracker.transaction() if hasattr(self.content_tracker, 'transaction') else nullcontext()
+            with batch:
+                # Сначала пытаемся найти статью по URL, чтобы не добавлять ее в трекер повторно
+                if not article_id and best_article.get('link') and hasattr(self.content_tracker, 'find_article_by_url'):
+                    existing = self.content_tracker.find_article_by_url(best_article['link'])
+                    if existing:
+                        article_id = existing['article_id']
+                
+                # Если статья не найдена по URL, добавляем ее
+                if not article_id:
+                    article_id = self.content_tracker.add_article(best_article, best_article.get('content', ''))
+                    logger.info(f"Added article to tracker with ID: {article_id}")
+                
+                # Добавляем скрипт для Instagram Reel
+                reel_id = self.content_tracker.add_reel(
+                    article_id, 
+                    f"Instagram Reel: {best_article['title']}", 
+                    reel_script, 
+                    f"Dubskiy Rating: {dubskiy_rating}"
+                )
+                logger.info(f"Added reel script to tracker with ID: {reel_id}")
         
         logger.info(f"Reel script generation completed for article: {best_article['title']}")
         return script_path
@@ -0,0 +1,447 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import os
+from datetime import datetime
+import logging
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, urljoin
+import urllib3
+from http_cache import HTTPCache
+from html_parser import get_parser_backend, make_soup
+from feed_parser import iter_feed_entries
+from scraper_fixtures import FixtureStore
+from seen_url_index import SeenURLIndex
+from article_corpus import ArticleCorpus
+from article_jsonl import append_articles
+from keyword_matcher import STARTUP_KEYWORDS
+
+# Disable SSL warnings
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+logger = logging.getLogger(__name__)
+
+# Registered news sources by name
+SCRAPER_REGISTRY = {}
+
+def register_scraper(cls):
+    """Class decorator that makes a scraper available by its name"""
+    SCRAPER_REGISTRY[cls.name] = cls
+    return cls
+
+def get_scraper_class(name):
+    """Get a registered scraper class by name"""
+    if name not in SCRAPER_REGISTRY:
+        raise ValueError(f"Unknown news source: {name}. Available: {', '.join(sorted(SCRAPER_REGISTRY))}")
+    return SCRAPER_REGISTRY[name]
+
+def save_articles(articles, data_dir="data"):
+    """Append articles to the article corpus and today's JSON Lines file, skipping links that are already there"""
+    if not articles:
+        logger.info("No articles to save")
+        return
+    
+    corpus = ArticleCorpus.shared(os.path.join(data_dir, "articles.db"), data_dir)
+    new_articles = corpus.add_many(articles)
+    if not new_articles:
+        logger.info("No new articles to add")
+        return
+    
+    logger.info(f"Added {len(new_articles)} new articles to {corpus.db_path}")
+    
+    # The day file is append-only, so saving never reads or rewrites what is already there
+    if os.getenv("SCRAPER_SAVE_JSONL", "1").lower() in ("1", "true", "yes"):
+        today = datetime.now().strftime("%Y-%m-%d")
+        filename = os.path.join(data_dir, f"articles_{today}.jsonl")
+        append_articles(filename, new_articles)
+        logger.info(f"Appended {len(new_articles)} articles to {filename}")
+
+class BaseNewsScraper:
+    """Base class for news sources: fetching, listing/detail extraction and normalization"""
+    
+    # Unique source name used by the registry and stored in each article
+    name = None
+    base_url = None
+    
+    # RSS/Atom feed of the source, used instead of the HTML listing when use_feed is on
+    feed_url = None
+    
+    def __init__(self, max_workers=None, min_delay=None, max_delay=None, pool_size=None, max_retries=None,
+                 use_cache=True, force_refresh=False, incremental=None, max_pages=None,
+                 parser=None, use_strainer=True, record_dir=None, replay_store=None, use_feed=None):
+        self.headers = {
+            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+            'Accept-Language': 'en-US,en;q=0.9',
+            'Accept-Encoding': 'gzip, deflate, br',
+            'Connection': 'keep-alive',
+            'Upgrade-Insecure-Requests': '1',
+            'Sec-Fetch-Dest': 'document',
+            'Sec-Fetch-Mode': 'navigate',
+            'Sec-Fetch-Site': 'none',
+            'Sec-Fetch-User': '?1',
+            'Cache-Control': 'max-age=0'
+        }
+        self.data_dir = "data"
+        os.makedirs(self.data_dir, exist_ok=True)
+        
+        # Concurrency settings for article detail fetching
+        self.max_workers = max(1, int(max_workers or os.getenv("SCRAPER_MAX_WORKERS", 4)))
+        
+        # Politeness delay between two requests to the same host, shared by all workers
+        self.min_delay = float(min_delay if min_delay is not None else os.getenv("SCRAPER_MIN_DELAY", 1))
+        self.max_delay = float(max_delay if max_delay is not None else os.getenv("SCRAPER_MAX_DELAY", 3))
+        self._host_slots = {}
+        self._host_lock = threading.Lock()
+        
+        # One long-lived pooled session shared by homepage and detail fetches
+        self.pool_size = int(pool_size or os.getenv("SCRAPER_POOL_SIZE", max(10, self.max_workers)))
+        self.max_retries = int(max_retries if max_retries is not None else os.getenv("SCRAPER_MAX_RETRIES", 3))
+        self.session = self._create_session()
+        self._session_primed = False
+        self._prime_lock = threading.Lock()
+        
+        # Conditional-GET cache for pages and reuse of previously scraped article details
+        self.http_cache = HTTPCache(os.path.join(self.data_dir, "http_cache")) if use_cache else None
+        self.force_refresh = force_refresh
+        
+        # Incremental mode: skip already scraped links and page back until a known article
+        if incremental is None:
+            incremental = os.getenv("SCRAPER_INCREMENTAL", "0").lower() in ("1", "true", "yes")
+        self.incremental = incremental
+        self.max_pages = int(max_pages or os.getenv("SCRAPER_MAX_PAGES", 5))
+        self.seen_index = SeenURLIndex.shared(os.path.join(self.data_dir, "seen_urls.json"), self.data_dir) if incremental else None
+        
+        # HTML parser backend (lxml when installed) and whether to build only the needed nodes
+        self.parser = get_parser_backend(parser)
+        self.use_strainer = use_strainer
+        
+        # Record fetched pages as fixtures, or replay them instead of hitting the network
+        record_dir = record_dir or os.getenv("SCRAPER_RECORD_DIR")
+        self.record_store = FixtureStore(record_dir) if record_dir else None
+        replay_dir = os.getenv("SCRAPER_REPLAY_DIR")
+        self.replay_store = replay_store or (FixtureStore(replay_dir) if replay_dir else None)
+        
+        # Discover new articles from the feed, which is much smaller than the homepage
+        if use_feed is None:
+            use_feed = os.getenv("SCRAPER_USE_FEED", "0").lower() in ("1", "true", "yes")
+        self.use_feed = use_feed and bool(self.feed_url)
+    
+    def _create_session(self):
+        """Create a session with connection pooling and retry/backoff"""
+        session = requests.Session()
+        session.headers.update(self.headers)
+        session.verify = False  # Disable SSL verification
+        
+        retry = Retry(
+            total=self.max_retries,
+            backoff_factor=1,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['HEAD', 'GET']),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=retry)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+    
+    def prime_session(self, force=False):
+        """Make a single HEAD request to the homepage to collect cookies"""
+        # Replayed runs never touch the network
+        if self.replay_store:
+            return
+        
+        with self._prime_lock:
+            if self._session_primed and not force:
+                return
+            try:
+                self.session.head(self.base_url, timeout=30)
+            except requests.RequestException as e:
+                logger.warning(f"Error priming session cookies: {e}")
+            self._session_primed = True
+    
+    def _wait_for_host_slot(self, url):
+        """Block until the politeness delay for the URL's host has elapsed"""
+        host = urlparse(url).netloc
+        
+        # Reserve the next free slot for this host so concurrent workers are spaced out
+        with self._host_lock:
+            now = time.monotonic()
+            slot = max(now, self._host_slots.get(host, now))
+            self._host_slots[host] = slot + random.uniform(self.min_delay, self.max_delay)
+        
+        wait = slot - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        
+    def get_page_kind(self, url):
+        """Tell listing pages from article pages by URL"""
+        if self.feed_url and url == self.feed_url:
+            return 'feed'
+        if url.rstrip('/') == self.base_url or '/page/' in url:
+            return 'listing'
+        return 'article'
+    
+    def fetch_page(self, url):
+        """Fetch HTML content from a URL"""
+        if self.replay_store:
+            html = self.replay_store.replay(url)
+            if html is None:
+                logger.warning(f"No recorded fixture for {url}")
+            return html
+        
+        try:
+            # Add a random delay to mimic human behavior
+            self._wait_for_host_slot(url)
+            
+            # Cookies are collected once per run and reused by the shared session
+            self.prime_session()
+            
+            # Revalidate a cached copy instead of downloading the page again
+            cached = self.http_cache.get(url) if self.http_cache else None
+            headers = self.http_cache.conditional_headers(cached) if cached else None
+            
+            response = self.session.get(url, headers=headers, timeout=30)
+            if response.status_code == 304 and cached:
+                logger.info(f"Page not modified, using cached copy: {url}")
+                self.http_cache.touch(url, cached)
+                html = cached['body']
+            else:
+                response.raise_for_status()
+                if self.http_cache:
+                    self.http_cache.store(url, response)
+                html = response.text
+            
+            if self.record_store:
+                self.record_store.record(url, html, self.get_page_kind(url))
+            return html
+        except requests.RequestException as e:
+            logger.error(f"Error fetching {url}: {e}")
+            return None
+    
+    def extract_articles(self, html):
+        """Extract article dicts (title, link, category, date) from a listing page"""
+        raise NotImplementedError
+    
+    def parse_article_details(self, html, url=None):
+        """Extract {'content': [paragraphs], 'image_url': ...} from an article page"""
+        raise NotImplementedError
+    
+    def extract_feed_articles(self, xml_text):
+        """Extract startup-related articles from an RSS/Atom feed, with content when the feed has it"""
+        articles = []
+        for entry in iter_feed_entries(xml_text):
+            if not entry['title'] or not entry['link']:
+                continue
+            
+            category = entry['category'] or "Startup"
+            if not self.is_startup_related(entry['title'], category):
+                continue
+            
+            article = {
+                'title': entry['title'],
+                'link': entry['link'],
+                'category': category,
+                'date': entry['date'] or datetime.now().strftime("%Y-%m-%d")
+            }
+            
+            # Full-text feeds make the article page request unnecessary
+            if entry['content_html']:
+                soup = make_soup(entry['content_html'], self.parser)
+                paragraphs = [p.text.strip() for p in soup.find_all('p') if p.text.strip()]
+                if paragraphs:
+                    image_element = soup.find('img')
+                    article['content'] = paragraphs
+                    article['image_url'] = image_element.get('src') if image_element else None
+            
+            articles.append(article)
+        return articles
+    
+    def collect_feed_articles(self):
+        """Collect articles from the source feed, skipping known links in incremental mode"""
+        xml_text = self.fetch_page(self.feed_url)
+        if not xml_text:
+            return None
+        
+        articles = self.extract_feed_articles(xml_text)
+        if self.incremental:
+            articles = [article for article in articles if article['link'] not in self.seen_index]
+        
+        with_content = sum(1 for article in articles if article.get('content'))
+        logger.info(f"Found {len(articles)} articles in {self.name} feed, {with_content} with full content")
+        return articles
+    
+    def normalize_article(self, article):
+        """Bring an extracted article to the common format shared by all sources"""
+        article['title'] = ' '.join(article['title'].split())
+        if not article['link'].startswith('http'):
+            article['link'] = urljoin(self.base_url, article['link'])
+        article.setdefault('source', self.name)
+        return article
+    
+    def is_startup_related(self, title, category):
+        """Check if article is related to startups"""
+        # Check if any keyword is in the title or category
+        return STARTUP_KEYWORDS.matches(title, category)
+    
+    def get_article_details(self, url):
+        """Get detailed content from an article page"""
+        html = self.fetch_page(url)
+        if not html:
+            return None
+        
+        return self.parse_article_details(html, url)
+    
+    def fetch_article_details(self, articles):
+        """Fetch details for the articles concurrently and merge them in place"""
+        # Articles that already have content (e.g. from a full-text feed) need no page fetch
+        pending = [article for article in articles if not article.get('content')]
+        if not pending:
+            return articles
+        
+        # Article pages rarely change after publication, so reuse details scraped earlier
+        if not self.force_refresh:
+            corpus = ArticleCorpus.shared(os.path.join(self.data_dir, "articles.db"), self.data_dir)
+            candidates, pending = pending, []
+            for article in candidates:
+                previous = corpus.get(article['link'])
+                if previous and previous.get('content'):
+                    article.update({
+                        'content': previous['content'],
+                        'image_url': previous.get('image_url')
+                    })
+                    logger.info(f"Reused details for article: {article['title']}")
+                else:
+                    pending.append(article)
+        
+        self._fetch_details(pending)
+        return articles
+    
+    def _fetch_details(self, articles):
+        """Fetch details for the articles with the worker pool, keeping their order"""
+        if not articles:
+            return
+        
+        links = [article['link'] for article in articles]
+        
+        # executor.map yields results in input order, so homepage order is preserved
+        if self.max_workers > 1 and len(links) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(links))) as executor:
+                details_list = list(executor.map(self.get_article_details, links))
+        else:
+            details_list = [self.get_article_details(link) for link in links]
+        
+        for article, details in zip(articles, details_list):
+            if details:
+                article.update(details)
+                logger.info(f"Added details for article: {article['title']}")
+    
+    def save_articles(self, articles):
+        """Save articles to the article corpus"""
+        save_articles(articles, self.data_dir)
+    
+    def get_listing_url(self, page):
+        """Get the URL of a listing page (1 is the homepage)"""
+        if page == 1:
+            return self.base_url
+        return f"{self.base_url}/page/{page}/"
+    
+    def collect_new_articles(self):
+        """Collect articles missing from the seen URL index, paging back until a known one"""
+        new_articles = []
+        new_links = set()
+        
+        for page in range(1, self.max_pages + 1):
+            html = self.fetch_page(self.get_listing_url(page))
+            if not html:
+                if page == 1:
+                    return None
+                break
+            
+            page_articles = self.extract_articles(html)
+            if not page_articles:
+                break
+            
+            reached_known = False
+            for article in page_articles:
+                if article['link'] in self.seen_index:
+                    reached_known = True
+                elif article['link'] not in new_links:
+                    new_links.add(article['link'])
+                    new_articles.append(article)
+            
+            logger.info(f"Listing page {page}: {len(page_articles)} articles, {len(new_articles)} new so far")
+            
+            # Everything older than a known article has already been scraped
+            if reached_known:
+                break
+        
+        return new_articles
+    
+    def collect_listing_articles(self):
+        """Collect articles from the HTML listing pages"""
+        if self.incremental:
+            articles = self.collect_new_articles()
+            if articles is not None:
+                logger.info(f"Found {len(articles)} new articles on {self.name}")
+            return articles
+        
+        # Fetch the homepage
+        html = self.fetch_page(self.get_listing_url(1))
+        if not html:
+            return None
+            
+        # Extract articles
+        articles = self.extract_articles(html)
+        logger.info(f"Found {len(articles)} articles on {self.name} homepage")
+        return articles
+    
+    def scrape(self):
+        """Collect listing articles and their details without saving them"""
+        logger.info(f"Starting {self.name} news scraper")
+        
+        # Refresh cookies once for this run
+        self.prime_session(force=True)
+        
+        articles = None
+        if self.use_feed:
+            articles = self.collect_feed_articles()
+            if articles is None:
+                logger.warning(f"Failed to read {self.name} feed, falling back to the HTML listing")
+        
+        if articles is None:
+            articles = self.collect_listing_articles()
+            if articles is None:
+                logger.error(f"Failed to fetch {self.name} homepage")
+                return None
+        
+        articles = [self.normalize_article(article) for article in articles]
+        
+        # Get detailed content for each article
+        self.fetch_article_details(articles)
+        return articles
+    
+    def finish_run(self, articles):
+        """Update the seen URL index and trim the page cache after the articles are saved"""
+        # Only articles with details are marked as seen so failed fetches are retried
+        if self.seen_index is not None:
+            self.seen_index.add_many(article['link'] for article in articles if article.get('content'))
+            self.seen_index.save()
+        
+        if self.http_cache:
+            self.http_cache.evict()
+    
+    def run(self):
+        """Main method to run the scraper"""
+        articles = self.scrape()
+        if articles is None:
+            return None
+        
+        # Save articles
+        self.save_articles(articles)
+        self.finish_run(articles)
+        logger.info("Scraping completed")
+        return articles
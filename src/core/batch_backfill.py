@@ -0,0 +1,215 @@
+import os
+import json
+import time
+import logging
+from datetime import datetime
+from article_corpus import url_hash
+from llm_cache import cache_key
+
+logger = logging.getLogger(__name__)
+
+# Endpoint of every request line in a batch input file
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+# Statuses after which a batch does not change any more
+FINISHED_STATUSES = ('completed', 'failed', 'expired', 'cancelled')
+
+class BatchBackfill:
+    """Generates posts and reel scripts for many archived articles through the OpenAI Batch API
+
+    The prompts of all articles and platforms are written to one JSONL input file, uploaded and run
+    as a batch, which costs half of the synchronous calls. When the batch has finished, every article
+    goes through the same save and tracker steps as a regular run (ContentGenerator.publish_article).
+    Answers are stored in the LLM cache, and prompts already answered there are not sent again.
+    A request without an answer in the batch output falls back to the synchronous generator path.
+    """
+
+    def __init__(self, content_generator, reel_generator=None, client=None, batch_dir=None,
+                 poll_interval=None, max_requests=None, completion_window="24h"):
+        self.content_generator = content_generator
+        self.reel_generator = reel_generator
+        self.client = client or content_generator.llm.client
+        if self.client is None:
+            raise ValueError("An OpenAI client is required for batch generation, set OPENAI_API_KEY")
+
+        self.batch_dir = batch_dir or os.getenv("LLM_BATCH_DIR", "data/batches")
+        self.poll_interval = float(poll_interval if poll_interval is not None else os.getenv("LLM_BATCH_POLL_INTERVAL", 60))
+        # The Batch API accepts up to 50 000 requests per input file
+        self.max_requests = int(max_requests or os.getenv("LLM_BATCH_MAX_REQUESTS", 50000))
+        self.completion_window = completion_window
+        self.llm_cache = content_generator.llm_cache
+        os.makedirs(self.batch_dir, exist_ok=True)
+
+    def prepare_jobs(self, articles):
+        """Key information and chat completion requests of every article that has content and was not processed"""
+        jobs, seen = [], set()
+        for article in articles:
+            if not article.get('content') or not article.get('link'):
+                continue
+            key = url_hash(article['link'])[:16]
+            if key in seen or self.content_generator.tracker.is_article_processed(article):
+                continue
+            seen.add(key)
+
+            info = self.content_generator.extract_key_info(article)
+            job = {
+                'key': key,
+                'article': article,
+                'info': info,
+                'requests': {
+                    'russian': self.content_generator.build_russian_request(info),
+                    'english': self.content_generator.build_english_request(info)
+                }
+            }
+            if self.reel_generator is not None:
+                job['reel_info'] = self.reel_generator.extract_key_info(article)
+                job['requests']['reel'] = self.reel_generator.build_reel_request(job['reel_info'])
+            jobs.append(job)
+        return jobs
+
+    def write_requests(self, requests, path):
+        """Write (custom_id, request body) pairs to a batch input file"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for custom_id, body in requests:
+                line = {'custom_id': custom_id, 'method': 'POST', 'url': BATCH_ENDPOINT, 'body': body}
+                f.write(json.dumps(line, ensure_ascii=False) + '\n')
+        return path
+
+    def submit(self, path):
+        """Upload an input file and start a batch on it"""
+        with open(path, 'rb') as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window,
+            metadata={'source': 'moosa-ai backfill', 'input': os.path.basename(path)}
+        )
+        logger.info(f"Submitted batch {batch.id} from {path}")
+        return batch
+
+    def wait(self, batch_id, timeout=None):
+        """Poll a batch until it has finished
+
+        Raises:
+            TimeoutError: the batch is still running after timeout seconds; it can be resumed by its ID
+        """
+        start = time.monotonic()
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status in FINISHED_STATUSES:
+                logger.info(f"Batch {batch_id} {batch.status}")
+                return batch
+            if timeout is not None and time.monotonic() - start >= timeout:
+                raise TimeoutError(f"Batch {batch_id} is still {batch.status} after {timeout}s")
+
+            counts = batch.request_counts
+            progress = f", {counts.completed + counts.failed}/{counts.total} requests done" if counts else ""
+            logger.info(f"Batch {batch_id} is {batch.status}{progress}")
+            time.sleep(self.poll_interval)
+
+    def fetch_results(self, batch, requests):
+        """Texts of the successful requests of a finished batch by custom_id, stored in the LLM cache as well
+
+        Args:
+            batch: Finished batch
+            requests (dict): custom_id -> request body, to build the cache keys
+        """
+        results = {}
+        if batch.output_file_id:
+            for line in self.client.files.content(batch.output_file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get('response') or {}
+                if response.get('status_code') != 200:
+                    continue
+
+                body = response['body']
+                text = body['choices'][0]['message']['content'].strip()
+                custom_id = record['custom_id']
+                results[custom_id] = text
+
+                request = requests.get(custom_id)
+                if request is not None:
+                    usage = body.get('usage') or {}
+                    self.llm_cache.put(cache_key(**request), request['model'], text,
+                                       usage.get('prompt_tokens', 0), usage.get('completion_tokens', 0))
+
+        counts = batch.request_counts
+        if counts and counts.failed:
+            logger.warning(f"{counts.failed} requests of batch {batch.id} failed, see file {batch.error_file_id}")
+        return results
+
+    def run(self, articles, batch_ids=None, timeout=None):
+        """Generate and publish content for articles through one or more batches
+
+        Args:
+            articles (list): Articles to backfill
+            batch_ids (list): IDs of batches already submitted for the same articles, to resume waiting
+            timeout (float): Seconds to wait for each batch
+
+        Returns:
+            list: Output directories of the published articles
+        """
+        jobs = self.prepare_jobs(articles)
+        if not jobs:
+            logger.warning("No unprocessed articles with content to backfill")
+            return []
+
+        texts, pending = {}, {}
+        for job in jobs:
+            for task, request in job['requests'].items():
+                custom_id = f"{job['key']}:{task}"
+                cached = self.llm_cache.get(cache_key(**request))
+                if cached is not None:
+                    texts[custom_id] = cached
+                else:
+                    pending[custom_id] = request
+        logger.info(f"Backfilling {len(jobs)} articles: {len(pending)} requests for the batch, "
+                    f"{len(texts)} answered from the LLM cache")
+
+        if batch_ids is None and pending:
+            batch_ids = []
+            custom_ids = list(pending)
+            stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            for number, start in enumerate(range(0, len(custom_ids), self.max_requests)):
+                path = os.path.join(self.batch_dir, f"batch_{stamp}_{number}.jsonl")
+                self.write_requests([(custom_id, pending[custom_id]) for custom_id in custom_ids[start:start + self.max_requests]], path)
+                batch_ids.append(self.submit(path).id)
+
+        for batch_id in batch_ids or []:
+            batch = self.wait(batch_id, timeout)
+            if batch.status != 'completed':
+                logger.error(f"Batch {batch_id} {batch.status}, its requests will be generated directly")
+            texts.update(self.fetch_results(batch, pending))
+
+        return self.publish(jobs, texts)
+
+    def publish(self, jobs, texts):
+        """Run the save and tracker steps of the generators on the batch answers"""
+        fallbacks = {
+            'russian': self.content_generator.generate_russian_content,
+            'english': self.content_generator.generate_english_content
+        }
+        if self.reel_generator is not None:
+            fallbacks['reel'] = self.reel_generator.generate_reel_script
+
+        article_dirs = []
+        for job in jobs:
+            results = {}
+            for task in job['requests']:
+                results[task] = texts.get(f"{job['key']}:{task}")
+                if results[task] is None:
+                    logger.warning(f"No batch answer for {task} content of {job['article']['title']}, generating it directly")
+                    results[task] = fallbacks[task](job['reel_info'] if task == 'reel' else job['info'])
+
+            try:
+                article_dirs.append(self.content_generator.publish_article(
+                    job['article'], job['info'], results['russian'], results['english'],
+                    self.reel_generator, job.get('reel_info'), results.get('reel')))
+            except Exception as e:
+                logger.error(f"Error publishing backfilled content for {job['article']['title']}: {e}")
+
+        logger.info(f"Backfilled {len(article_dirs)} of {len(jobs)} articles")
+        return article_dirs
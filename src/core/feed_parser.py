@@ -0,0 +1,65 @@
+import io
+import re
+import logging
+import xml.etree.ElementTree as ET
+
+logger = logging.getLogger(__name__)
+
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+CONTENT_NS = '{http://purl.org/rss/1.0/modules/content/}'
+
+def _local_name(tag):
+    """Strip the namespace from an element tag"""
+    return tag.rsplit('}', 1)[-1]
+
+def _text(element):
+    """Get stripped element text or an empty string"""
+    return (element.text or '').strip() if element is not None else ''
+
+def _parse_rss_item(item):
+    """Convert an RSS <item> into a feed entry dict"""
+    return {
+        'title': _text(item.find('title')),
+        'link': _text(item.find('link')),
+        'category': _text(item.find('category')),
+        'date': _text(item.find('pubDate')),
+        # description is only a teaser, the full body is in content:encoded
+        'content_html': _text(item.find(f'{CONTENT_NS}encoded'))
+    }
+
+def _parse_atom_entry(entry):
+    """Convert an Atom <entry> into a feed entry dict"""
+    link = ''
+    for link_element in entry.findall(f'{ATOM_NS}link'):
+        if link_element.get('rel', 'alternate') == 'alternate':
+            link = link_element.get('href', '')
+            break
+
+    category_element = entry.find(f'{ATOM_NS}category')
+    return {
+        'title': _text(entry.find(f'{ATOM_NS}title')),
+        'link': link,
+        'category': category_element.get('term', '') if category_element is not None else '',
+        'date': _text(entry.find(f'{ATOM_NS}published')) or _text(entry.find(f'{ATOM_NS}updated')),
+        'content_html': _text(entry.find(f'{ATOM_NS}content'))
+    }
+
+def iter_feed_entries(xml_text):
+    """Stream entries from an RSS or Atom feed without building the whole tree"""
+    # The text is already decoded, so the declared encoding must not be applied again
+    xml_text = re.sub(r'^\s*<\?xml[^>]*\?>', '', xml_text)
+    source = io.BytesIO(xml_text.encode('utf-8'))
+
+    try:
+        for _, element in ET.iterparse(source, events=('end',)):
+            name = _local_name(element.tag)
+            if name == 'item' and not element.tag.startswith('{'):
+                yield _parse_rss_item(element)
+            elif name == 'entry' and element.tag.startswith(ATOM_NS):
+                yield _parse_atom_entry(element)
+            else:
+                continue
+            # Processed entries are released to keep memory flat on large feeds
+            element.clear()
+    except ET.ParseError as e:
+        logger.error(f"Error parsing feed: {e}")
@@ -0,0 +1,61 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+class GenerationOrchestrator:
+    """Runs the LLM calls of an article concurrently under a process-wide in-flight cap
+
+    The Russian post, the English post and the reel script of one article do not depend on
+    each other, so their requests are sent at once and the article takes about as long as
+    the slowest call instead of the sum of all three. The worker pool is the cap: no more than
+    LLM_MAX_IN_FLIGHT requests run at the same time, however many generators share it.
+
+    Tasks must not call gather() themselves, a task waiting for a slot it holds would block.
+    """
+
+    # One pool per process, so the cap holds across ContentGenerator and ReelGenerator
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls):
+        """Get the process-wide orchestrator"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def __init__(self, max_in_flight=None):
+        self.max_in_flight = max(1, int(max_in_flight or os.getenv("LLM_MAX_IN_FLIGHT", 4)))
+        self.executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="llm")
+
+    def _timed(self, name, func, args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            logger.info(f"Task {name} finished in {time.perf_counter() - start:.2f}s")
+
+    def gather(self, tasks):
+        """Run tasks concurrently and wait for all of them
+
+        Args:
+            tasks (dict): Task name -> (function, *args)
+
+        Returns:
+            dict: Task name -> result, in the order of tasks
+        """
+        start = time.perf_counter()
+        futures = {name: self.executor.submit(self._timed, name, func, args)
+                   for name, (func, *args) in tasks.items()}
+        results = {name: future.result() for name, future in futures.items()}
+        logger.info(f"Generated {', '.join(results)} in {time.perf_counter() - start:.2f}s")
+        return results
+
+    def shutdown(self):
+        """Wait for running tasks and stop the worker pool"""
+        self.executor.shutdown(wait=True)
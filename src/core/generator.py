@@ -2,13 +2,17 @@ import os
 import json
 import logging
 import random
+from contextlib import nullcontext
 from datetime import datetime, timedelta
-import openai
 from dotenv import load_dotenv
 from style_config import STYLE_CONFIG, get_style_element
 from article_tracker import ArticleTracker
-from excel_tracker import ExcelContentTracker
-from google_sheets_tracker import GoogleSheetsTracker
+from article_corpus import ArticleCorpus
+from article_jsonl import iter_articles
+from keyword_matcher import IMPORTANT_KEYWORDS
+from generation_orchestrator import GenerationOrchestrator
+from llm_cache import LLMResponseCache
+from llm_gateway import LLMGateway, PartialCompletionError, stream_to_file
 
 # Load environment variables
 load_dotenv()
@@ -28,7 +32,7 @@ logger = logging.getLogger(__name__)
 class ContentGenerator:
     """Class to generate content based on scraped articles"""
     
-    def __init__(self):
+    def __init__(self, content_tracker=None):
         self.data_dir = "data"
         self.output_dir = "output"
         os.makedirs(self.output_dir, exist_ok=True)
@@ -36,12 +40,25 @@ class ContentGenerator:
         # Initialize article tracker
         self.tracker = ArticleTracker()
         
-        # Load OpenAI API key from environment variable
-        self.api_key = os.getenv("OPENAI_API_KEY")
+        # Scraped articles and how many days back to look for unprocessed ones
+        self.corpus = ArticleCorpus.shared(os.path.join(self.data_dir, "articles.db"), self.data_dir)
+        self.lookback_days = int(os.getenv("ARTICLE_LOOKBACK_DAYS", "0"))
+        
+        # Optional content tracker (SQLite, Excel, Google Sheets or an AsyncTrackerWriter around one)
+        self.content_tracker = content_tracker
+        
+        # Concurrent LLM calls, capped process-wide, and the cache of their responses
+        self.orchestrator = GenerationOrchestrator.shared()
+        self.llm_cache = LLMResponseCache.shared(os.path.join(self.data_dir, "llm_cache.db"))
+        
+        # Shared LLM gateway: pooled client, timeouts, retries, token budget and per-call accounting
+        self.llm = LLMGateway.shared()
+        self.api_key = self.llm.api_key
         if not self.api_key:
             logger.warning("OpenAI API key not found. Please set OPENAI_API_KEY environment variable.")
-        else:
-            self.client = openai.OpenAI(api_key=self.api_key)
+        
+        # Stream AI texts into their output files as they are generated
+        self.stream = os.getenv("LLM_STREAM", "0").lower() in ("1", "true", "yes")
     
     def load_latest_articles(self, test_file=None):
         """Load the latest scraped articles or from a test file if specified"""
@@ -49,53 +66,27 @@ class ContentGenerator:
         if test_file:
             logger.info(f"Using test file: {test_file}")
             try:
-                with open(test_file, 'r', encoding='utf-8') as f:
-                    articles = json.load(f)
+                # Both JSON arrays and JSON Lines files are accepted
+                articles = list(iter_articles(test_file))
                 logger.info(f"Loaded {len(articles)} articles from test file {test_file}")
                 return articles
             except Exception as e:
                 logger.error(f"Error loading articles from test file: {e}")
                 return None
         
-        # Otherwise, use the normal flow
-        today = datetime.now().strftime("%Y-%m-%d")
-        tomorrow = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
-        
-        logger.info(f"Looking for articles with dates: today={today}, tomorrow={tomorrow}")
-        
-        # For testing purposes, try tomorrow's file first
-        test_mode = True  # Set to True for testing with tomorrow's articles
+        # Otherwise, take unprocessed articles scraped since ARTICLE_LOOKBACK_DAYS days ago from the corpus
+        # (up to tomorrow, so articles dated ahead by the scraper's timezone are included)
+        start_date = (datetime.now() - timedelta(days=self.lookback_days)).strftime("%Y-%m-%d")
+        end_date = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+        logger.info(f"Looking for new articles scraped between {start_date} and {end_date}")
         
-        if test_mode:
-            # Try tomorrow's date first (for testing)
-            filename = os.path.join(self.data_dir, f"articles_{tomorrow}.json")
-            logger.info(f"Test mode: Checking for tomorrow's file first: {filename}")
-            
-            if os.path.exists(filename):
-                try:
-                    with open(filename, 'r', encoding='utf-8') as f:
-                        articles = json.load(f)
-                    logger.info(f"Loaded {len(articles)} articles from {filename}")
-                    return articles
-                except Exception as e:
-                    logger.error(f"Error loading articles: {e}")
-        
-        # Normal flow - try today's articles
-        filename = os.path.join(self.data_dir, f"articles_{today}.json")
-        logger.info(f"Checking for file: {filename}")
-        
-        if not os.path.exists(filename):
-            logger.info(f"No articles found for today ({today})")
-            return None
-            
-        try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                articles = json.load(f)
-            logger.info(f"Loaded {len(articles)} articles from {filename}")
-            return articles
-        except Exception as e:
-            logger.error(f"Error loading articles: {e}")
+        articles = self.corpus.query(start_date, end_date, status='new')
+        if not articles:
+            logger.info(f"No new articles found in {self.corpus.db_path}")
             return None
+        
+        logger.info(f"Loaded {len(articles)} articles from {self.corpus.db_path}")
+        return articles
     
     def select_best_article(self, articles):
         """Select the best article for content generation"""
@@ -132,11 +123,7 @@ class ContentGenerator:
                 score += 1
                 
             # Score based on keywords in title
-            title_lower = article['title'].lower()
-            important_keywords = ['million', 'funding', 'investment', 'launch', 'startup', 'innovation', 'technology']
-            for keyword in important_keywords:
-                if keyword in title_lower:
-                    score += 1
+            score += IMPORTANT_KEYWORDS.count(article['title'])
             
             # Add to scored articles
             scored_articles.append((article, score))
@@ -225,100 +212,118 @@ class ContentGenerator:
             'content_summary': '\n'.join(content[:3]) if content else ""
         }
     
-    def generate_russian_content_with_ai(self, article_info):
+    def build_russian_request(self, article_info):
+        """Chat completion parameters of the Russian post for Telegram and TenChat"""
+        prompt = f"""
+        Создай пост для Telegram о стартапе. 
+        
+        Информация о стартапе:
+        Название: {article_info.get('company_name', '')}
+        Заголовок статьи: {article_info.get('title', '')}
+        Сумма инвестиций: {article_info.get('funding_amount', '')}
+        Краткое содержание: {article_info.get('content_summary', '')[:300]}
+        
+        Требования к посту:
+        1. Пост должен быть на русском языке
+        2. Структура: яркое начало → основная часть с фактами → заключение с призывом к действию
+        3. Стиль: {', '.join(get_style_element('tone'))}
+        4. Длина: 150-200 слов
+        5. Добавь эмодзи для визуального разделения
+        6. В конце добавь рейтинг Дубского (от 1 до 5 ракет 🚀) и краткое обоснование
+        7. Добавь 4-5 релевантных хэштегов
+        8. Добавь призыв подписаться на канал: @https://t.me/evgeniydubskiy
+        """
+        
+        return {
+            'model': "gpt-3.5-turbo",
+            'messages': [
+                {"role": "system", "content": "Ты опытный копирайтер, специализирующийся на создании контента о стартапах и технологиях."},
+                {"role": "user", "content": prompt}
+            ],
+            'temperature': 0.7,
+            'max_tokens': 800
+        }
+    
+    def generate_russian_content_with_ai(self, article_info, output_path=None, on_chunk=None):
         """Generate Russian content for Telegram and TenChat using OpenAI API"""
         if not self.api_key:
             logger.error("OpenAI API key not set")
             return self.generate_russian_content_without_ai(article_info)
             
         try:
-            # Prepare the prompt
-            prompt = f"""
-            Создай пост для Telegram о стартапе. 
-            
-            Информация о стартапе:
-            Название: {article_info.get('company_name', '')}
-            Заголовок статьи: {article_info.get('title', '')}
-            Сумма инвестиций: {article_info.get('funding_amount', '')}
-            Краткое содержание: {article_info.get('content_summary', '')[:300]}
-            
-            Требования к посту:
-            1. Пост должен быть на русском языке
-            2. Структура: яркое начало → основная часть с фактами → заключение с призывом к действию
-            3. Стиль: {get_style_element('tone', 'russian')}
-            4. Длина: 150-200 слов
-            5. Добавь эмодзи для визуального разделения
-            6. В конце добавь рейтинг Дубского (от 1 до 5 ракет 🚀) и краткое обоснование
-            7. Добавь 4-5 релевантных хэштегов
-            8. Добавь призыв подписаться на канал: @https://t.me/evgeniydubskiy
-            """
-            
-            # Call OpenAI API with new client format
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "Ты опытный копирайтер, специализирующийся на создании контента о стартапах и технологиях."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=800
-            )
-            
-            # Extract the response text
-            content = response.choices[0].message.content.strip()
+            request = self.build_russian_request(article_info)
+            if self.stream and output_path:
+                # Stream the post into its file, chunks also go to on_chunk as they arrive
+                content = stream_to_file(self.llm, request, output_path, on_chunk, cache=self.llm_cache)
+            else:
+                # Call the LLM through the gateway, identical requests are answered from the response cache
+                content = self.llm.chat_completion(**request, cache=self.llm_cache)
             
             logger.info(f"Generated Russian content with AI for {article_info['title']}")
             return content
             
+        except PartialCompletionError as e:
+            logger.error(f"Russian content stream stopped after {len(e.partial_text)} characters ({e}), "
+                         f"partial text kept in {e.partial_path}; using the template instead")
+            return self.generate_russian_content_without_ai(article_info)
         except Exception as e:
             logger.error(f"Error generating Russian content with AI: {str(e)}")
             return self.generate_russian_content_without_ai(article_info)
     
-    def generate_english_content_with_ai(self, article_info):
+    def build_english_request(self, article_info):
+        """Chat completion parameters of the English post for LinkedIn and Medium"""
+        prompt = f"""
+        Create a post about a startup for LinkedIn and Medium. 
+        
+        Startup information:
+        Name: {article_info.get('company_name', '')}
+        Article title: {article_info.get('title', '')}
+        Funding amount: {article_info.get('funding_amount', '')}
+        Summary: {article_info.get('content_summary', '')[:300]}
+        
+        Requirements:
+        1. The post should be in English
+        2. Structure: attention-grabbing opening → main part with facts → conclusion with a call to action
+        3. Style: {', '.join(get_style_element('tone'))}
+        4. Length: 150-200 words
+        5. Add emojis for visual separation
+        6. At the end, add Dubskiy Rating (from 1 to 5 rockets 🚀) and a brief justification
+        7. Add 4-5 relevant hashtags
+        8. Add links to social media: Instagram: @https://www.instagram.com/erarta.ai/ and X: @https://x.com/evgeniydubskiy
+        """
+        
+        return {
+            'model': "gpt-3.5-turbo",
+            'messages': [
+                {"role": "system", "content": "You are an experienced copywriter specializing in content about startups and technology."},
+                {"role": "user", "content": prompt}
+            ],
+            'temperature': 0.7,
+            'max_tokens': 800
+        }
+    
+    def generate_english_content_with_ai(self, article_info, output_path=None, on_chunk=None):
         """Generate English content for LinkedIn and Medium using OpenAI API"""
         if not self.api_key:
             logger.error("OpenAI API key not set")
             return self.generate_english_content_without_ai(article_info)
             
         try:
-            # Prepare the prompt
-            prompt = f"""
-            Create a post about a startup for LinkedIn and Medium. 
-            
-            Startup information:
-            Name: {article_info.get('company_name', '')}
-            Article title: {article_info.get('title', '')}
-            Funding amount: {article_info.get('funding_amount', '')}
-            Summary: {article_info.get('content_summary', '')[:300]}
-            
-            Requirements:
-            1. The post should be in English
-            2. Structure: attention-grabbing opening → main part with facts → conclusion with a call to action
-            3. Style: {get_style_element('tone', 'english')}
-            4. Length: 150-200 words
-            5. Add emojis for visual separation
-            6. At the end, add Dubskiy Rating (from 1 to 5 rockets 🚀) and a brief justification
-            7. Add 4-5 relevant hashtags
-            8. Add links to social media: Instagram: @https://www.instagram.com/erarta.ai/ and X: @https://x.com/evgeniydubskiy
-            """
-            
-            # Call OpenAI API with new client format
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are an experienced copywriter specializing in content about startups and technology."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=800
-            )
-            
-            # Extract the response text
-            content = response.choices[0].message.content.strip()
+            request = self.build_english_request(article_info)
+            if self.stream and output_path:
+                # Stream the post into its file, chunks also go to on_chunk as they arrive
+                content = stream_to_file(self.llm, request, output_path, on_chunk, cache=self.llm_cache)
+            else:
+                # Call the LLM through the gateway, identical requests are answered from the response cache
+                content = self.llm.chat_completion(**request, cache=self.llm_cache)
             
             logger.info(f"Generated English content with AI for {article_info['title']}")
             return content
             
+        except PartialCompletionError as e:
+            logger.error(f"English content stream stopped after {len(e.partial_text)} characters ({e}), "
+                         f"partial text kept in {e.partial_path}; using the template instead")
+            return self.generate_english_content_without_ai(article_info)
         except Exception as e:
             logger.error(f"Error generating English content with AI: {str(e)}")
             return self.generate_english_content_without_ai(article_info)
@@ -559,8 +564,25 @@ class ContentGenerator:
             logger.error(f"Error saving article info: {e}")
             return None
     
-    def run(self, test_file=None):
-        """Run the content generator"""
+    def generate_russian_content(self, article_info, output_path=None, on_chunk=None):
+        """Generate Russian content with AI when an API key is set, otherwise from templates"""
+        if self.api_key:
+            return self.generate_russian_content_with_ai(article_info, output_path, on_chunk)
+        return self.generate_russian_content_without_ai(article_info)
+    
+    def generate_english_content(self, article_info, output_path=None, on_chunk=None):
+        """Generate English content with AI when an API key is set, otherwise from templates"""
+        if self.api_key:
+            return self.generate_english_content_with_ai(article_info, output_path, on_chunk)
+        return self.generate_english_content_without_ai(article_info)
+    
+    def run(self, test_file=None, reel_generator=None, on_chunk=None):
+        """Run the content generator
+        
+        With a reel_generator the reel script for the same article is generated in the same pass,
+        concurrently with the posts. With LLM_STREAM=1 on_chunk(name, text) receives the streamed
+        text of 'russian', 'english' and 'reel' as it arrives.
+        """
         # Load the latest articles
         articles = self.load_latest_articles(test_file)
         
@@ -575,100 +597,110 @@ class ContentGenerator:
             logger.warning("No suitable article found for content generation")
             return
         
+        cache_stats, llm_stats = self.llm_cache.snapshot(), self.llm.snapshot()
+        article_dir = self.process_article(best_article, reel_generator, on_chunk)
+        logger.info(self.llm_cache.report(since=cache_stats))
+        logger.info(self.llm.report(since=llm_stats))
+        return article_dir
+    
+    def process_article(self, best_article, reel_generator=None, on_chunk=None):
+        """Generate, save and track the posts (and optionally the reel script) for one article"""
         # Extract key information from the article
         article_info = self.extract_key_info(best_article)
         
-        # Create directory for the article
+        # The directory exists before generation, streamed texts are written into it as they arrive
         article_dir = self.create_article_directory(best_article)
         
-        # Generate content in Russian
-        logger.info("Generating Russian content")
-        if self.api_key:
-            russian_content = self.generate_russian_content_with_ai(article_info)
-        else:
-            russian_content = self.generate_russian_content_without_ai(article_info)
+        def chunk_callback(name):
+            return (lambda text: on_chunk(name, text)) if on_chunk is not None else None
         
-        # Save Russian content
-        self.save_content(article_dir, russian_content, "telegram_post_ru.md")
+        # All prompts of the article are sent at once
+        tasks = {
+            'russian': (self.generate_russian_content, article_info,
+                        os.path.join(article_dir, "telegram_post_ru.md"), chunk_callback('russian')),
+            'english': (self.generate_english_content, article_info,
+                        os.path.join(article_dir, "linkedin_post_en.md"), chunk_callback('english'))
+        }
+        reel_info = None
+        if reel_generator is not None:
+            reel_info = reel_generator.extract_key_info(best_article)
+            tasks['reel'] = (reel_generator.generate_reel_script, reel_info,
+                             reel_generator.reel_script_path(best_article['title']), chunk_callback('reel'))
         
-        # Generate content in English
-        logger.info("Generating English content")
-        if self.api_key:
-            english_content = self.generate_english_content_with_ai(article_info)
-        else:
-            english_content = self.generate_english_content_without_ai(article_info)
+        logger.info(f"Generating {', '.join(tasks)} content")
+        results = self.orchestrator.gather(tasks)
         
-        # Save English content
-        self.save_content(article_dir, english_content, "linkedin_post_en.md")
+        return self.publish_article(best_article, article_info, results['russian'], results['english'],
+                                    reel_generator, reel_info, results.get('reel'))
+    
+    def publish_article(self, best_article, article_info, russian_content, english_content,
+                        reel_generator=None, reel_info=None, reel_script=None):
+        """Save and track generated posts (and the reel script) and mark the article as processed
+        
+        Shared by process_article and the batch backfill, which generates the texts elsewhere.
+        """
+        # Create directory for the article
+        article_dir = self.create_article_directory(best_article)
         
         # Generate Dubskiy rating
         russian_rating = self.generate_dubskiy_rating(article_info, "russian")
         english_rating = self.generate_dubskiy_rating(article_info, "english")
         
-        # Save article info
-        self.save_article_info(article_dir, best_article)
-        
-        # Mark article as processed
-        self.tracker.mark_article_processed(best_article, article_dir)
+        # Save Russian and English content
+        self.save_content(article_dir, russian_content, "telegram_post_ru.md")
+        self.save_content(article_dir, english_content, "linkedin_post_en.md")
         
-        # Если трекер - это экземпляр ExcelContentTracker или GoogleSheetsTracker,
-        # добавляем контент в соответствующую таблицу
-        if isinstance(self.tracker, (ExcelContentTracker, GoogleSheetsTracker)):
-            logger.info("Adding content to tracker")
-            
-            # Добавляем статью в трекер
-            article_id = self.tracker.add_article(best_article, best_article.get('content', ''))
-            
-            # Добавляем русский контент
-            russian_content_data = {
-                'title': best_article['title'],
-                'source_url': best_article.get('link', ''),
-                'category': best_article.get('category', ''),
-                'content_type': 'telegram_post',
-                'language': 'ru',
-                'platform': 'Telegram',
-                'tags': '#стартапы #инновации #технологии #евгенийдубский #эрартаэйай',
-                'dubskiy_rating': russian_rating,
-                'notes': 'Автоматически сгенерированный пост'
-            }
+        article_id = None
+        if self.content_tracker is not None:
+            logger.info("Adding article and posts to content tracker")
             
-            russian_content_path = os.path.join(article_dir, "telegram_post_ru.md")
-            if os.path.exists(russian_content_path):
-                with open(russian_content_path, 'r', encoding='utf-8') as f:
-                    russian_content_text = f.read()
+            # The article and both posts are written in one tracker transaction when the tracker has one:
+            # one workbook rewrite for Excel, one append_rows per sheet for Google Sheets
+            batch = self.content_tracker.transaction() if hasattr(self.content_tracker, 'transaction') else nullcontext()
+            with batch:
+                article_id = self.content_tracker.add_article(best_article, best_article.get('content', ''))
                 
-                russian_content_id = self.tracker.add_content(
-                    russian_content_data, 
-                    article_id, 
-                    russian_content_text
-                )
+                russian_content_data = {
+                    'title': best_article['title'],
+                    'source_url': best_article.get('link', ''),
+                    'category': best_article.get('category', ''),
+                    'content_type': 'telegram_post',
+                    'language': 'ru',
+                    'platform': 'Telegram',
+                    'tags': '#стартапы #инновации #технологии #евгенийдубский #эрартаэйай',
+                    'dubskiy_rating': russian_rating,
+                    'notes': 'Автоматически сгенерированный пост'
+                }
+                russian_content_id = self.content_tracker.add_content(russian_content_data, article_id, russian_content)
                 logger.info(f"Added Russian content with ID: {russian_content_id}")
-            
-            # Добавляем английский контент
-            english_content_data = {
-                'title': best_article['title'],
-                'source_url': best_article.get('link', ''),
-                'category': best_article.get('category', ''),
-                'content_type': 'linkedin_post',
-                'language': 'en',
-                'platform': 'LinkedIn',
-                'tags': '#analytics #businesscases #startupexperience #evgeniydubskiy #erartaai',
-                'dubskiy_rating': english_rating,
-                'notes': 'Automatically generated post'
-            }
-            
-            english_content_path = os.path.join(article_dir, "linkedin_post_en.md")
-            if os.path.exists(english_content_path):
-                with open(english_content_path, 'r', encoding='utf-8') as f:
-                    english_content_text = f.read()
                 
-                english_content_id = self.tracker.add_content(
-                    english_content_data, 
-                    article_id, 
-                    english_content_text
-                )
+                english_content_data = {
+                    'title': best_article['title'],
+                    'source_url': best_article.get('link', ''),
+                    'category': best_article.get('category', ''),
+                    'content_type': 'linkedin_post',
+                    'language': 'en',
+                    'platform': 'LinkedIn',
+                    'tags': '#analytics #businesscases #startupexperience #evgeniydubskiy #erartaai',
+                    'dubskiy_rating': english_rating,
+                    'notes': 'Automatically generated post'
+                }
+                english_content_id = self.content_tracker.add_content(english_content_data, article_id, english_content)
                 logger.info(f"Added English content with ID: {english_content_id}")
         
+        # Save and track the reel script, linked to the same tracker article when both share a tracker
+        if reel_generator is not None:
+            shared_article_id = article_id if reel_generator.content_tracker is self.content_tracker else None
+            reel_generator.publish_reel(best_article, reel_info, reel_script, shared_article_id)
+        
+        # Save article info
+        self.save_article_info(article_dir, best_article)
+        
+        # Mark article as processed
+        self.tracker.mark_article_processed(best_article, article_dir)
+        if best_article.get('link'):
+            self.corpus.set_status(best_article['link'], 'processed')
+        
         logger.info(f"Content generation completed for article: {best_article['title']}")
         return article_dir
 
@@ -0,0 +1,38 @@
+import os
+import re
+import logging
+from bs4 import BeautifulSoup, SoupStrainer
+
+logger = logging.getLogger(__name__)
+
+# Backends in order of preference; lxml is a C parser and much faster than html.parser
+PARSER_BACKENDS = ['lxml', 'html.parser']
+
+# Only the nodes the scraper reads are built into the tree
+LISTING_STRAINER = SoupStrainer('article')
+DETAILS_STRAINER = SoupStrainer(class_=re.compile(r'(^|\s)(entry-content|post-thumbnail)(\s|$)'))
+
+def is_backend_available(backend):
+    """Check if a parser backend can be used"""
+    if backend == 'html.parser':
+        return True
+    try:
+        BeautifulSoup('<p></p>', backend)
+        return True
+    except Exception:
+        return False
+
+def get_parser_backend(preferred=None):
+    """Get the parser backend to use, falling back to html.parser"""
+    preferred = preferred or os.getenv("HTML_PARSER", "auto")
+    candidates = PARSER_BACKENDS if preferred == "auto" else [preferred, 'html.parser']
+
+    for backend in candidates:
+        if is_backend_available(backend):
+            return backend
+        logger.warning(f"HTML parser backend {backend} is not available")
+    return 'html.parser'
+
+def make_soup(html, backend='html.parser', parse_only=None):
+    """Build a BeautifulSoup tree, optionally restricted by a strainer"""
+    return BeautifulSoup(html, backend, parse_only=parse_only)
@@ -0,0 +1,131 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+class HTTPCache:
+    """On-disk cache of HTTP responses used for conditional GET requests"""
+
+    def __init__(self, cache_dir="data/http_cache", max_bytes=None, max_age_days=None):
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Eviction limits: total size of cached bodies and age since last use
+        max_mb = float(os.getenv("HTTP_CACHE_MAX_MB", 200))
+        self.max_bytes = int(max_bytes if max_bytes is not None else max_mb * 1024 * 1024)
+        self.max_age = float(max_age_days if max_age_days is not None else os.getenv("HTTP_CACHE_MAX_AGE_DAYS", 30)) * 86400
+
+        self._lock = threading.Lock()
+
+    def _path(self, url):
+        """Get the cache file path for a URL"""
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, url):
+        """Get the cached entry for a URL or None"""
+        path = self._path(url)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except Exception as e:
+            logger.warning(f"Error reading cache entry for {url}: {e}")
+            return None
+
+        # Expired entries are treated as missing
+        if time.time() - entry.get('last_access', 0) > self.max_age:
+            return None
+        return entry
+
+    def conditional_headers(self, entry):
+        """Build If-None-Match / If-Modified-Since headers for a cached entry"""
+        headers = {}
+        if not entry:
+            return headers
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url, response):
+        """Store a successful response if it can be revalidated later"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+
+        now = time.time()
+        entry = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'stored_at': now,
+            'last_access': now,
+            'body': response.text
+        }
+        self._write(url, entry)
+
+    def touch(self, url, entry):
+        """Update the last access time of an entry served from cache"""
+        entry['last_access'] = time.time()
+        self._write(url, entry)
+
+    def _write(self, url, entry):
+        """Atomically write a cache entry"""
+        path = self._path(url)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Error writing cache entry for {url}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def evict(self):
+        """Remove expired entries and trim the cache to its size limit"""
+        with self._lock:
+            now = time.time()
+            entries = []
+            removed = 0
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                # File mtime follows last_access because touch() rewrites the entry
+                if now - stat.st_mtime > self.max_age:
+                    removed += self._remove(path)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            # Drop least recently used entries until the cache fits
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                removed += self._remove(path)
+                total -= size
+
+            if removed:
+                logger.info(f"Evicted {removed} entries from HTTP cache")
+
+    def _remove(self, path):
+        """Remove a cache file, tolerating another process removing it first"""
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
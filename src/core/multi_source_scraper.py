@@ -0,0 +1,83 @@
+import os
+import re
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from base_scraper import SCRAPER_REGISTRY, get_scraper_class, save_articles
+# Importing the source modules registers their scrapers
+import scraper  # noqa: F401
+
+logger = logging.getLogger(__name__)
+
+def normalize_url(url):
+    """Normalize a URL for cross-source deduplication"""
+    parsed = urlparse(url.strip())
+    host = parsed.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    return f"{host}{parsed.path.rstrip('/')}"
+
+def normalize_title(title):
+    """Normalize a title for cross-source deduplication"""
+    return re.sub(r'\W+', ' ', title.lower()).strip()
+
+def deduplicate_articles(articles):
+    """Drop articles whose URL or title was already seen, keeping the first occurrence"""
+    seen_urls = set()
+    seen_titles = set()
+    unique = []
+    for article in articles:
+        url_key = normalize_url(article['link'])
+        title_key = normalize_title(article['title'])
+        if url_key in seen_urls or (title_key and title_key in seen_titles):
+            continue
+        seen_urls.add(url_key)
+        seen_titles.add(title_key)
+        unique.append(article)
+    return unique
+
+class MultiSourceScraper:
+    """Runs several registered news sources in parallel and merges their articles"""
+
+    def __init__(self, sources=None, data_dir="data", **scraper_options):
+        if sources is None:
+            sources = [name.strip() for name in os.getenv("SCRAPER_SOURCES", "menabytes").split(',') if name.strip()]
+        self.data_dir = data_dir
+        self.scrapers = [get_scraper_class(name)(**scraper_options) for name in sources]
+
+    def _scrape_source(self, source_scraper):
+        """Scrape one source, isolating its failures from the other sources"""
+        try:
+            return source_scraper.scrape() or []
+        except Exception as e:
+            logger.error(f"Error scraping {source_scraper.name}: {e}")
+            return []
+
+    def run(self):
+        """Scrape all sources in parallel and save the merged articles"""
+        logger.info(f"Starting news scraping from: {', '.join(s.name for s in self.scrapers)}")
+
+        # Each source has its own session and host throttle, so the run takes as long as the slowest one
+        with ThreadPoolExecutor(max_workers=max(1, len(self.scrapers))) as executor:
+            results = list(executor.map(self._scrape_source, self.scrapers))
+
+        merged = [article for articles in results for article in articles]
+        articles = deduplicate_articles(merged)
+        logger.info(f"Collected {len(merged)} articles, {len(articles)} after deduplication")
+
+        save_articles(articles, self.data_dir)
+        for source_scraper, source_articles in zip(self.scrapers, results):
+            source_scraper.finish_run(source_articles)
+
+        logger.info("Scraping completed")
+        return articles
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Scrape startup news from several sources')
+    parser.add_argument('--sources', type=str, help=f"Comma-separated sources, available: {', '.join(sorted(SCRAPER_REGISTRY))}")
+    parser.add_argument('--incremental', action='store_true', help='Only fetch articles that were not scraped before')
+    args = parser.parse_args()
+
+    sources = args.sources.split(',') if args.sources else None
+    MultiSourceScraper(sources, incremental=args.incremental or None).run()
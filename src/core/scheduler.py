@@ -4,7 +4,7 @@ import logging
 import os
 from datetime import datetime
 from dotenv import load_dotenv
-from startup_news_scraper import MENABytesNewsScraper
+from multi_source_scraper import MultiSourceScraper
 from content_generator import ContentGenerator
 from reel_generator import ReelGenerator
 
@@ -30,18 +30,14 @@ def job():
     try:
         # Step 1: Scrape latest news
         logger.info("Starting news scraping")
-        scraper = MENABytesNewsScraper()
+        scraper = MultiSourceScraper()
         scraper.run()
         
-        # Step 2: Generate content
-        logger.info("Starting content generation")
+        # Step 2: Generate posts and the Instagram reel script for the best article in one pass,
+        # their LLM calls run concurrently
+        logger.info("Starting content and reel script generation")
         generator = ContentGenerator()
-        generator.run()
-        
-        # Step 3: Generate Instagram reel script
-        logger.info("Starting reel script generation")
-        reel_generator = ReelGenerator()
-        reel_generator.run()
+        generator.run(reel_generator=ReelGenerator())
         
         logger.info("Scheduled job completed successfully")
     except Exception as e:
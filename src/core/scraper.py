@@ -1,15 +1,9 @@
-import requests
-from bs4 import BeautifulSoup
-import json
-import os
 from datetime import datetime
 import logging
-import time
-import random
-import urllib3
-
-# Disable SSL warnings
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+import argparse
+from base_scraper import BaseNewsScraper, register_scraper
+from html_parser import make_soup, LISTING_STRAINER, DETAILS_STRAINER
+from scraper_fixtures import FixtureStore
 
 # Configure logging
 logging.basicConfig(
@@ -23,62 +17,28 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-class MENABytesNewsScraper:
+@register_scraper
+class MENABytesNewsScraper(BaseNewsScraper):
     """Class to scrape startup news from MENABytes website"""
     
-    def __init__(self):
-        self.base_url = "https://www.menabytes.com"
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Sec-Fetch-User': '?1',
-            'Cache-Control': 'max-age=0'
-        }
-        self.data_dir = "data"
-        os.makedirs(self.data_dir, exist_ok=True)
-        
-    def fetch_page(self, url):
-        """Fetch HTML content from a URL"""
-        try:
-            # Add a random delay to mimic human behavior
-            time.sleep(random.uniform(1, 3))
-            
-            # Create a session to maintain cookies
-            session = requests.Session()
-            
-            # First make a HEAD request to get cookies
-            session.head(url, headers=self.headers)
-            
-            # Then make the actual GET request
-            response = session.get(
-                url, 
-                headers=self.headers,
-                timeout=30,
-                verify=False  # Disable SSL verification
-            )
-            response.raise_for_status()
-            return response.text
-        except requests.RequestException as e:
-            logger.error(f"Error fetching {url}: {e}")
-            return None
+    name = "menabytes"
+    base_url = "https://www.menabytes.com"
+    feed_url = "https://www.menabytes.com/feed/"
     
     def extract_articles(self, html):
         """Extract article data from HTML content"""
         if not html:
             return []
             
-        soup = BeautifulSoup(html, 'html.parser')
         articles = []
         
         # Find all article elements (adjust selectors based on actual website structure)
-        article_elements = soup.select('article') or soup.select('.post')
+        article_elements = []
+        if self.use_strainer:
+            article_elements = make_soup(html, self.parser, LISTING_STRAINER).select('article')
+        if not article_elements:
+            soup = make_soup(html, self.parser)
+            article_elements = soup.select('article') or soup.select('.post')
         
         for article in article_elements:
             try:
@@ -114,31 +74,16 @@ class MENABytesNewsScraper:
                 
         return articles
     
-    def is_startup_related(self, title, category):
-        """Check if article is related to startups"""
-        startup_keywords = [
-            'startup', 'funding', 'investment', 'seed', 'series', 'venture', 'raised',
-            'million', 'fintech', 'techstars', 'accelerator', 'incubator', 'founder',
-            'entrepreneur', 'launch', 'acquisition', 'exit'
-        ]
-        
-        title_lower = title.lower()
-        category_lower = category.lower()
-        
-        # Check if any keyword is in the title or category
-        return any(keyword in title_lower or keyword in category_lower for keyword in startup_keywords)
-    
-    def get_article_details(self, url):
-        """Get detailed content from an article page"""
-        html = self.fetch_page(url)
-        if not html:
-            return None
-            
-        soup = BeautifulSoup(html, 'html.parser')
-        
+    def parse_article_details(self, html, url=None):
+        """Extract content and main image from article page HTML"""
         try:
             # Extract article content
-            content_element = soup.select_one('.entry-content') or soup.select_one('article .content')
+            soup = make_soup(html, self.parser, DETAILS_STRAINER) if self.use_strainer else None
+            content_element = soup.select_one('.entry-content') if soup else None
+            if not content_element:
+                # The fallback selector needs the full tree
+                soup = make_soup(html, self.parser)
+                content_element = soup.select_one('.entry-content') or soup.select_one('article .content')
             if not content_element:
                 return None
                 
@@ -156,64 +101,23 @@ class MENABytesNewsScraper:
         except Exception as e:
             logger.error(f"Error extracting article details from {url}: {e}")
             return None
-    
-    def save_articles(self, articles):
-        """Save articles to a JSON file"""
-        if not articles:
-            logger.info("No articles to save")
-            return
-            
-        today = datetime.now().strftime("%Y-%m-%d")
-        filename = os.path.join(self.data_dir, f"articles_{today}.json")
-        
-        # Check if file exists and load existing data
-        if os.path.exists(filename):
-            with open(filename, 'r', encoding='utf-8') as f:
-                existing_data = json.load(f)
-                
-            # Get existing URLs to avoid duplicates
-            existing_urls = [article['link'] for article in existing_data]
-            
-            # Only add new articles
-            new_articles = [article for article in articles if article['link'] not in existing_urls]
-            if new_articles:
-                combined_articles = existing_data + new_articles
-                with open(filename, 'w', encoding='utf-8') as f:
-                    json.dump(combined_articles, f, ensure_ascii=False, indent=2)
-                logger.info(f"Added {len(new_articles)} new articles to {filename}")
-            else:
-                logger.info("No new articles to add")
-        else:
-            # Create new file
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(articles, f, ensure_ascii=False, indent=2)
-            logger.info(f"Saved {len(articles)} articles to {filename}")
-    
-    def run(self):
-        """Main method to run the scraper"""
-        logger.info("Starting MENABytes news scraper")
-        
-        # Fetch the homepage
-        html = self.fetch_page(self.base_url)
-        if not html:
-            logger.error("Failed to fetch homepage")
-            return
-            
-        # Extract articles
-        articles = self.extract_articles(html)
-        logger.info(f"Found {len(articles)} articles on homepage")
-        
-        # Get detailed content for each article
-        for article in articles:
-            details = self.get_article_details(article['link'])
-            if details:
-                article.update(details)
-                logger.info(f"Added details for article: {article['title']}")
-        
-        # Save articles
-        self.save_articles(articles)
-        logger.info("Scraping completed")
 
 if __name__ == "__main__":
-    scraper = MENABytesNewsScraper()
+    parser = argparse.ArgumentParser(description='Scrape startup news from MENABytes')
+    parser.add_argument('--incremental', action='store_true', help='Only fetch articles that were not scraped before')
+    parser.add_argument('--max-pages', type=int, help='Maximum number of listing pages in incremental mode')
+    parser.add_argument('--force-refresh', action='store_true', help='Re-fetch details of already scraped articles')
+    parser.add_argument('--use-feed', action='store_true', help='Discover articles from the RSS feed instead of the homepage')
+    parser.add_argument('--record-dir', type=str, help='Save fetched pages as fixtures to this directory')
+    parser.add_argument('--replay-dir', type=str, help='Replay pages from this fixture directory instead of the network')
+    args = parser.parse_args()
+    
+    scraper = MENABytesNewsScraper(
+        incremental=args.incremental or None,
+        max_pages=args.max_pages,
+        force_refresh=args.force_refresh,
+        record_dir=args.record_dir,
+        replay_store=FixtureStore(args.replay_dir) if args.replay_dir else None,
+        use_feed=args.use_feed or None
+    )
     scraper.run() 
\ No newline at end of file
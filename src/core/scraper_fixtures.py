@@ -0,0 +1,146 @@
+import os
+import json
+import random
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+FIXTURES_DIR = "data/html_fixtures"
+
+SAMPLE_TITLES = [
+    "Saudi fintech startup Tamara raises $150 million in Series C",
+    "Egypt's MNT-Halan secures $400 million funding",
+    "UAE-based proptech Huspy launches in Spain",
+    "Techstars announces new accelerator cohort in Abu Dhabi",
+    "Dubai logistics company expands to Oman",
+    "Jordanian edtech Abwaab acquired by regional investor",
+    "Government unveils new digital economy strategy",
+    "Kuwaiti venture fund closes $50 million seed program"
+]
+
+class FixtureStore:
+    """Record/replay store of fetched pages, used to run the scraper without network"""
+
+    def __init__(self, fixtures_dir=FIXTURES_DIR, pages=None):
+        self.fixtures_dir = fixtures_dir
+        self.index_file = os.path.join(fixtures_dir, "index.json") if fixtures_dir else None
+        self._lock = threading.Lock()
+
+        # In-memory pages take precedence and are never written to disk
+        self.pages = dict(pages or {})
+        self.index = self._load_index()
+
+    def _load_index(self):
+        """Load the url -> fixture file index"""
+        if not self.index_file or not os.path.exists(self.index_file):
+            return {}
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading fixture index: {e}")
+            return {}
+
+    def record(self, url, html, kind):
+        """Save a fetched page as a fixture"""
+        filename = f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.html"
+        with self._lock:
+            try:
+                os.makedirs(self.fixtures_dir, exist_ok=True)
+                with open(os.path.join(self.fixtures_dir, filename), 'w', encoding='utf-8') as f:
+                    f.write(html)
+                self.index[url] = {'file': filename, 'kind': kind}
+
+                tmp_file = f"{self.index_file}.tmp"
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(self.index, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_file, self.index_file)
+            except Exception as e:
+                logger.error(f"Error recording fixture for {url}: {e}")
+
+    def replay(self, url):
+        """Get the recorded page for a URL or None"""
+        if url in self.pages:
+            return self.pages[url]
+
+        entry = self.index.get(url)
+        if not entry:
+            return None
+        try:
+            with open(os.path.join(self.fixtures_dir, entry['file']), 'r', encoding='utf-8') as f:
+                return f.read()
+        except Exception as e:
+            logger.error(f"Error replaying fixture for {url}: {e}")
+            return None
+
+def load_fixtures(fixtures_dir=FIXTURES_DIR):
+    """Load recorded HTML fixtures as a list of {url, kind, html} dicts"""
+    index_file = os.path.join(fixtures_dir, "index.json")
+    if not os.path.exists(index_file):
+        return []
+
+    with open(index_file, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+
+    fixtures = []
+    for url, entry in index.items():
+        path = os.path.join(fixtures_dir, entry['file'])
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                fixtures.append({'url': url, 'kind': entry.get('kind', 'article'), 'html': f.read()})
+        except Exception as e:
+            logger.warning(f"Error loading fixture {path}: {e}")
+    return fixtures
+
+def synthetic_listing_html(num_articles=30, seed=None, base_url="https://www.menabytes.com"):
+    """Generate a listing page shaped like the MENABytes homepage"""
+    rng = random.Random(seed)
+    items = []
+    for i in range(num_articles):
+        title = rng.choice(SAMPLE_TITLES)
+        slug = f"{title.lower().replace(' ', '-').replace('$', '')[:60]}-{rng.randint(0, 10 ** 6)}"
+        items.append(f"""
+        <article class="post type-post">
+            <div class="post-thumbnail"><img src="{base_url}/wp-content/uploads/{i}.jpg"></div>
+            <header class="entry-header">
+                <h2 class="entry-title"><a href="{base_url}/{slug}/">{title}</a></h2>
+                <div class="entry-meta">
+                    <span class="cat-links"><a href="{base_url}/category/startups/">Startups</a></span>
+                    <span class="posted-on"><time class="entry-date">May {1 + i % 28}, 2025</time></span>
+                </div>
+            </header>
+            <div class="entry-summary"><p>{title}. Read more about the deal.</p></div>
+        </article>""")
+
+    return _page("".join(items))
+
+def synthetic_article_html(num_paragraphs=12, seed=None, base_url="https://www.menabytes.com"):
+    """Generate an article page shaped like a MENABytes post"""
+    rng = random.Random(seed)
+    title = rng.choice(SAMPLE_TITLES)
+    paragraphs = "".join(
+        f"<p>{title}, the company said on {rng.choice(['Monday', 'Tuesday', 'Wednesday'])}. "
+        f"The round was led by {rng.choice(['STV', 'Sanabil', 'BECO Capital', 'Global Ventures'])} "
+        f"with participation from existing investors. Paragraph {i}.</p>"
+        for i in range(num_paragraphs)
+    )
+    body = f"""
+        <article class="post type-post">
+            <h1 class="entry-title">{title}</h1>
+            <div class="post-thumbnail"><img src="{base_url}/wp-content/uploads/main.jpg"></div>
+            <div class="entry-content">{paragraphs}<img src="{base_url}/wp-content/uploads/inline.jpg"></div>
+        </article>"""
+    return _page(body)
+
+def _page(body):
+    """Wrap content into a page with the usual header, sidebar and footer noise"""
+    nav = "".join(f'<li><a href="/category/{i}/">Category {i}</a></li>' for i in range(40))
+    sidebar = "".join(f'<div class="widget"><h3>Widget {i}</h3><p>Sidebar text {i}</p></div>' for i in range(20))
+    scripts = "".join(f'<script>var x{i} = {{"a": {i}}};</script>' for i in range(10))
+    return f"""<!DOCTYPE html>
+<html><head><title>MENAbytes</title>{scripts}</head>
+<body><header><nav><ul>{nav}</ul></nav></header>
+<main id="main">{body}</main>
+<aside>{sidebar}</aside><footer><p>&copy; MENAbytes</p></footer></body></html>"""
@@ -0,0 +1,290 @@
+import os
+import json
+import uuid
+import time
+import queue
+import atexit
+import logging
+import threading
+from contextlib import contextmanager, nullcontext
+
+logger = logging.getLogger(__name__)
+
+# Метки в очереди: STOP завершает поток, FLUSH велит записать накопленную пачку не дожидаясь flush_interval
+STOP = 'stop'
+FLUSH = 'flush'
+
+class AsyncTrackerWriter:
+    """Очередь записи поверх трекера контента (SQLite, Excel или Google Sheets)
+
+    add_article / add_content / add_reel / add_log / schedule_content сразу возвращают
+    идентификатор новой записи, а сама запись выполняется фоновым потоком пачками:
+    пачка оборачивается в tracker.transaction(), поэтому Excel переписывается один раз,
+    а в Google Sheets уходит один append_rows на лист. Генерация контента не ждет хранилище.
+
+    Каждая операция до постановки в очередь дописывается в файл подкачки (spill_path, JSONL),
+    выполненные пачки отмечаются в нем же. Если процесс упал, невыполненные операции
+    воспроизводятся при следующем запуске с теми же идентификаторами записей, а трекеры
+    пропускают запись, ID которой уже есть, так что повтор не создает дубликатов.
+
+    flush() ждет, пока очередь опустеет; close() вызывается автоматически при выходе.
+    Чтение (get_*, export_*) выполняется после flush(), чтобы видеть все поставленные записи.
+
+    Пример:
+        writer = AsyncTrackerWriter(SQLiteContentTracker())
+        article_id = writer.add_article(article)
+        writer.add_content(content_data, article_id, markdown)
+        writer.flush()
+    """
+
+    def __init__(self, tracker, batch_size=None, flush_interval=None, spill_path="data/tracker_spill.jsonl"):
+        self.tracker = tracker
+        self.batch_size = batch_size or int(os.getenv('TRACKER_WRITER_BATCH_SIZE', '50'))
+        self.flush_interval = flush_interval if flush_interval is not None else float(os.getenv('TRACKER_WRITER_FLUSH_INTERVAL', '0.5'))
+        self.spill_path = spill_path
+        self.stats = {'queued': 0, 'written': 0, 'batches': 0, 'failed': 0, 'replayed': 0}
+
+        self._queue = queue.Queue()
+        self._spill_lock = threading.Lock()
+        self._seq = 0
+        # Операции, записанные в файл подкачки, но еще не выполненные: seq -> операция
+        self._pending = {}
+        # Операции, которые трекер принял, но держит в своем буфере (Google Sheets после ошибки отправки)
+        self._unconfirmed = []
+        self._closed = False
+
+        if self.spill_path:
+            os.makedirs(os.path.dirname(self.spill_path) or '.', exist_ok=True)
+            self._replay_spill()
+
+        self._worker = threading.Thread(target=self._run, name='tracker-writer', daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    def _append_spill(self, entries):
+        """Дописывает записи в файл подкачки и сбрасывает их на диск"""
+        if not self.spill_path:
+            return
+        with open(self.spill_path, 'a', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _rewrite_spill(self):
+        """Оставляет в файле подкачки только невыполненные операции"""
+        if not self.spill_path:
+            return
+        if not self._pending:
+            if os.path.exists(self.spill_path):
+                os.remove(self.spill_path)
+            return
+        tmp_path = f"{self.spill_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for op in self._pending.values():
+                f.write(json.dumps(op, ensure_ascii=False, default=str) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.spill_path)
+
+    def _replay_spill(self):
+        """Ставит в очередь операции, оставшиеся в файле подкачки с прошлого запуска"""
+        if not os.path.exists(self.spill_path):
+            return
+
+        ops, done = {}, set()
+        with open(self.spill_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Последняя строка могла оборваться при падении процесса
+                    logger.warning(f"Пропущена поврежденная строка в {self.spill_path}")
+                    continue
+                if 'done' in entry:
+                    done.update(entry['done'])
+                else:
+                    ops[entry['seq']] = entry
+
+        leftover = [op for seq, op in sorted(ops.items()) if seq not in done]
+        with self._spill_lock:
+            for op in leftover:
+                self._seq += 1
+                op['seq'] = self._seq
+                self._pending[self._seq] = op
+                self._queue.put(op)
+            self._rewrite_spill()
+
+        if leftover:
+            self.stats['replayed'] = len(leftover)
+            logger.info(f"Воспроизведено {len(leftover)} незавершенных операций трекера из {self.spill_path}")
+
+    def _submit(self, method, args, kwargs):
+        if self._closed:
+            raise RuntimeError("AsyncTrackerWriter закрыт")
+        with self._spill_lock:
+            self._seq += 1
+            op = {'seq': self._seq, 'method': method, 'args': list(args), 'kwargs': kwargs}
+            self._append_spill([op])
+            self._pending[self._seq] = op
+            self.stats['queued'] += 1
+        self._queue.put(op)
+
+    def _enqueue_record(self, method, *args, **kwargs):
+        record_id = kwargs.pop('record_id', None) or str(uuid.uuid4())
+        kwargs['record_id'] = record_id
+        self._submit(method, args, kwargs)
+        return record_id
+
+    def add_article(self, article_data, article_content=None, record_id=None):
+        """Ставит статью в очередь записи и возвращает ее ID"""
+        return self._enqueue_record('add_article', article_data, article_content, record_id=record_id)
+
+    def add_content(self, content_data, article_id, content_markdown=None, record_id=None):
+        """Ставит контент в очередь записи и возвращает его ID"""
+        return self._enqueue_record('add_content', content_data, article_id, content_markdown, record_id=record_id)
+
+    def add_reel(self, article_id, title, script_markdown, notes='', record_id=None):
+        """Ставит скрипт Reels в очередь записи и возвращает его ID"""
+        return self._enqueue_record('add_reel', article_id, title, script_markdown, notes, record_id=record_id)
+
+    def add_log(self, log_type, message, article_id=None, content_id=None, details=None, record_id=None):
+        """Ставит запись лога в очередь и возвращает ее ID"""
+        return self._enqueue_record('add_log', log_type, message, article_id, content_id, details, record_id=record_id)
+
+    def schedule_content(self, content_id, schedule_data, record_id=None):
+        """Ставит запись планирования в очередь и возвращает ее ID"""
+        return self._enqueue_record('schedule_content', content_id, schedule_data, record_id=record_id)
+
+    def update_metadata(self, key, value):
+        """Ставит обновление метаданных в очередь"""
+        self._submit('update_metadata', (key, value), {})
+        return True
+
+    @contextmanager
+    def transaction(self):
+        """Операции и так записываются пачками, блок оставлен для совместимости с API трекеров"""
+        yield self
+
+    def _next_batch(self):
+        """Ждет первую операцию и добирает к ней другие в течение flush_interval, не больше batch_size"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and batch[-1] not in (STOP, FLUSH):
+            timeout = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _apply(self, op):
+        getattr(self.tracker, op['method'])(*op['args'], **op['kwargs'])
+
+    def _write_batch(self, batch):
+        """Выполняет пачку одной транзакцией; при ошибке - по одной, чтобы не потерять остальные"""
+        batch = [op for op in batch if op not in (STOP, FLUSH)]
+        if not batch:
+            return [], []
+        
+        transaction = getattr(self.tracker, 'transaction', None)
+        try:
+            with transaction() if transaction else nullcontext():
+                for op in batch:
+                    self._apply(op)
+            return batch, []
+        except Exception as e:
+            logger.error(f"Ошибка пакетной записи в трекер ({len(batch)} операций), повтор по одной: {e}")
+
+        written, failed = [], []
+        for op in batch:
+            try:
+                self._apply(op)
+                written.append(op)
+            except Exception as e:
+                logger.error(f"Не удалось выполнить {op['method']} (seq {op['seq']}), операция оставлена в {self.spill_path}: {e}")
+                failed.append(op)
+        return written, failed
+
+    def _confirm(self, written):
+        """Возвращает операции, которые трекер действительно сохранил
+
+        Google Sheets при ошибке отправки не бросает исключение, а оставляет строки в своем буфере.
+        Такие операции не отмечаются выполненными, пока tracker.flush() не подтвердит отправку,
+        иначе при падении процесса они пропали бы вместе с буфером.
+        """
+        self._unconfirmed.extend(written)
+        flush = getattr(self.tracker, 'flush', None)
+        if flush and not flush():
+            logger.error(f"Трекер не отправил буфер, {len(self._unconfirmed)} операций остаются в {self.spill_path} до следующей отправки")
+            return []
+        confirmed, self._unconfirmed = self._unconfirmed, []
+        return confirmed
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+
+            written, failed = self._write_batch(batch)
+            if written or self._unconfirmed:
+                written = self._confirm(written)
+            if written or failed:
+                with self._spill_lock:
+                    for op in written:
+                        self._pending.pop(op['seq'], None)
+                    self.stats['written'] += len(written)
+                    self.stats['failed'] += len(failed)
+                    self.stats['batches'] += 1
+                    try:
+                        if written:
+                            self._append_spill([{'done': [op['seq'] for op in written]}])
+                        # Очередь пуста: файл подкачки сворачивается до невыполненных операций
+                        if self._queue.qsize() == 0:
+                            self._rewrite_spill()
+                    except OSError as e:
+                        logger.error(f"Ошибка записи файла подкачки {self.spill_path}: {e}")
+
+            for _ in batch:
+                self._queue.task_done()
+            if STOP in batch:
+                return
+
+    def flush(self):
+        """Ждет, пока все поставленные операции будут записаны; возвращает True, если ошибок не было"""
+        if not self._closed:
+            self._queue.put(FLUSH)
+        self._queue.join()
+        return not self._pending
+
+    def close(self):
+        """Записывает оставшиеся операции и останавливает фоновый поток"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(STOP)
+        self._queue.join()
+        self._worker.join()
+        atexit.unregister(self.close)
+        if self._pending:
+            logger.warning(f"{len(self._pending)} операций трекера не записаны и будут повторены при следующем запуске ({self.spill_path})")
+        flush = getattr(self.tracker, 'flush', None)
+        if flush:
+            flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __getattr__(self, name):
+        # Остальные методы трекера (get_*, export_*) вызываются после записи очереди
+        if name.startswith('_') or name == 'tracker':
+            raise AttributeError(name)
+        attr = getattr(self.tracker, name)
+        if callable(attr) and not self._closed:
+            def call(*args, **kwargs):
+                self.flush()
+                return attr(*args, **kwargs)
+            return call
+        return attr
@@ -2,6 +2,7 @@ import pandas as pd
 import os
 import uuid
 import json
+from contextlib import contextmanager
 from datetime import datetime
 import openpyxl
 from openpyxl.styles import PatternFill, Font, Alignment
@@ -9,6 +10,13 @@ from openpyxl.styles import PatternFill, Font, Alignment
 class ExcelContentTracker:
     def __init__(self, excel_path="data/content_tracker.xlsx"):
         self.excel_path = excel_path
+        # Листы книги в памяти, пока открыта транзакция (см. transaction())
+        self._sheets = None
+        self._dirty_sheets = set()
+        # Кэш разобранных листов и индексов по ID; действителен, пока не изменились mtime и размер файла
+        self._cache_stamp = None
+        self._sheet_cache = {}
+        self._index_cache = {}
         self.ensure_excel_exists()
         
     def ensure_excel_exists(self):
@@ -74,7 +82,13 @@ class ExcelContentTracker:
     def apply_formatting(self):
         """Применяет форматирование к Excel-файлу"""
         wb = openpyxl.load_workbook(self.excel_path)
+        self._format_workbook(wb)
         
+        # Сохраняем изменения
+        wb.save(self.excel_path)
+    
+    def _format_workbook(self, wb):
+        """Форматирует листы открытой книги openpyxl"""
         # Форматирование для всех листов
         for sheet_name in wb.sheetnames:
             ws = wb[sheet_name]
@@ -93,17 +107,125 @@ class ExcelContentTracker:
                     ws.column_dimensions[col[0].column_letter].width = 80
                 else:
                     ws.column_dimensions[col[0].column_letter].width = 20
+    
+    @contextmanager
+    def transaction(self):
+        """Буферизует изменения и записывает книгу один раз при выходе из блока
+        
+        Все листы берутся из кэша (или загружаются одним чтением), вставки и обновления метаданных
+        накапливаются в них, а чтения внутри блока видят еще не записанные строки.
+        При выходе книга целиком пишется во временный файл и атомарно подменяет исходную;
+        при исключении изменения отбрасываются. Вложенные вызовы присоединяются к внешнему.
+        
+        Пример:
+            with tracker.transaction():
+                article_id = tracker.add_article(article)
+                tracker.add_content(content_data, article_id, markdown)
+        """
+        if self._sheets is not None:
+            yield self
+            return
+        
+        self._sheets = {sheet_name: sheet_df.copy() for sheet_name, sheet_df in self._cached_workbook().items()}
+        self._dirty_sheets = set()
+        try:
+            yield self
+            if self._dirty_sheets:
+                self._save_workbook(self._sheets)
+        finally:
+            self._sheets = None
+            self._dirty_sheets = set()
+    
+    def _file_stamp(self):
+        stat = os.stat(self.excel_path)
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def _cached_workbook(self):
+        """Возвращает разобранные листы из кэша, перечитывая книгу, если файл изменился"""
+        stamp = self._file_stamp()
+        if stamp != self._cache_stamp:
+            # Разбор всей книги стоит почти столько же, сколько одного листа, поэтому читаем все листы сразу
+            self._sheet_cache = pd.read_excel(self.excel_path, sheet_name=None)
+            self._index_cache = {}
+            self._cache_stamp = stamp
+        return self._sheet_cache
+    
+    def _cached_sheet(self, sheet_name):
+        return self._cached_workbook()[sheet_name]
+    
+    def _invalidate_cache(self):
+        self._cache_stamp = None
+        self._sheet_cache = {}
+        self._index_cache = {}
+    
+    def _read_sheet(self, sheet_name):
+        """Читает лист из буфера открытой транзакции или копию листа из кэша"""
+        if self._sheets is not None:
+            return self._sheets[sheet_name]
+        return self._cached_sheet(sheet_name).copy()
+    
+    def _find_rows(self, sheet_name, column, value):
+        """Возвращает строки листа, у которых column == value"""
+        if self._sheets is not None:
+            sheet_df = self._sheets[sheet_name]
+            return sheet_df[sheet_df[column] == value].to_dict(orient='records')
+        
+        sheet_df = self._cached_sheet(sheet_name)
+        key = (sheet_name, column)
+        if key not in self._index_cache:
+            index = {}
+            for row in sheet_df.to_dict(orient='records'):
+                if not pd.isna(row[column]):
+                    index.setdefault(row[column], []).append(row)
+            self._index_cache[key] = index
+        # Копии, чтобы изменения вызывающего кода не попали в кэш
+        return [dict(row) for row in self._index_cache[key].get(value, [])]
+    
+    def _write_sheets(self, sheets):
+        """Сохраняет листы в файл или в буфер открытой транзакции"""
+        if self._sheets is not None:
+            self._sheets.update(sheets)
+            self._dirty_sheets.update(sheets)
+            return
+        
+        self._invalidate_cache()
+        with pd.ExcelWriter(self.excel_path, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
+            for sheet_name, sheet_df in sheets.items():
+                sheet_df.to_excel(writer, sheet_name=sheet_name, index=False)
+    
+    def _save_workbook(self, sheets):
+        """Записывает всю книгу во временный файл и атомарно заменяет им исходный"""
+        # pandas определяет формат по расширению, поэтому .xlsx остается в конце имени
+        root, ext = os.path.splitext(self.excel_path)
+        tmp_path = f"{root}.tmp{ext}"
+        try:
+            with pd.ExcelWriter(tmp_path, engine='openpyxl') as writer:
+                for sheet_name, sheet_df in sheets.items():
+                    sheet_df.to_excel(writer, sheet_name=sheet_name, index=False)
+                self._format_workbook(writer.book)
+            os.replace(tmp_path, self.excel_path)
+            self._invalidate_cache()
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    
+    def _record_exists(self, sheet_name, column, record_id):
+        """Проверяет, есть ли на листе запись с переданным record_id (в том числе в буфере транзакции)
         
-        # Сохраняем изменения
-        wb.save(self.excel_path)
+        Повтор операции с тем же ID (например, из файла подкачки AsyncTrackerWriter) не создает дубликат.
+        """
+        return bool(record_id) and bool(self._find_rows(sheet_name, column, record_id))
     
-    def add_article(self, article_data, article_content=None):
+    def add_article(self, article_data, article_content=None, record_id=None):
         """Добавляет новую статью в таблицу"""
         # Генерируем уникальный ID
-        article_id = str(uuid.uuid4())
+        article_id = record_id or str(uuid.uuid4())
+        if self._record_exists('Статьи', 'article_id', record_id):
+            return article_id
         
         # Загружаем текущие данные
-        articles_df = pd.read_excel(self.excel_path, sheet_name='Статьи')
+        articles_df = self._read_sheet('Статьи')
         
         # Если передан контент статьи в виде словаря, преобразуем его в JSON строку
         if article_content and isinstance(article_content, dict):
@@ -131,8 +253,7 @@ class ExcelContentTracker:
         articles_df = pd.concat([articles_df, pd.DataFrame([new_article])], ignore_index=True)
         
         # Сохраняем обновленные данные
-        with pd.ExcelWriter(self.excel_path, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
-            articles_df.to_excel(writer, sheet_name='Статьи', index=False)
+        self._write_sheets({'Статьи': articles_df})
         
         # Обновляем метаданные
         self.update_metadata('last_update', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
@@ -143,13 +264,15 @@ class ExcelContentTracker:
         
         return article_id
     
-    def add_content(self, content_data, article_id, content_markdown=None):
+    def add_content(self, content_data, article_id, content_markdown=None, record_id=None):
         """Добавляет новый контент, связанный со статьей"""
         # Генерируем уникальный ID
-        content_id = str(uuid.uuid4())
+        content_id = record_id or str(uuid.uuid4())
+        if self._record_exists('Контент', 'content_id', record_id):
+            return content_id
         
         # Загружаем текущие данные
-        content_df = pd.read_excel(self.excel_path, sheet_name='Контент')
+        content_df = self._read_sheet('Контент')
         
         # Если контент передан в виде пути к файлу, читаем его содержимое
         if not content_markdown and 'content_path' in content_data and os.path.exists(content_data['content_path']):
@@ -186,8 +309,7 @@ class ExcelContentTracker:
         content_df = pd.concat([content_df, pd.DataFrame([new_content])], ignore_index=True)
         
         # Сохраняем обновленные данные
-        with pd.ExcelWriter(self.excel_path, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
-            content_df.to_excel(writer, sheet_name='Контент', index=False)
+        self._write_sheets({'Контент': content_df})
         
         # Обновляем метаданные
         self.update_metadata('last_update', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
@@ -198,13 +320,15 @@ class ExcelContentTracker:
         
         return content_id
     
-    def add_reel(self, article_id, title, script_markdown, notes=''):
+    def add_reel(self, article_id, title, script_markdown, notes='', record_id=None):
         """Добавляет новый скрипт для Instagram Reel"""
         # Генерируем уникальный ID
-        reel_id = str(uuid.uuid4())
+        reel_id = record_id or str(uuid.uuid4())
+        if self._record_exists('Reels', 'reel_id', record_id):
+            return reel_id
         
         # Загружаем текущие данные
-        reels_df = pd.read_excel(self.excel_path, sheet_name='Reels')
+        reels_df = self._read_sheet('Reels')
         
         # Создаем новую запись
         new_reel = {
@@ -222,8 +346,7 @@ class ExcelContentTracker:
         reels_df = pd.concat([reels_df, pd.DataFrame([new_reel])], ignore_index=True)
         
         # Сохраняем обновленные данные
-        with pd.ExcelWriter(self.excel_path, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
-            reels_df.to_excel(writer, sheet_name='Reels', index=False)
+        self._write_sheets({'Reels': reels_df})
         
         # Обновляем метаданные
         self.update_metadata('last_update', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
@@ -234,13 +357,15 @@ class ExcelContentTracker:
         
         return reel_id
     
-    def add_log(self, log_type, message, article_id=None, content_id=None, details=None):
+    def add_log(self, log_type, message, article_id=None, content_id=None, details=None, record_id=None):
         """Добавляет новую запись в лог"""
         # Генерируем уникальный ID
-        log_id = str(uuid.uuid4())
+        log_id = record_id or str(uuid.uuid4())
+        if self._record_exists('Логи', 'log_id', record_id):
+            return log_id
         
         # Загружаем текущие данные
-        logs_df = pd.read_excel(self.excel_path, sheet_name='Логи')
+        logs_df = self._read_sheet('Логи')
         
         # Создаем новую запись
         new_log = {
@@ -257,19 +382,20 @@ class ExcelContentTracker:
         logs_df = pd.concat([logs_df, pd.DataFrame([new_log])], ignore_index=True)
         
         # Сохраняем обновленные данные
-        with pd.ExcelWriter(self.excel_path, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
-            logs_df.to_excel(writer, sheet_name='Логи', index=False)
+        self._write_sheets({'Логи': logs_df})
         
         return log_id
     
-    def schedule_content(self, content_id, schedule_data):
+    def schedule_content(self, content_id, schedule_data, record_id=None):
         """Планирует публикацию контента"""
         # Генерируем уникальный ID для расписания
-        schedule_id = str(uuid.uuid4())
+        schedule_id = record_id or str(uuid.uuid4())
+        if self._record_exists('Планирование', 'schedule_id', record_id):
+            return schedule_id
         
         # Загружаем текущие данные
-        schedule_df = pd.read_excel(self.excel_path, sheet_name='Планирование')
-        content_df = pd.read_excel(self.excel_path, sheet_name='Контент')
+        schedule_df = self._read_sheet('Планирование')
+        content_df = self._read_sheet('Контент')
         
         # Создаем новую запись в расписании
         new_schedule = {
@@ -296,9 +422,7 @@ class ExcelContentTracker:
             content_df.loc[content_mask, 'scheduled_time'] = schedule_data.get('time', '')
         
         # Сохраняем обновленные данные
-        with pd.ExcelWriter(self.excel_path, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
-            schedule_df.to_excel(writer, sheet_name='Планирование', index=False)
-            content_df.to_excel(writer, sheet_name='Контент', index=False)
+        self._write_sheets({'Планирование': schedule_df, 'Контент': content_df})
         
         # Обновляем метаданные
         self.update_metadata('last_update', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
@@ -315,7 +439,7 @@ class ExcelContentTracker:
     
     def update_metadata(self, key, value):
         """Обновляет значение в метаданных"""
-        metadata_df = pd.read_excel(self.excel_path, sheet_name='Метаданные')
+        metadata_df = self._read_sheet('Метаданные')
         
         # Обновляем значение
         key_mask = metadata_df['key'] == key
@@ -326,13 +450,30 @@ class ExcelContentTracker:
             metadata_df = pd.concat([metadata_df, pd.DataFrame([{'key': key, 'value': value}])], ignore_index=True)
         
         # Сохраняем обновленные данные
-        with pd.ExcelWriter(self.excel_path, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
-            metadata_df.to_excel(writer, sheet_name='Метаданные', index=False)
+        self._write_sheets({'Метаданные': metadata_df})
+    
+    def remove_rows(self, sheet_name, column, values):
+        """Удаляет строки листа, у которых значение column входит в values; возвращает число удаленных"""
+        sheet_df = self._read_sheet(sheet_name)
+        mask = sheet_df[column].isin(set(values))
+        if mask.any():
+            self._write_sheets({sheet_name: sheet_df[~mask].reset_index(drop=True)})
+        return int(mask.sum())
+    
+    def read_sheet(self, sheet_name):
+        """Возвращает лист в виде DataFrame
+        
+        Книга разбирается один раз и дальше берется из кэша трекера, внутри transaction()
+        виден еще не записанный буфер. Возвращается копия, изменения DataFrame не затрагивают трекер.
+        """
+        if self._sheets is not None:
+            return self._sheets[sheet_name].copy()
+        return self._cached_sheet(sheet_name).copy()
     
     def get_all_articles(self):
         """Возвращает все статьи из таблицы"""
         try:
-            articles_df = pd.read_excel(self.excel_path, sheet_name='Статьи')
+            articles_df = self._read_sheet('Статьи')
             return articles_df.to_dict(orient='records')
         except Exception as e:
             print(f"Ошибка при чтении статей: {e}")
@@ -341,7 +482,7 @@ class ExcelContentTracker:
     def get_all_content(self):
         """Возвращает весь контент из таблицы"""
         try:
-            content_df = pd.read_excel(self.excel_path, sheet_name='Контент')
+            content_df = self._read_sheet('Контент')
             return content_df.to_dict(orient='records')
         except Exception as e:
             print(f"Ошибка при чтении контента: {e}")
@@ -350,10 +491,9 @@ class ExcelContentTracker:
     def get_content_by_id(self, content_id):
         """Возвращает контент по его ID"""
         try:
-            content_df = pd.read_excel(self.excel_path, sheet_name='Контент')
-            content_mask = content_df['content_id'] == content_id
-            if any(content_mask):
-                return content_df[content_mask].to_dict(orient='records')[0]
+            rows = self._find_rows('Контент', 'content_id', content_id)
+            if rows:
+                return rows[0]
             else:
                 print(f"Контент с ID {content_id} не найден")
                 return None
@@ -364,10 +504,9 @@ class ExcelContentTracker:
     def get_article_by_id(self, article_id):
         """Возвращает статью по её ID"""
         try:
-            articles_df = pd.read_excel(self.excel_path, sheet_name='Статьи')
-            article_mask = articles_df['article_id'] == article_id
-            if any(article_mask):
-                return articles_df[article_mask].to_dict(orient='records')[0]
+            rows = self._find_rows('Статьи', 'article_id', article_id)
+            if rows:
+                return rows[0]
             else:
                 print(f"Статья с ID {article_id} не найдена")
                 return None
@@ -375,28 +514,35 @@ class ExcelContentTracker:
             print(f"Ошибка при чтении статьи: {e}")
             return None
     
+    def find_article_by_url(self, url):
+        """Возвращает статью с указанным source_url или None"""
+        try:
+            rows = self._find_rows('Статьи', 'source_url', url)
+            return rows[0] if rows else None
+        except Exception as e:
+            print(f"Ошибка при чтении статьи: {e}")
+            return None
+    
     def get_reels_by_article_id(self, article_id):
         """Возвращает все reels для указанной статьи"""
         try:
-            reels_df = pd.read_excel(self.excel_path, sheet_name='Reels')
-            reels_mask = reels_df['article_id'] == article_id
-            if any(reels_mask):
-                return reels_df[reels_mask].to_dict(orient='records')
-            else:
-                return []
+            return self._find_rows('Reels', 'article_id', article_id)
         except Exception as e:
             print(f"Ошибка при чтении reels: {e}")
             return []
     
+    def get_all_logs(self):
+        """Возвращает все записи лога"""
+        try:
+            return self._read_sheet('Логи').to_dict(orient='records')
+        except Exception as e:
+            print(f"Ошибка при чтении логов: {e}")
+            return []
+    
     def get_logs_by_article_id(self, article_id):
         """Возвращает все логи для указанной статьи"""
         try:
-            logs_df = pd.read_excel(self.excel_path, sheet_name='Логи')
-            logs_mask = logs_df['article_id'] == article_id
-            if any(logs_mask):
-                return logs_df[logs_mask].to_dict(orient='records')
-            else:
-                return []
+            return self._find_rows('Логи', 'article_id', article_id)
         except Exception as e:
             print(f"Ошибка при чтении логов: {e}")
             return []
@@ -422,14 +568,13 @@ class ExcelContentTracker:
                 with open(input_path, 'r', encoding='utf-8') as f:
                     content_markdown = f.read()
                 
-                content_df = pd.read_excel(self.excel_path, sheet_name='Контент')
+                content_df = self._read_sheet('Контент')
                 content_mask = content_df['content_id'] == content_id
                 
                 if any(content_mask):
                     content_df.loc[content_mask, 'content_markdown'] = content_markdown
                     
-                    with pd.ExcelWriter(self.excel_path, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
-                        content_df.to_excel(writer, sheet_name='Контент', index=False)
+                    self._write_sheets({'Контент': content_df})
                     
                     return True
             except Exception as e:
@@ -0,0 +1,154 @@
+"""Локальная замена клиента gspread для проверки GoogleSheetsTracker без сети
+
+Поддерживает только те вызовы, которые использует трекер, и хранит листы в памяти.
+Каждый запрос к "API" записывается в FakeClient.calls, чтобы можно было посчитать,
+сколько обращений сделал трекер. Квоты Sheets API имитируются параметрами
+reads_per_minute / writes_per_minute и методом fail_next(): сверх квоты запрос
+завершается gspread.exceptions.APIError с кодом 429, как у настоящего API.
+
+Пример:
+    client = FakeClient()
+    tracker = GoogleSheetsTracker(client=client, mirror_path=None)
+    tracker.add_article({'title': 'Test', 'link': 'https://example.com'})
+    print(client.calls)
+"""
+import re
+import time
+from collections import deque
+from gspread.exceptions import APIError, WorksheetNotFound
+from gspread.utils import a1_to_rowcol
+
+# Запросы, которые Sheets API учитывает в квоте записи; остальные считаются чтениями
+WRITE_METHODS = {'append_row', 'append_rows', 'values_batch_update', 'add_worksheet', 'format', 'set_column_width'}
+
+class FakeResponse:
+    """Минимальный ответ requests, из которого gspread строит APIError"""
+
+    def __init__(self, status_code, message):
+        self.status_code = status_code
+        self.text = message
+        self._error = {'code': status_code, 'message': message, 'status': 'RESOURCE_EXHAUSTED' if status_code == 429 else 'UNAVAILABLE'}
+
+    def json(self):
+        return {'error': self._error}
+
+class FakeWorksheet:
+    """Лист в памяти: список строк, первая строка - заголовки"""
+
+    def __init__(self, client, title, rows=None):
+        self.client = client
+        self.title = title
+        self.rows = [list(row) for row in rows or []]
+
+    @property
+    def row_count(self):
+        return len(self.rows)
+
+    def append_row(self, values, value_input_option=None):
+        self.client._record('append_row', self.title)
+        self.rows.append(list(values))
+
+    def append_rows(self, values, value_input_option=None):
+        self.client._record('append_rows', self.title)
+        self.rows.extend(list(row) for row in values)
+
+    def row_values(self, row):
+        self.client._record('row_values', self.title)
+        return list(self.rows[row - 1]) if row <= len(self.rows) else []
+
+    def col_values(self, col):
+        self.client._record('col_values', self.title)
+        return [row[col - 1] if col <= len(row) else '' for row in self.rows]
+
+    def get_all_records(self):
+        self.client._record('get_all_records', self.title)
+        if not self.rows:
+            return []
+        headers = self.rows[0]
+        return [dict(zip(headers, row + [''] * (len(headers) - len(row)))) for row in self.rows[1:]]
+
+    def format(self, cell_range, cell_format):
+        self.client._record('format', self.title)
+
+    def set_column_width(self, column, width):
+        self.client._record('set_column_width', self.title)
+
+    def _set_cell(self, row, col, value):
+        while len(self.rows) < row:
+            self.rows.append([])
+        cells = self.rows[row - 1]
+        cells.extend([''] * (col - len(cells)))
+        cells[col - 1] = value
+
+class FakeSpreadsheet:
+    """Таблица в памяти с листами FakeWorksheet"""
+
+    def __init__(self, client, spreadsheet_id, title="Fake spreadsheet"):
+        self.client = client
+        self.id = spreadsheet_id
+        self.title = title
+        self._worksheets = {}
+
+    def worksheets(self):
+        self.client._record('worksheets', None)
+        return list(self._worksheets.values())
+
+    def worksheet(self, title):
+        self.client._record('worksheet', title)
+        if title not in self._worksheets:
+            raise WorksheetNotFound(title)
+        return self._worksheets[title]
+
+    def add_worksheet(self, title, rows, cols):
+        self.client._record('add_worksheet', title)
+        worksheet = FakeWorksheet(self.client, title)
+        self._worksheets[title] = worksheet
+        return worksheet
+
+    def values_batch_update(self, body):
+        self.client._record('values_batch_update', None)
+        for data in body['data']:
+            sheet_name, cell = re.match(r"^'?(.*?)'?!(\w+)$", data['range']).groups()
+            row, col = a1_to_rowcol(cell)
+            self._worksheets[sheet_name]._set_cell(row, col, data['values'][0][0])
+
+class FakeClient:
+    """Замена клиента gspread.authorize(): таблицы создаются при первом открытии"""
+
+    def __init__(self, reads_per_minute=None, writes_per_minute=None, clock=time.monotonic):
+        self.spreadsheets = {}
+        self.calls = []
+        self.quotas = {'read': reads_per_minute, 'write': writes_per_minute}
+        self._clock = clock
+        self._history = {'read': deque(), 'write': deque()}
+        self._failures = []
+
+    def fail_next(self, count=1, status_code=429):
+        """Следующие count запросов завершатся ошибкой с указанным кодом"""
+        self._failures.extend([status_code] * count)
+
+    def _record(self, method, sheet_name):
+        kind = 'write' if method in WRITE_METHODS else 'read'
+        if self._failures:
+            status_code = self._failures.pop(0)
+            self.calls.append((method, sheet_name, status_code))
+            raise APIError(FakeResponse(status_code, f"Simulated error on {method}"))
+
+        quota = self.quotas[kind]
+        if quota is not None:
+            now = self._clock()
+            history = self._history[kind]
+            while history and now - history[0] >= 60:
+                history.popleft()
+            if len(history) >= quota:
+                self.calls.append((method, sheet_name, 429))
+                raise APIError(FakeResponse(429, f"Quota exceeded for quota metric '{kind.capitalize()} requests'"))
+            history.append(now)
+
+        self.calls.append((method, sheet_name))
+
+    def open_by_key(self, key):
+        self._record('open_by_key', None)
+        if key not in self.spreadsheets:
+            self.spreadsheets[key] = FakeSpreadsheet(self, key)
+        return self.spreadsheets[key]
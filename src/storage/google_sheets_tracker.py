@@ -1,12 +1,16 @@
 import os
 import json
 import uuid
+import time
 import logging
+from contextlib import contextmanager
 from datetime import datetime
 import gspread
+from gspread.utils import rowcol_to_a1
 from oauth2client.service_account import ServiceAccountCredentials
 import pandas as pd
 from dotenv import load_dotenv
+from sheets_request_scheduler import SheetsRequestScheduler
 
 # Загружаем переменные окружения
 load_dotenv()
@@ -23,29 +27,91 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Листы таблицы и их столбцы
+SHEET_HEADERS = {
+    'Статьи': [
+        'article_id', 'title', 'source_url', 'category',
+        'publication_date', 'company_name', 'funding_amount',
+        'article_content', 'processing_date', 'processing_status'
+    ],
+    'Контент': [
+        'content_id', 'article_id', 'title', 'source_url', 'category',
+        'content_type', 'language', 'content_markdown', 'creation_date',
+        'status', 'scheduled_date', 'scheduled_time', 'platform',
+        'published_date', 'published_url', 'engagement_stats',
+        'tags', 'dubskiy_rating', 'notes'
+    ],
+    'Reels': [
+        'reel_id', 'article_id', 'title', 'script_markdown',
+        'creation_date', 'status', 'video_url', 'notes'
+    ],
+    'Планирование': [
+        'schedule_id', 'content_id', 'platform', 'scheduled_date',
+        'scheduled_time', 'timezone', 'posting_status', 'priority',
+        'campaign_id', 'posting_account'
+    ],
+    'Логи': [
+        'log_id', 'article_id', 'content_id', 'log_type',
+        'timestamp', 'message', 'details'
+    ],
+    'Метаданные': [
+        'key', 'value'
+    ]
+}
+
 class GoogleSheetsTracker:
     """Класс для работы с Google Sheets для хранения и управления контентом"""
     
-    def __init__(self, credentials_path=None, spreadsheet_id=None):
+    def __init__(self, credentials_path=None, spreadsheet_id=None, client=None,
+                 mirror_path='', mirror_ttl=None, scheduler=None):
         """
         Инициализация трекера Google Sheets
         
         Args:
             credentials_path (str): Путь к JSON-файлу с учетными данными
             spreadsheet_id (str): ID таблицы Google Sheets
+            client: Готовый клиент gspread (например, fake_gspread.FakeClient для работы без сети)
+            mirror_path (str): Файл снимка локального зеркала, None - только в памяти
+            mirror_ttl (int): Через сколько секунд зеркало листа перечитывается из таблицы
+            scheduler (SheetsRequestScheduler): Планировщик запросов с квотами и повторами
         """
         # Получаем значения из переменных окружения или используем переданные параметры
         self.credentials_path = credentials_path or os.getenv('GOOGLE_SHEETS_CREDENTIALS_PATH', 'credentials.json')
         self.spreadsheet_id = spreadsheet_id or os.getenv('GOOGLE_SHEETS_ID', '1bVeyg8ugQyCGp0QO5uWXW7V0xtNKvOZH0RLPcrD4_Eo')
         
-        self.client = None
+        self.client = client
         self.spreadsheet = None
         
+        # Все запросы к API идут через планировщик: квоты чтения/записи, повторы при 429/5xx, счетчики
+        self.scheduler = scheduler or SheetsRequestScheduler()
+        
+        # Локальное зеркало листов: DataFrame на лист, время загрузки и индексы по ID
+        if mirror_path == '':
+            mirror_path = os.getenv('GOOGLE_SHEETS_MIRROR_PATH', 'data/google_sheets_mirror.json')
+        self.mirror_path = mirror_path
+        self.mirror_ttl = mirror_ttl if mirror_ttl is not None else int(os.getenv('GOOGLE_SHEETS_MIRROR_TTL', '300'))
+        self._mirror = {}
+        self._mirror_fetched_at = {}
+        self._mirror_indexes = {}
+        
+        # Объекты листов, их заголовки и прочитанные столбцы, чтобы не запрашивать их перед каждой записью
+        self._worksheets = {}
+        self._headers = {}
+        self._columns = {}
+        
+        # Буфер записей открытой транзакции (см. transaction())
+        self._batch_depth = 0
+        self._pending_appends = {}
+        self._pending_updates = {}
+        
         # Подключаемся к Google Sheets
         self.connect()
         
         # Проверяем наличие необходимых листов и создаем их при необходимости
         self.ensure_sheets_exist()
+        
+        # Зеркало с диска, если снимок сделан для этой же таблицы
+        self._load_mirror_snapshot()
     
     def connect(self):
         """Подключение к Google Sheets API"""
@@ -54,14 +120,15 @@ class GoogleSheetsTracker:
             scope = ['https://spreadsheets.google.com/feeds',
                      'https://www.googleapis.com/auth/drive']
             
-            # Авторизуемся с помощью учетных данных
-            credentials = ServiceAccountCredentials.from_json_keyfile_name(self.credentials_path, scope)
-            
-            # Создаем клиент gspread
-            self.client = gspread.authorize(credentials)
+            # Авторизуемся с помощью учетных данных, если клиент не передан
+            if self.client is None:
+                credentials = ServiceAccountCredentials.from_json_keyfile_name(self.credentials_path, scope)
+                
+                # Создаем клиент gspread
+                self.client = gspread.authorize(credentials)
             
             # Открываем таблицу по ID
-            self.spreadsheet = self.client.open_by_key(self.spreadsheet_id)
+            self.spreadsheet = self._api('read', self.client.open_by_key, self.spreadsheet_id)
             
             logger.info(f"Успешное подключение к таблице: {self.spreadsheet.title}")
         
@@ -71,49 +138,20 @@ class GoogleSheetsTracker:
     
     def ensure_sheets_exist(self):
         """Проверяет наличие необходимых листов и создает их при необходимости"""
-        required_sheets = {
-            'Статьи': [
-                'article_id', 'title', 'source_url', 'category',
-                'publication_date', 'company_name', 'funding_amount',
-                'article_content', 'processing_date', 'processing_status'
-            ],
-            'Контент': [
-                'content_id', 'article_id', 'title', 'source_url', 'category',
-                'content_type', 'language', 'content_markdown', 'creation_date',
-                'status', 'scheduled_date', 'scheduled_time', 'platform',
-                'published_date', 'published_url', 'engagement_stats',
-                'tags', 'dubskiy_rating', 'notes'
-            ],
-            'Reels': [
-                'reel_id', 'article_id', 'title', 'script_markdown',
-                'creation_date', 'status', 'video_url', 'notes'
-            ],
-            'Планирование': [
-                'schedule_id', 'content_id', 'platform', 'scheduled_date',
-                'scheduled_time', 'timezone', 'posting_status', 'priority',
-                'campaign_id', 'posting_account'
-            ],
-            'Логи': [
-                'log_id', 'article_id', 'content_id', 'log_type',
-                'timestamp', 'message', 'details'
-            ],
-            'Метаданные': [
-                'key', 'value'
-            ]
-        }
-        
         # Получаем список существующих листов
-        existing_sheets = [worksheet.title for worksheet in self.spreadsheet.worksheets()]
+        self._worksheets = {worksheet.title: worksheet for worksheet in self._api('read', self.spreadsheet.worksheets)}
+        existing_sheets = list(self._worksheets)
         
-        for sheet_name, headers in required_sheets.items():
+        for sheet_name, headers in SHEET_HEADERS.items():
             if sheet_name not in existing_sheets:
                 logger.info(f"Создание листа: {sheet_name}")
-                worksheet = self.spreadsheet.add_worksheet(title=sheet_name, rows="1000", cols="26")
-                worksheet.append_row(headers)
+                worksheet = self._api('write', self.spreadsheet.add_worksheet, title=sheet_name, rows="1000", cols="26")
+                self._api('write', worksheet.append_row, headers)
+                self._worksheets[sheet_name] = worksheet
                 
                 # Форматирование заголовков
                 cell_range = f'A1:{chr(65 + len(headers) - 1)}1'
-                worksheet.format(cell_range, {
+                self._api('write', worksheet.format, cell_range, {
                     "textFormat": {"bold": True},
                     "horizontalAlignment": "CENTER"
                 })
@@ -121,14 +159,14 @@ class GoogleSheetsTracker:
                 # Устанавливаем ширину столбцов для текстовых полей
                 for i, header in enumerate(headers):
                     if header in ['content_markdown', 'article_content', 'script_markdown', 'message', 'details']:
-                        worksheet.set_column_width(i + 1, 400)  # Широкие столбцы для текста
+                        self._api('write', worksheet.set_column_width, i + 1, 400)  # Широкие столбцы для текста
                     else:
-                        worksheet.set_column_width(i + 1, 150)  # Обычные столбцы
+                        self._api('write', worksheet.set_column_width, i + 1, 150)  # Обычные столбцы
             else:
                 logger.info(f"Лист {sheet_name} уже существует")
         
         # Инициализируем метаданные, если лист только что создан
-        metadata_sheet = self.spreadsheet.worksheet('Метаданные')
+        metadata_sheet = self._worksheet('Метаданные')
         if metadata_sheet.row_count == 1:  # Только заголовки
             metadata = [
                 ['last_update', datetime.now().strftime('%Y-%m-%d %H:%M:%S')],
@@ -137,52 +175,271 @@ class GoogleSheetsTracker:
                 ['default_settings', '{"default_time": "10:00", "default_timezone": "UTC+3"}'],
                 ['platform_settings', '{}']
             ]
-            for row in metadata:
-                metadata_sheet.append_row(row)
+            self._api('write', metadata_sheet.append_rows, metadata)
     
     def _get_worksheet_as_df(self, sheet_name):
-        """Получает данные листа в виде DataFrame"""
+        """Получает данные листа в виде DataFrame из локального зеркала
+        
+        Лист запрашивается у API только при первом обращении и после истечения mirror_ttl;
+        собственные записи трекера сразу отражаются в зеркале.
+        """
+        return self._mirror_sheet(sheet_name).copy()
+    
+    def refresh(self, sheet_name=None):
+        """Перечитывает лист (или все листы) из таблицы в зеркало"""
+        for name in [sheet_name] if sheet_name else SHEET_HEADERS:
+            self._fetch_sheet(name)
+        self._save_mirror_snapshot()
+    
+    def _mirror_sheet(self, sheet_name):
+        """Возвращает лист зеркала (без копирования), загружая его при необходимости"""
+        if self._mirror_is_stale(sheet_name):
+            self._fetch_sheet(sheet_name)
+            self._save_mirror_snapshot()
+        return self._mirror.get(sheet_name, pd.DataFrame())
+    
+    def _mirror_is_stale(self, sheet_name):
+        fetched_at = self._mirror_fetched_at.get(sheet_name)
+        return fetched_at is None or time.time() - fetched_at > self.mirror_ttl
+    
+    def _fetch_sheet(self, sheet_name):
+        """Загружает лист целиком в зеркало"""
         try:
-            worksheet = self.spreadsheet.worksheet(sheet_name)
-            data = worksheet.get_all_records()
-            return pd.DataFrame(data)
+            data = self._api('read', self._worksheet(sheet_name).get_all_records)
+            self._set_mirror(sheet_name, pd.DataFrame(data) if data else pd.DataFrame(columns=self._get_headers(sheet_name)))
+            self._mirror_fetched_at[sheet_name] = time.time()
         except Exception as e:
+            # Устаревшее зеркало лучше пустого результата
             logger.error(f"Ошибка при получении данных из листа {sheet_name}: {e}")
-            return pd.DataFrame()
     
-    def _update_worksheet_from_df(self, sheet_name, df):
-        """Обновляет лист данными из DataFrame"""
+    def _set_mirror(self, sheet_name, df):
+        self._mirror[sheet_name] = df
+        self._mirror_indexes = {key: index for key, index in self._mirror_indexes.items() if key[0] != sheet_name}
+    
+    def _find_rows(self, sheet_name, column, value):
+        """Возвращает строки листа, у которых column == value, через индекс зеркала"""
+        df = self._mirror_sheet(sheet_name)
+        if column not in df.columns:
+            return []
+        
+        key = (sheet_name, column)
+        if key not in self._mirror_indexes:
+            index = {}
+            for row in df.to_dict(orient='records'):
+                index.setdefault(row[column], []).append(row)
+            self._mirror_indexes[key] = index
+        # Копии, чтобы изменения вызывающего кода не попали в зеркало
+        return [dict(row) for row in self._mirror_indexes[key].get(value, [])]
+    
+    def _apply_to_mirror(self, appends, updates):
+        """Отражает отправленные записи в зеркале, чтобы не перечитывать лист"""
+        for sheet_name, rows in appends.items():
+            if sheet_name in self._mirror:
+                new_rows = pd.DataFrame(rows, columns=self._get_headers(sheet_name))
+                self._set_mirror(sheet_name, pd.concat([self._mirror[sheet_name], new_rows], ignore_index=True))
+        
+        for sheet_name, row_number, column, value in updates:
+            df = self._mirror.get(sheet_name)
+            # Строка 1 листа - заголовок, строка 2 - первая запись зеркала
+            if df is not None and column in df.columns and 0 <= row_number - 2 < len(df):
+                df.at[row_number - 2, column] = value
+                self._set_mirror(sheet_name, df)
+        
+        if appends or updates:
+            self._save_mirror_snapshot()
+    
+    def _load_mirror_snapshot(self):
+        """Загружает снимок зеркала с диска; время загрузки листов сохраняется, поэтому TTL продолжает действовать"""
+        if not self.mirror_path or not os.path.exists(self.mirror_path):
+            return
         try:
-            worksheet = self.spreadsheet.worksheet(sheet_name)
-            
-            # Получаем заголовки
-            headers = worksheet.row_values(1)
-            
-            # Очищаем лист, оставляя только заголовки
-            if worksheet.row_count > 1:
-                worksheet.delete_rows(2, worksheet.row_count)
-            
-            # Добавляем данные из DataFrame
-            if not df.empty:
-                # Преобразуем DataFrame в список списков для добавления в таблицу
-                values = df[headers].fillna('').values.tolist()
-                
-                # Добавляем данные в таблицу
-                if values:
-                    worksheet.append_rows(values)
-            
+            with open(self.mirror_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            if snapshot.get('spreadsheet_id') != self.spreadsheet_id:
+                return
+            for sheet_name, sheet in snapshot['sheets'].items():
+                self._set_mirror(sheet_name, pd.DataFrame(sheet['records'], columns=sheet['columns']))
+                self._mirror_fetched_at[sheet_name] = sheet['fetched_at']
+            logger.info(f"Загружено локальное зеркало таблицы из {self.mirror_path}")
+        except Exception as e:
+            logger.warning(f"Не удалось загрузить зеркало таблицы {self.mirror_path}: {e}")
+    
+    def _save_mirror_snapshot(self):
+        """Атомарно сохраняет зеркало на диск"""
+        if not self.mirror_path:
+            return
+        snapshot = {
+            'spreadsheet_id': self.spreadsheet_id,
+            'sheets': {
+                sheet_name: {
+                    'fetched_at': self._mirror_fetched_at[sheet_name],
+                    'columns': list(df.columns),
+                    'records': df.to_dict(orient='records')
+                }
+                for sheet_name, df in self._mirror.items() if sheet_name in self._mirror_fetched_at
+            }
+        }
+        try:
+            os.makedirs(os.path.dirname(self.mirror_path) or '.', exist_ok=True)
+            tmp_path = f"{self.mirror_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, self.mirror_path)
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить зеркало таблицы {self.mirror_path}: {e}")
+    
+    def _worksheet(self, sheet_name):
+        """Возвращает объект листа, запрашивая его у API только один раз"""
+        if sheet_name not in self._worksheets:
+            self._worksheets[sheet_name] = self._api('read', self.spreadsheet.worksheet, sheet_name)
+        return self._worksheets[sheet_name]
+    
+    def _get_headers(self, sheet_name):
+        """Возвращает заголовки листа в порядке столбцов"""
+        if sheet_name not in self._headers:
+            self._headers[sheet_name] = self._api('read', self._worksheet(sheet_name).row_values, 1) or SHEET_HEADERS[sheet_name]
+        return self._headers[sheet_name]
+    
+    def _get_column(self, sheet_name, column):
+        """Возвращает значения столбца (с заголовком), кэшируя их до следующей вставки в лист"""
+        key = (sheet_name, column)
+        if key not in self._columns:
+            column_index = self._get_headers(sheet_name).index(column) + 1
+            self._columns[key] = self._api('read', self._worksheet(sheet_name).col_values, column_index)
+        return self._columns[key]
+    
+    @contextmanager
+    def transaction(self):
+        """Собирает записи в буфер и отправляет их при выходе из блока
+        
+        Новые строки уходят одним append_rows на лист, изменения ячеек всех листов -
+        одним values_batch_update. Повторные изменения одной ячейки (например, last_update)
+        схлопываются. При исключении буфер отбрасывается. Вложенные вызовы присоединяются
+        к внешнему, поэтому каждый метод трекера сам открывает транзакцию.
+        
+        Пример:
+            with tracker.transaction():
+                article_id = tracker.add_article(article)
+                tracker.add_content(content_data, article_id, markdown)
+        """
+        self._batch_depth += 1
+        completed = False
+        try:
+            yield self
+            completed = True
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                if completed:
+                    self._flush()
+                else:
+                    self._pending_appends = {}
+                    self._pending_updates = {}
+    
+    def _queue_append(self, sheet_name, row):
+        """Добавляет строку в буфер вставок"""
+        values = [row.get(header, '') for header in self._get_headers(sheet_name)]
+        self._pending_appends.setdefault(sheet_name, []).append(values)
+    
+    def _queue_update(self, sheet_name, row_number, values):
+        """Добавляет изменения ячеек строки в буфер обновлений"""
+        headers = self._get_headers(sheet_name)
+        for column, value in values.items():
+            cell = rowcol_to_a1(row_number, headers.index(column) + 1)
+            cell_range = f"'{sheet_name}'!{cell}"
+            self._pending_updates[cell_range] = (sheet_name, row_number, column, value)
+    
+    def _find_pending_row(self, sheet_name, column, value):
+        """Ищет строку среди еще не отправленных вставок"""
+        column_index = self._get_headers(sheet_name).index(column)
+        for values in self._pending_appends.get(sheet_name, []):
+            if values[column_index] == value:
+                return values
+        return None
+    
+    def _find_row_number(self, sheet_name, column, value):
+        """Возвращает номер строки листа, где column == value, или None"""
+        column_values = self._get_column(sheet_name, column)
+        try:
+            # Первая строка - заголовок, поэтому поиск начинается со второй
+            return column_values.index(value, 1) + 1
+        except ValueError:
+            return None
+    
+    def _update_row(self, sheet_name, column, value, changes):
+        """Изменяет строку, найденную по значению столбца; возвращает False, если строки нет"""
+        pending_row = self._find_pending_row(sheet_name, column, value)
+        if pending_row is not None:
+            headers = self._get_headers(sheet_name)
+            for changed_column, changed_value in changes.items():
+                pending_row[headers.index(changed_column)] = changed_value
             return True
+        
+        row_number = self._find_row_number(sheet_name, column, value)
+        if row_number is None:
+            return False
+        self._queue_update(sheet_name, row_number, changes)
+        return True
+    
+    def _api(self, kind, func, *args, **kwargs):
+        """Выполняет запрос к API через планировщик ('read' или 'write')"""
+        return self.scheduler.call(kind, func, *args, **kwargs)
+    
+    def flush(self):
+        """Отправляет записи, оставшиеся в буфере после неудачной отправки"""
+        if self._batch_depth == 0 and (self._pending_appends or self._pending_updates):
+            self._flush()
+        return not (self._pending_appends or self._pending_updates)
+    
+    def _flush(self):
+        """Отправляет накопленные записи минимальным числом запросов"""
+        appends, updates = self._pending_appends, self._pending_updates
+        self._pending_appends, self._pending_updates = {}, {}
+        
+        sent_appends = {}
+        try:
+            for sheet_name, rows in appends.items():
+                self._api('write', self._worksheet(sheet_name).append_rows, rows, value_input_option='RAW')
+                sent_appends[sheet_name] = rows
+                # Номера строк листа изменились, прочитанные столбцы больше не актуальны
+                self._columns = {key: values for key, values in self._columns.items() if key[0] != sheet_name}
+            
+            if updates:
+                self._api('write', self.spreadsheet.values_batch_update, {
+                    'valueInputOption': 'RAW',
+                    'data': [{'range': cell_range, 'values': [[update[3]]]} for cell_range, update in updates.items()]
+                })
+            self._apply_to_mirror(sent_appends, list(updates.values()))
         except Exception as e:
-            logger.error(f"Ошибка при обновлении листа {sheet_name}: {e}")
+            self._apply_to_mirror(sent_appends, [])
+            
+            # Неотправленные записи возвращаются в буфер и уйдут со следующей отправкой (или flush())
+            unsent = 0
+            for sheet_name, rows in appends.items():
+                if sheet_name not in sent_appends:
+                    self._pending_appends.setdefault(sheet_name, [])[:0] = rows
+                    unsent += len(rows)
+            for cell_range, update in updates.items():
+                # Более новое значение той же ячейки, если оно уже в буфере, важнее
+                self._pending_updates.setdefault(cell_range, update)
+            unsent += len(updates)
+            logger.error(f"Ошибка при записи в Google Sheets, {unsent} записей оставлены в буфере: {e}")
+    
+    def _record_exists(self, sheet_name, column, record_id):
+        """Проверяет, есть ли запись с переданным record_id в буфере вставок или в зеркале листа
+        
+        Повтор операции с тем же ID (например, из файла подкачки AsyncTrackerWriter) не создает дубликат.
+        """
+        if not record_id:
             return False
+        return self._find_pending_row(sheet_name, column, record_id) is not None or bool(self._find_rows(sheet_name, column, record_id))
     
-    def add_article(self, article_data, article_content=None):
+    def add_article(self, article_data, article_content=None, record_id=None):
         """Добавляет новую статью в таблицу"""
         # Генерируем уникальный ID
-        article_id = str(uuid.uuid4())
-        
-        # Загружаем текущие данные
-        articles_df = self._get_worksheet_as_df('Статьи')
+        article_id = record_id or str(uuid.uuid4())
+        if self._record_exists('Статьи', 'article_id', record_id):
+            return article_id
         
         # Если передан контент статьи в виде словаря, преобразуем его в JSON строку
         if article_content and isinstance(article_content, dict):
@@ -206,28 +463,25 @@ class GoogleSheetsTracker:
             'processing_status': 'processed'
         }
         
-        # Добавляем запись в DataFrame
-        articles_df = pd.concat([articles_df, pd.DataFrame([new_article])], ignore_index=True)
-        
-        # Обновляем лист
-        self._update_worksheet_from_df('Статьи', articles_df)
-        
-        # Обновляем метаданные
-        self.update_metadata('last_update', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-        
-        # Добавляем запись в лог
-        self.add_log(article_id=article_id, log_type='article_added', 
-                    message=f"Добавлена новая статья: {article_data.get('title', '')}")
+        with self.transaction():
+            # Добавляем запись в буфер вставок
+            self._queue_append('Статьи', new_article)
+            
+            # Обновляем метаданные
+            self.update_metadata('last_update', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            
+            # Добавляем запись в лог
+            self.add_log(article_id=article_id, log_type='article_added', 
+                        message=f"Добавлена новая статья: {article_data.get('title', '')}")
         
         return article_id
     
-    def add_content(self, content_data, article_id, content_markdown=None):
+    def add_content(self, content_data, article_id, content_markdown=None, record_id=None):
         """Добавляет новый контент, связанный со статьей"""
         # Генерируем уникальный ID
-        content_id = str(uuid.uuid4())
-        
-        # Загружаем текущие данные
-        content_df = self._get_worksheet_as_df('Контент')
+        content_id = record_id or str(uuid.uuid4())
+        if self._record_exists('Контент', 'content_id', record_id):
+            return content_id
         
         # Если контент передан в виде пути к файлу, читаем его содержимое
         if not content_markdown and 'content_path' in content_data and os.path.exists(content_data['content_path']):
@@ -260,28 +514,25 @@ class GoogleSheetsTracker:
             'notes': content_data.get('notes', '')
         }
         
-        # Добавляем запись в DataFrame
-        content_df = pd.concat([content_df, pd.DataFrame([new_content])], ignore_index=True)
-        
-        # Обновляем лист
-        self._update_worksheet_from_df('Контент', content_df)
-        
-        # Обновляем метаданные
-        self.update_metadata('last_update', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-        
-        # Добавляем запись в лог
-        self.add_log(article_id=article_id, content_id=content_id, log_type='content_added', 
-                    message=f"Добавлен новый контент типа {content_data.get('content_type', '')} на языке {content_data.get('language', '')}")
+        with self.transaction():
+            # Добавляем запись в буфер вставок
+            self._queue_append('Контент', new_content)
+            
+            # Обновляем метаданные
+            self.update_metadata('last_update', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            
+            # Добавляем запись в лог
+            self.add_log(article_id=article_id, content_id=content_id, log_type='content_added', 
+                        message=f"Добавлен новый контент типа {content_data.get('content_type', '')} на языке {content_data.get('language', '')}")
         
         return content_id
     
-    def add_reel(self, article_id, title, script_markdown, notes=''):
+    def add_reel(self, article_id, title, script_markdown, notes='', record_id=None):
         """Добавляет новый скрипт для Instagram Reel"""
         # Генерируем уникальный ID
-        reel_id = str(uuid.uuid4())
-        
-        # Загружаем текущие данные
-        reels_df = self._get_worksheet_as_df('Reels')
+        reel_id = record_id or str(uuid.uuid4())
+        if self._record_exists('Reels', 'reel_id', record_id):
+            return reel_id
         
         # Создаем новую запись
         new_reel = {
@@ -295,28 +546,25 @@ class GoogleSheetsTracker:
             'notes': notes
         }
         
-        # Добавляем запись в DataFrame
-        reels_df = pd.concat([reels_df, pd.DataFrame([new_reel])], ignore_index=True)
-        
-        # Обновляем лист
-        self._update_worksheet_from_df('Reels', reels_df)
-        
-        # Обновляем метаданные
-        self.update_metadata('last_update', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-        
-        # Добавляем запись в лог
-        self.add_log(article_id=article_id, log_type='reel_added', 
-                    message=f"Добавлен новый скрипт для Instagram Reel: {title}")
+        with self.transaction():
+            # Добавляем запись в буфер вставок
+            self._queue_append('Reels', new_reel)
+            
+            # Обновляем метаданные
+            self.update_metadata('last_update', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            
+            # Добавляем запись в лог
+            self.add_log(article_id=article_id, log_type='reel_added', 
+                        message=f"Добавлен новый скрипт для Instagram Reel: {title}")
         
         return reel_id
     
-    def add_log(self, log_type, message, article_id=None, content_id=None, details=None):
+    def add_log(self, log_type, message, article_id=None, content_id=None, details=None, record_id=None):
         """Добавляет новую запись в лог"""
         # Генерируем уникальный ID
-        log_id = str(uuid.uuid4())
-        
-        # Загружаем текущие данные
-        logs_df = self._get_worksheet_as_df('Логи')
+        log_id = record_id or str(uuid.uuid4())
+        if self._record_exists('Логи', 'log_id', record_id):
+            return log_id
         
         # Создаем новую запись
         new_log = {
@@ -329,22 +577,18 @@ class GoogleSheetsTracker:
             'details': json.dumps(details) if details else ''
         }
         
-        # Добавляем запись в DataFrame
-        logs_df = pd.concat([logs_df, pd.DataFrame([new_log])], ignore_index=True)
-        
-        # Обновляем лист
-        self._update_worksheet_from_df('Логи', logs_df)
+        with self.transaction():
+            # Добавляем запись в буфер вставок
+            self._queue_append('Логи', new_log)
         
         return log_id
     
-    def schedule_content(self, content_id, schedule_data):
+    def schedule_content(self, content_id, schedule_data, record_id=None):
         """Планирует публикацию контента"""
         # Генерируем уникальный ID для расписания
-        schedule_id = str(uuid.uuid4())
-        
-        # Загружаем текущие данные
-        schedule_df = self._get_worksheet_as_df('Планирование')
-        content_df = self._get_worksheet_as_df('Контент')
+        schedule_id = record_id or str(uuid.uuid4())
+        if self._record_exists('Планирование', 'schedule_id', record_id):
+            return schedule_id
         
         # Создаем новую запись в расписании
         new_schedule = {
@@ -360,47 +604,45 @@ class GoogleSheetsTracker:
             'posting_account': schedule_data.get('account', '')
         }
         
-        # Добавляем запись в DataFrame расписания
-        schedule_df = pd.concat([schedule_df, pd.DataFrame([new_schedule])], ignore_index=True)
-        
-        # Обновляем статус контента
-        content_mask = content_df['content_id'] == content_id
-        if any(content_mask):
-            content_df.loc[content_mask, 'status'] = 'scheduled'
-            content_df.loc[content_mask, 'scheduled_date'] = schedule_data.get('date', '')
-            content_df.loc[content_mask, 'scheduled_time'] = schedule_data.get('time', '')
-        
-        # Обновляем листы
-        self._update_worksheet_from_df('Планирование', schedule_df)
-        self._update_worksheet_from_df('Контент', content_df)
-        
-        # Обновляем метаданные
-        self.update_metadata('last_update', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-        
-        # Добавляем запись в лог
-        article_id = ''
-        if any(content_mask):
-            article_id = content_df.loc[content_mask, 'article_id'].values[0]
-        
-        self.add_log(article_id=article_id, content_id=content_id, log_type='content_scheduled', 
-                    message=f"Запланирована публикация контента на {schedule_data.get('date', '')} {schedule_data.get('time', '')}")
+        with self.transaction():
+            self._queue_append('Планирование', new_schedule)
+            
+            # Обновляем статус контента только в изменившихся ячейках
+            self._update_row('Контент', 'content_id', content_id, {
+                'status': 'scheduled',
+                'scheduled_date': schedule_data.get('date', ''),
+                'scheduled_time': schedule_data.get('time', '')
+            })
+            
+            # Обновляем метаданные
+            self.update_metadata('last_update', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            
+            # Добавляем запись в лог
+            article_id = self._get_content_article_id(content_id)
+            self.add_log(article_id=article_id, content_id=content_id, log_type='content_scheduled', 
+                        message=f"Запланирована публикация контента на {schedule_data.get('date', '')} {schedule_data.get('time', '')}")
         
         return schedule_id
     
     def update_metadata(self, key, value):
         """Обновляет значение в метаданных"""
-        metadata_df = self._get_worksheet_as_df('Метаданные')
-        
-        # Обновляем значение
-        key_mask = metadata_df['key'] == key
-        if any(key_mask):
-            metadata_df.loc[key_mask, 'value'] = value
-        else:
-            # Добавляем новую запись, если ключ не существует
-            metadata_df = pd.concat([metadata_df, pd.DataFrame([{'key': key, 'value': value}])], ignore_index=True)
-        
-        # Обновляем лист
-        self._update_worksheet_from_df('Метаданные', metadata_df)
+        with self.transaction():
+            if not self._update_row('Метаданные', 'key', key, {'value': value}):
+                # Добавляем новую запись, если ключ не существует
+                self._queue_append('Метаданные', {'key': key, 'value': value})
+    
+    def _get_content_article_id(self, content_id):
+        """Возвращает article_id контента или пустую строку"""
+        headers = self._get_headers('Контент')
+        pending_row = self._find_pending_row('Контент', 'content_id', content_id)
+        if pending_row is not None:
+            return pending_row[headers.index('article_id')]
+        
+        row_number = self._find_row_number('Контент', 'content_id', content_id)
+        if row_number is None:
+            return ''
+        article_ids = self._get_column('Контент', 'article_id')
+        return article_ids[row_number - 1] if row_number <= len(article_ids) else ''
     
     def get_all_articles(self):
         """Возвращает все статьи из таблицы"""
@@ -423,10 +665,9 @@ class GoogleSheetsTracker:
     def get_content_by_id(self, content_id):
         """Возвращает контент по его ID"""
         try:
-            content_df = self._get_worksheet_as_df('Контент')
-            content_mask = content_df['content_id'] == content_id
-            if any(content_mask):
-                return content_df[content_mask].to_dict(orient='records')[0]
+            rows = self._find_rows('Контент', 'content_id', content_id)
+            if rows:
+                return rows[0]
             else:
                 logger.warning(f"Контент с ID {content_id} не найден")
                 return None
@@ -437,10 +678,9 @@ class GoogleSheetsTracker:
     def get_article_by_id(self, article_id):
         """Возвращает статью по её ID"""
         try:
-            articles_df = self._get_worksheet_as_df('Статьи')
-            article_mask = articles_df['article_id'] == article_id
-            if any(article_mask):
-                return articles_df[article_mask].to_dict(orient='records')[0]
+            rows = self._find_rows('Статьи', 'article_id', article_id)
+            if rows:
+                return rows[0]
             else:
                 logger.warning(f"Статья с ID {article_id} не найдена")
                 return None
@@ -448,15 +688,22 @@ class GoogleSheetsTracker:
             logger.error(f"Ошибка при чтении статьи: {e}")
             return None
     
+    def find_article_by_url(self, url):
+        """Возвращает статью с указанным source_url или None (в том числе еще не отправленную)"""
+        try:
+            pending_row = self._find_pending_row('Статьи', 'source_url', url)
+            if pending_row is not None:
+                return dict(zip(self._get_headers('Статьи'), pending_row))
+            rows = self._find_rows('Статьи', 'source_url', url)
+            return rows[0] if rows else None
+        except Exception as e:
+            logger.error(f"Ошибка при чтении статьи: {e}")
+            return None
+    
     def get_reels_by_article_id(self, article_id):
         """Возвращает все reels для указанной статьи"""
         try:
-            reels_df = self._get_worksheet_as_df('Reels')
-            reels_mask = reels_df['article_id'] == article_id
-            if any(reels_mask):
-                return reels_df[reels_mask].to_dict(orient='records')
-            else:
-                return []
+            return self._find_rows('Reels', 'article_id', article_id)
         except Exception as e:
             logger.error(f"Ошибка при чтении reels: {e}")
             return []
@@ -464,12 +711,7 @@ class GoogleSheetsTracker:
     def get_logs_by_article_id(self, article_id):
         """Возвращает все логи для указанной статьи"""
         try:
-            logs_df = self._get_worksheet_as_df('Логи')
-            logs_mask = logs_df['article_id'] == article_id
-            if any(logs_mask):
-                return logs_df[logs_mask].to_dict(orient='records')
-            else:
-                return []
+            return self._find_rows('Логи', 'article_id', article_id)
         except Exception as e:
             logger.error(f"Ошибка при чтении логов: {e}")
             return []
@@ -495,13 +737,9 @@ class GoogleSheetsTracker:
                 with open(input_path, 'r', encoding='utf-8') as f:
                     content_markdown = f.read()
                 
-                content_df = self._get_worksheet_as_df('Контент')
-                content_mask = content_df['content_id'] == content_id
-                
-                if any(content_mask):
-                    content_df.loc[content_mask, 'content_markdown'] = content_markdown
-                    self._update_worksheet_from_df('Контент', content_df)
-                    return True
+                with self.transaction():
+                    return self._update_row('Контент', 'content_id', content_id,
+                                            {'content_markdown': content_markdown})
             except Exception as e:
                 logger.error(f"Ошибка при импорте контента: {e}")
         return False 
\ No newline at end of file
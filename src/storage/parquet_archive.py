@@ -0,0 +1,164 @@
+import os
+import uuid
+import logging
+from datetime import datetime, timedelta
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+# Архивируемые листы трекера: ключ записи, столбец даты, по которому строка считается старой,
+# метод трекера для чтения всех строк и столбцы разбиения на каталоги
+ARCHIVE_TABLES = {
+    'articles': {
+        'sheet': 'Статьи',
+        'key': 'article_id',
+        'date': 'processing_date',
+        'reader': 'get_all_articles',
+        'partitions': ['month']
+    },
+    'content': {
+        'sheet': 'Контент',
+        'key': 'content_id',
+        'date': 'creation_date',
+        'reader': 'get_all_content',
+        'partitions': ['month', 'platform']
+    },
+    'logs': {
+        'sheet': 'Логи',
+        'key': 'log_id',
+        'date': 'timestamp',
+        'reader': 'get_all_logs',
+        'partitions': ['month']
+    }
+}
+
+class ParquetArchive:
+    """Колоночный архив старых статей, контента и логов в Parquet
+
+    Строки хранятся в каталогах вида data/archive/content/month=2025-05/platform=LinkedIn/*.parquet,
+    поэтому запрос за месяц или по платформе открывает только нужные каталоги, а из файлов
+    читаются только запрошенные столбцы: длинные content_markdown и article_content
+    не загружаются, пока они не нужны.
+
+    roll_over() переносит из трекера (SQLite или Excel) строки старше заданного числа дней:
+    сначала они записываются в архив, затем удаляются из трекера.
+
+    Пример:
+        archive = ParquetArchive()
+        archive.roll_over(SQLiteContentTracker(), older_than_days=90)
+        posts = archive.content_for_company('Tabby', platform='LinkedIn', columns=['title', 'creation_date'])
+    """
+
+    def __init__(self, archive_dir=None):
+        self.archive_dir = archive_dir or os.getenv('ARCHIVE_DIR', 'data/archive')
+        os.makedirs(self.archive_dir, exist_ok=True)
+
+    def _table_dir(self, table):
+        return os.path.join(self.archive_dir, table)
+
+    def _to_arrow(self, table, rows_df):
+        """Приводит строки к строковым столбцам (как в трекере) и добавляет столбцы разбиения"""
+        spec = ARCHIVE_TABLES[table]
+        rows_df = rows_df.fillna('').astype(str)
+        dates = pd.to_datetime(rows_df[spec['date']], errors='coerce')
+        rows_df['month'] = dates.dt.strftime('%Y-%m').fillna('unknown')
+        if 'platform' in spec['partitions']:
+            rows_df['platform'] = rows_df['platform'].replace('', 'unknown')
+        return pa.Table.from_pandas(rows_df, preserve_index=False)
+
+    def append(self, table, rows):
+        """Дописывает строки (список словарей или DataFrame) в архив таблицы; возвращает их число"""
+        rows_df = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(rows)
+        if rows_df.empty:
+            return 0
+
+        # Новые файлы получают уникальные имена, уже записанные части не переписываются
+        pq.write_to_dataset(
+            self._to_arrow(table, rows_df),
+            root_path=self._table_dir(table),
+            partition_cols=ARCHIVE_TABLES[table]['partitions'],
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+            existing_data_behavior='overwrite_or_ignore'
+        )
+        return len(rows_df)
+
+    def roll_over(self, tracker, older_than_days=None, tables=None):
+        """Переносит в архив строки трекера старше older_than_days дней
+
+        Returns:
+            dict: число перенесенных строк по таблицам
+        """
+        if older_than_days is None:
+            older_than_days = int(os.getenv('ARCHIVE_AFTER_DAYS', '90'))
+        cutoff = datetime.now() - timedelta(days=older_than_days)
+
+        moved = {}
+        for table in tables or ARCHIVE_TABLES:
+            spec = ARCHIVE_TABLES[table]
+            rows_df = pd.DataFrame(getattr(tracker, spec['reader'])())
+            if rows_df.empty:
+                moved[table] = 0
+                continue
+
+            dates = pd.to_datetime(rows_df[spec['date']], errors='coerce')
+            old_rows = rows_df[dates < cutoff]
+            if old_rows.empty:
+                moved[table] = 0
+                continue
+
+            # Удаляем из трекера только после успешной записи в архив
+            self.append(table, old_rows)
+            tracker.remove_rows(spec['sheet'], spec['key'], old_rows[spec['key']].tolist())
+            moved[table] = len(old_rows)
+            logger.info(f"В архив перенесено {len(old_rows)} строк листа {spec['sheet']}")
+
+        return moved
+
+    def query(self, table, columns=None, filters=None, months=None, platforms=None):
+        """Читает строки архива в DataFrame
+
+        Args:
+            table (str): articles, content или logs
+            columns (list): Столбцы для чтения, по умолчанию все
+            filters (dict): Условия столбец -> значение или список значений
+            months (list): Месяцы в формате YYYY-MM
+            platforms (list): Платформы (только для content)
+        """
+        table_dir = self._table_dir(table)
+        if not os.path.isdir(table_dir):
+            return pd.DataFrame(columns=columns or [])
+
+        # Значения разбиения всегда строки, даже если похожи на числа
+        partitioning = ds.partitioning(pa.schema([(column, pa.string()) for column in ARCHIVE_TABLES[table]['partitions']]), flavor='hive')
+        dataset = ds.dataset(table_dir, format='parquet', partitioning=partitioning)
+        conditions = dict(filters or {})
+        if months:
+            conditions['month'] = months
+        if platforms:
+            conditions['platform'] = platforms
+
+        # Условия на month и platform отсекают каталоги, остальные проверяются при чтении
+        expression = None
+        for column, value in conditions.items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            condition = ds.field(column).isin([str(v) for v in values])
+            expression = condition if expression is None else expression & condition
+
+        return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+    def content_for_company(self, company_name, platform=None, columns=None, months=None):
+        """Возвращает архивный контент по статьям о компании, например все посты LinkedIn о компании X"""
+        articles = self.query('articles', columns=['article_id'], filters={'company_name': company_name})
+        if articles.empty:
+            return pd.DataFrame(columns=columns or [])
+        return self.query('content', columns=columns,
+                          filters={'article_id': articles['article_id'].tolist()},
+                          months=months, platforms=[platform] if platform else None)
+
+    def read_sheet(self, table):
+        """Возвращает весь архив таблицы в столбцах листа трекера (без служебного month)"""
+        sheet_df = self.query(table)
+        return sheet_df.drop(columns=['month'], errors='ignore')
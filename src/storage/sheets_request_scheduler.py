@@ -0,0 +1,122 @@
+import os
+import json
+import time
+import random
+import logging
+import threading
+from collections import deque
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Коды ответа, после которых запрос стоит повторить: превышение квоты и временные ошибки сервера
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+def _status_code(error):
+    """Достает HTTP-код из ошибки gspread.exceptions.APIError или requests"""
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None)
+    if status is None:
+        status = getattr(error, 'code', None)
+    return status
+
+def _payload_size(value):
+    """Оценка объема данных запроса или ответа в байтах"""
+    if value is None:
+        return 0
+    try:
+        return len(json.dumps(value, ensure_ascii=False, default=str).encode('utf-8'))
+    except Exception:
+        return 0
+
+class SheetsRequestScheduler:
+    """Выполняет запросы к Google Sheets API в пределах поминутных квот
+
+    Sheets API считает чтения и записи раздельно (по умолчанию 60 в минуту на пользователя).
+    Планировщик хранит время последних запросов каждого вида в скользящем окне и, если бюджет
+    исчерпан, ждет освобождения места, а не отправляет запрос впустую. Ответы 429/5xx и
+    сетевые ошибки повторяются с экспоненциальной задержкой; после max_retries ошибка
+    пробрасывается вызывающему коду.
+
+    Счетчики доступны в stats: число запросов по видам, повторы, ошибки, ожидание квоты
+    и объем переданных данных.
+    """
+
+    WINDOW_SECONDS = 60
+
+    def __init__(self, reads_per_minute=None, writes_per_minute=None, max_retries=None,
+                 base_delay=1.0, max_delay=64.0, sleep=time.sleep, clock=time.monotonic):
+        self.budgets = {
+            'read': reads_per_minute or int(os.getenv('GOOGLE_SHEETS_READS_PER_MINUTE', '60')),
+            'write': writes_per_minute or int(os.getenv('GOOGLE_SHEETS_WRITES_PER_MINUTE', '60'))
+        }
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('GOOGLE_SHEETS_MAX_RETRIES', '5'))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        # Часы и сон подменяются в проверках, чтобы не ждать реальные минуты
+        self._sleep = sleep
+        self._clock = clock
+
+        self._history = {kind: deque() for kind in self.budgets}
+        # Квоту запросы ждут по очереди: при исчерпанном бюджете следующие стоят за текущим
+        self._lock = threading.Lock()
+        self.stats = {
+            'read_calls': 0,
+            'write_calls': 0,
+            'retries': 0,
+            'errors': 0,
+            'throttle_waits': 0,
+            'throttle_seconds': 0.0,
+            'bytes_sent': 0,
+            'bytes_received': 0
+        }
+
+    def _wait_for_budget(self, kind):
+        """Ждет, пока в окне последней минуты освободится место для запроса"""
+        history = self._history[kind]
+        while True:
+            now = self._clock()
+            while history and now - history[0] >= self.WINDOW_SECONDS:
+                history.popleft()
+            if len(history) < self.budgets[kind]:
+                history.append(now)
+                return
+
+            wait = self.WINDOW_SECONDS - (now - history[0])
+            self.stats['throttle_waits'] += 1
+            self.stats['throttle_seconds'] += wait
+            logger.info(f"Квота Google Sheets ({kind}) исчерпана, ожидание {wait:.1f} сек")
+            self._sleep(wait)
+
+    def _is_retryable(self, error):
+        if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return True
+        return _status_code(error) in RETRYABLE_STATUS_CODES
+
+    def call(self, kind, func, *args, **kwargs):
+        """Выполняет запрос вида 'read' или 'write' с учетом квоты и повторами"""
+        if kind == 'write':
+            self.stats['bytes_sent'] += _payload_size([args, kwargs])
+
+        attempt = 0
+        while True:
+            with self._lock:
+                self._wait_for_budget(kind)
+                self.stats[f'{kind}_calls'] += 1
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    self.stats['errors'] += 1
+                    raise
+
+                delay = min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+                attempt += 1
+                self.stats['retries'] += 1
+                logger.warning(f"Ошибка Google Sheets ({_status_code(e)}), повтор {attempt}/{self.max_retries} через {delay:.1f} сек")
+                self._sleep(delay)
+                continue
+
+            if kind == 'read':
+                self.stats['bytes_received'] += _payload_size(result)
+            return result
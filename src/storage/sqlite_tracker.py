@@ -0,0 +1,497 @@
+import os
+import uuid
+import json
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Таблицы базы: имя листа в Excel, столбцы (первый - первичный ключ) и индексируемые столбцы
+TABLES = {
+    'content': {
+        'sheet': 'Контент',
+        'columns': [
+            'content_id', 'article_id', 'title', 'source_url', 'category',
+            'content_type', 'language', 'content_markdown', 'creation_date',
+            'status', 'scheduled_date', 'scheduled_time', 'platform',
+            'published_date', 'published_url', 'engagement_stats',
+            'tags', 'dubskiy_rating', 'notes'
+        ],
+        'indexes': ['article_id']
+    },
+    'articles': {
+        'sheet': 'Статьи',
+        'columns': [
+            'article_id', 'title', 'source_url', 'category',
+            'publication_date', 'company_name', 'funding_amount',
+            'article_content', 'processing_date', 'processing_status'
+        ],
+        'indexes': ['source_url']
+    },
+    'schedule': {
+        'sheet': 'Планирование',
+        'columns': [
+            'schedule_id', 'content_id', 'platform', 'scheduled_date',
+            'scheduled_time', 'timezone', 'posting_status', 'priority',
+            'campaign_id', 'posting_account'
+        ],
+        'indexes': ['content_id']
+    },
+    'metadata': {
+        'sheet': 'Метаданные',
+        'columns': ['key', 'value'],
+        'indexes': []
+    },
+    'reels': {
+        'sheet': 'Reels',
+        'columns': [
+            'reel_id', 'article_id', 'title', 'script_markdown',
+            'creation_date', 'status', 'video_url', 'notes'
+        ],
+        'indexes': ['article_id']
+    },
+    'logs': {
+        'sheet': 'Логи',
+        'columns': [
+            'log_id', 'article_id', 'content_id', 'log_type',
+            'timestamp', 'message', 'details'
+        ],
+        'indexes': ['article_id', 'content_id']
+    }
+}
+
+DEFAULT_METADATA = {
+    'version': '1.0',
+    'api_keys': '{}',
+    'default_settings': '{"default_time": "10:00", "default_timezone": "UTC+3"}',
+    'platform_settings': '{}'
+}
+
+def _now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+class SQLiteContentTracker:
+    """Трекер контента в SQLite с тем же API, что и ExcelContentTracker
+
+    Добавление записи - это одна вставка по индексу вместо перечитывания и перезаписи листа.
+    Excel остается форматом выгрузки: import_from_excel() и export_to_excel().
+    При создании новой базы в нее один раз импортируется существующий файл ExcelContentTracker
+    (import_excel), чтобы переход с Excel-трекера не терял накопленные данные.
+    """
+
+    def __init__(self, db_path="data/content_tracker.db", import_excel="data/content_tracker.xlsx"):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        is_new = not os.path.exists(self.db_path)
+
+        # Одно соединение на трекер; запись из нескольких потоков сериализуется блокировкой
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self._lock = threading.RLock()
+        self._depth = 0
+        self.ensure_db_exists()
+
+        if is_new and import_excel and os.path.exists(import_excel):
+            try:
+                self.import_from_excel(import_excel)
+            except Exception as e:
+                # Поврежденный или занятый файл не должен останавливать запуск; импорт можно повторить вручную
+                logger.error(f"Не удалось импортировать {import_excel} в {self.db_path} ({e}); "
+                             f"повторите импорт: python scripts/sqlite_excel_sync.py import --excel {import_excel}")
+
+    def ensure_db_exists(self):
+        """Создает таблицы и индексы, если их нет"""
+        with self._transaction() as cursor:
+            for table, spec in TABLES.items():
+                key, *columns = spec['columns']
+                column_defs = ', '.join([f'"{key}" TEXT PRIMARY KEY'] + [f'"{column}" TEXT' for column in columns])
+                cursor.execute(f'CREATE TABLE IF NOT EXISTS {table} ({column_defs})')
+                for column in spec['indexes']:
+                    cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table} ("{column}")')
+
+            defaults = dict(DEFAULT_METADATA, last_update=_now())
+            cursor.executemany('INSERT OR IGNORE INTO metadata (key, value) VALUES (?, ?)', defaults.items())
+
+    @contextmanager
+    def _transaction(self):
+        """Выполняет операции в одной транзакции; внутри transaction() фиксация откладывается до внешнего блока"""
+        with self._lock:
+            self._depth += 1
+            cursor = self.conn.cursor()
+            try:
+                yield cursor
+                if self._depth == 1:
+                    self.conn.commit()
+            except Exception:
+                if self._depth == 1:
+                    self.conn.rollback()
+                raise
+            finally:
+                cursor.close()
+                self._depth -= 1
+
+    @contextmanager
+    def transaction(self):
+        """Объединяет несколько операций трекера в одну транзакцию SQLite
+
+        Пример:
+            with tracker.transaction():
+                article_id = tracker.add_article(article)
+                tracker.add_content(content_data, article_id, markdown)
+        """
+        with self._transaction():
+            yield self
+
+    def _insert(self, cursor, table, row):
+        columns = TABLES[table]['columns']
+        placeholders = ', '.join('?' for _ in columns)
+        quoted = ', '.join(f'"{column}"' for column in columns)
+        cursor.execute(f'INSERT OR REPLACE INTO {table} ({quoted}) VALUES ({placeholders})',
+                       [row.get(column, '') for column in columns])
+
+    def _exists(self, cursor, table, record_id):
+        """Проверяет, есть ли в таблице запись с переданным record_id
+
+        Повтор операции с тем же ID (например, из файла подкачки AsyncTrackerWriter) не должен
+        перезаписывать запись, которую могли уже изменить (статус, расписание), и дублировать лог.
+        """
+        if not record_id:
+            return False
+        key = TABLES[table]['columns'][0]
+        return cursor.execute(f'SELECT 1 FROM {table} WHERE "{key}" = ?', (record_id,)).fetchone() is not None
+
+    def _set_metadata(self, cursor, key, value):
+        cursor.execute('INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)', (key, value))
+
+    def _log_row(self, log_type, message, article_id=None, content_id=None, details=None, log_id=None, record_id=None):
+        # Запись лога операции с готовым record_id получает производный ID, чтобы повтор не добавлял ее снова
+        if record_id and not log_id:
+            log_id = str(uuid.uuid5(uuid.NAMESPACE_OID, f"{record_id}:log"))
+        return {
+            'log_id': log_id or str(uuid.uuid4()),
+            'article_id': article_id or '',
+            'content_id': content_id or '',
+            'log_type': log_type,
+            'timestamp': _now(),
+            'message': message,
+            'details': json.dumps(details) if details else ''
+        }
+
+    def _select(self, query, params=()):
+        with self._lock:
+            return [dict(row) for row in self.conn.execute(query, params).fetchall()]
+
+    def add_article(self, article_data, article_content=None, record_id=None):
+        """Добавляет новую статью в таблицу"""
+        article_id = record_id or str(uuid.uuid4())
+
+        # Если передан контент статьи в виде словаря, преобразуем его в JSON строку
+        if article_content and isinstance(article_content, dict):
+            article_content = json.dumps(article_content, ensure_ascii=False)
+
+        # Если передан контент статьи в виде списка строк, объединяем их
+        if article_content and isinstance(article_content, list):
+            article_content = "\n\n".join(article_content)
+
+        new_article = {
+            'article_id': article_id,
+            'title': article_data.get('title', ''),
+            'source_url': article_data.get('link', ''),
+            'category': article_data.get('category', ''),
+            'publication_date': article_data.get('date', ''),
+            'company_name': article_data.get('company_name', ''),
+            'funding_amount': article_data.get('funding_amount', ''),
+            'article_content': article_content or article_data.get('content', ''),
+            'processing_date': _now(),
+            'processing_status': 'processed'
+        }
+
+        # Статья, метаданные и запись лога сохраняются одной транзакцией
+        with self._transaction() as cursor:
+            if self._exists(cursor, 'articles', record_id):
+                return article_id
+            self._insert(cursor, 'articles', new_article)
+            self._set_metadata(cursor, 'last_update', _now())
+            self._insert(cursor, 'logs', self._log_row(
+                article_id=article_id, log_type='article_added',
+                message=f"Добавлена новая статья: {article_data.get('title', '')}", record_id=record_id))
+
+        return article_id
+
+    def add_content(self, content_data, article_id, content_markdown=None, record_id=None):
+        """Добавляет новый контент, связанный со статьей"""
+        content_id = record_id or str(uuid.uuid4())
+
+        # Если контент передан в виде пути к файлу, читаем его содержимое
+        if not content_markdown and 'content_path' in content_data and os.path.exists(content_data['content_path']):
+            try:
+                with open(content_data['content_path'], 'r', encoding='utf-8') as f:
+                    content_markdown = f.read()
+            except Exception as e:
+                logger.error(f"Ошибка при чтении файла контента: {e}")
+
+        new_content = {
+            'content_id': content_id,
+            'article_id': article_id,
+            'title': content_data.get('title', ''),
+            'source_url': content_data.get('source_url', ''),
+            'category': content_data.get('category', ''),
+            'content_type': content_data.get('content_type', ''),
+            'language': content_data.get('language', ''),
+            'content_markdown': content_markdown or '',
+            'creation_date': _now(),
+            'status': 'draft',
+            'platform': content_data.get('platform', ''),
+            'tags': content_data.get('tags', ''),
+            'dubskiy_rating': content_data.get('dubskiy_rating', ''),
+            'notes': content_data.get('notes', '')
+        }
+
+        with self._transaction() as cursor:
+            if self._exists(cursor, 'content', record_id):
+                return content_id
+            self._insert(cursor, 'content', new_content)
+            self._set_metadata(cursor, 'last_update', _now())
+            self._insert(cursor, 'logs', self._log_row(
+                article_id=article_id, content_id=content_id, log_type='content_added',
+                message=f"Добавлен новый контент типа {content_data.get('content_type', '')} на языке {content_data.get('language', '')}", record_id=record_id))
+
+        return content_id
+
+    def add_reel(self, article_id, title, script_markdown, notes='', record_id=None):
+        """Добавляет новый скрипт для Instagram Reel"""
+        reel_id = record_id or str(uuid.uuid4())
+
+        new_reel = {
+            'reel_id': reel_id,
+            'article_id': article_id,
+            'title': title,
+            'script_markdown': script_markdown,
+            'creation_date': _now(),
+            'status': 'draft',
+            'video_url': '',
+            'notes': notes
+        }
+
+        with self._transaction() as cursor:
+            if self._exists(cursor, 'reels', record_id):
+                return reel_id
+            self._insert(cursor, 'reels', new_reel)
+            self._set_metadata(cursor, 'last_update', _now())
+            self._insert(cursor, 'logs', self._log_row(
+                article_id=article_id, log_type='reel_added',
+                message=f"Добавлен новый скрипт для Instagram Reel: {title}", record_id=record_id))
+
+        return reel_id
+
+    def add_log(self, log_type, message, article_id=None, content_id=None, details=None, record_id=None):
+        """Добавляет новую запись в лог"""
+        new_log = self._log_row(log_type, message, article_id, content_id, details, record_id)
+        with self._transaction() as cursor:
+            if self._exists(cursor, 'logs', record_id):
+                return record_id
+            self._insert(cursor, 'logs', new_log)
+        return new_log['log_id']
+
+    def schedule_content(self, content_id, schedule_data, record_id=None):
+        """Планирует публикацию контента"""
+        schedule_id = record_id or str(uuid.uuid4())
+
+        new_schedule = {
+            'schedule_id': schedule_id,
+            'content_id': content_id,
+            'platform': schedule_data.get('platform', ''),
+            'scheduled_date': schedule_data.get('date', ''),
+            'scheduled_time': schedule_data.get('time', ''),
+            'timezone': schedule_data.get('timezone', 'UTC+3'),
+            'posting_status': 'pending',
+            'priority': schedule_data.get('priority', 'medium'),
+            'campaign_id': schedule_data.get('campaign_id', ''),
+            'posting_account': schedule_data.get('account', '')
+        }
+
+        with self._transaction() as cursor:
+            if self._exists(cursor, 'schedule', record_id):
+                return schedule_id
+            self._insert(cursor, 'schedule', new_schedule)
+
+            # Обновляем статус контента
+            cursor.execute(
+                'UPDATE content SET status = ?, scheduled_date = ?, scheduled_time = ? WHERE content_id = ?',
+                ('scheduled', schedule_data.get('date', ''), schedule_data.get('time', ''), content_id))
+            row = cursor.execute('SELECT article_id FROM content WHERE content_id = ?', (content_id,)).fetchone()
+            article_id = row['article_id'] if row else ''
+
+            self._set_metadata(cursor, 'last_update', _now())
+            self._insert(cursor, 'logs', self._log_row(
+                article_id=article_id, content_id=content_id, log_type='content_scheduled',
+                message=f"Запланирована публикация контента на {schedule_data.get('date', '')} {schedule_data.get('time', '')}", record_id=record_id))
+
+        return schedule_id
+
+    def update_metadata(self, key, value):
+        """Обновляет значение в метаданных"""
+        with self._transaction() as cursor:
+            self._set_metadata(cursor, key, value)
+
+    def remove_rows(self, sheet_name, column, values):
+        """Удаляет строки таблицы листа sheet_name, у которых значение column входит в values"""
+        table = next(name for name, spec in TABLES.items() if spec['sheet'] == sheet_name)
+        values = list(values)
+        removed = 0
+        with self._transaction() as cursor:
+            # SQLite ограничивает число параметров запроса, поэтому удаляем частями
+            for start in range(0, len(values), 500):
+                chunk = values[start:start + 500]
+                placeholders = ', '.join('?' for _ in chunk)
+                cursor.execute(f'DELETE FROM {table} WHERE "{column}" IN ({placeholders})', chunk)
+                removed += cursor.rowcount
+        return removed
+
+    def get_all_articles(self):
+        """Возвращает все статьи из таблицы"""
+        try:
+            return self._select('SELECT * FROM articles ORDER BY rowid')
+        except Exception as e:
+            logger.error(f"Ошибка при чтении статей: {e}")
+            return []
+
+    def get_all_content(self):
+        """Возвращает весь контент из таблицы"""
+        try:
+            return self._select('SELECT * FROM content ORDER BY rowid')
+        except Exception as e:
+            logger.error(f"Ошибка при чтении контента: {e}")
+            return []
+
+    def get_content_by_id(self, content_id):
+        """Возвращает контент по его ID"""
+        try:
+            rows = self._select('SELECT * FROM content WHERE content_id = ?', (content_id,))
+            if not rows:
+                logger.warning(f"Контент с ID {content_id} не найден")
+                return None
+            return rows[0]
+        except Exception as e:
+            logger.error(f"Ошибка при чтении контента: {e}")
+            return None
+
+    def get_article_by_id(self, article_id):
+        """Возвращает статью по её ID"""
+        try:
+            rows = self._select('SELECT * FROM articles WHERE article_id = ?', (article_id,))
+            if not rows:
+                logger.warning(f"Статья с ID {article_id} не найдена")
+                return None
+            return rows[0]
+        except Exception as e:
+            logger.error(f"Ошибка при чтении статьи: {e}")
+            return None
+
+    def find_article_by_url(self, url):
+        """Возвращает статью с указанным source_url или None"""
+        try:
+            rows = self._select('SELECT * FROM articles WHERE source_url = ? ORDER BY rowid LIMIT 1', (url,))
+            return rows[0] if rows else None
+        except Exception as e:
+            logger.error(f"Ошибка при чтении статьи: {e}")
+            return None
+
+    def get_reels_by_article_id(self, article_id):
+        """Возвращает все reels для указанной статьи"""
+        try:
+            return self._select('SELECT * FROM reels WHERE article_id = ? ORDER BY rowid', (article_id,))
+        except Exception as e:
+            logger.error(f"Ошибка при чтении reels: {e}")
+            return []
+
+    def get_all_logs(self):
+        """Возвращает все записи лога"""
+        try:
+            return self._select('SELECT * FROM logs ORDER BY rowid')
+        except Exception as e:
+            logger.error(f"Ошибка при чтении логов: {e}")
+            return []
+
+    def get_logs_by_article_id(self, article_id):
+        """Возвращает все логи для указанной статьи"""
+        try:
+            return self._select('SELECT * FROM logs WHERE article_id = ? ORDER BY rowid', (article_id,))
+        except Exception as e:
+            logger.error(f"Ошибка при чтении логов: {e}")
+            return []
+
+    def export_content_to_file(self, content_id, output_path):
+        """Экспортирует контент в файл"""
+        content = self.get_content_by_id(content_id)
+        if content and content.get('content_markdown'):
+            try:
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                with open(output_path, 'w', encoding='utf-8') as f:
+                    f.write(content['content_markdown'])
+                return True
+            except Exception as e:
+                logger.error(f"Ошибка при экспорте контента: {e}")
+                return False
+        return False
+
+    def import_content_from_file(self, content_id, input_path):
+        """Импортирует контент из файла"""
+        if os.path.exists(input_path):
+            try:
+                with open(input_path, 'r', encoding='utf-8') as f:
+                    content_markdown = f.read()
+
+                with self._transaction() as cursor:
+                    cursor.execute('UPDATE content SET content_markdown = ? WHERE content_id = ?',
+                                   (content_markdown, content_id))
+                    return cursor.rowcount > 0
+            except Exception as e:
+                logger.error(f"Ошибка при импорте контента: {e}")
+        return False
+
+    def import_from_excel(self, excel_path="data/content_tracker.xlsx"):
+        """Импортирует все листы из Excel-файла ExcelContentTracker
+
+        Записи с уже существующими ID перезаписываются, поэтому импорт можно повторять.
+        Возвращает число импортированных строк по таблицам.
+        """
+        sheets = pd.read_excel(excel_path, sheet_name=None, dtype=str)
+        imported = {}
+        with self._transaction() as cursor:
+            for table, spec in TABLES.items():
+                sheet_df = sheets.get(spec['sheet'])
+                if sheet_df is None:
+                    logger.warning(f"Лист {spec['sheet']} не найден в {excel_path}")
+                    continue
+
+                sheet_df = sheet_df.fillna('')
+                key = spec['columns'][0]
+                rows = [row for row in sheet_df.to_dict(orient='records') if row.get(key)]
+                for row in rows:
+                    self._insert(cursor, table, row)
+                imported[table] = len(rows)
+
+        logger.info(f"Импортировано из {excel_path}: {imported}")
+        return imported
+
+    def export_to_excel(self, excel_path="data/content_tracker.xlsx"):
+        """Выгружает все таблицы в Excel-файл той же структуры, что у ExcelContentTracker"""
+        os.makedirs(os.path.dirname(excel_path) or '.', exist_ok=True)
+        with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
+            for table, spec in TABLES.items():
+                rows = self._select(f'SELECT * FROM {table} ORDER BY rowid')
+                pd.DataFrame(rows, columns=spec['columns']).to_excel(writer, sheet_name=spec['sheet'], index=False)
+
+        logger.info(f"Данные выгружены в {excel_path}")
+        return excel_path
+
+    def close(self):
+        """Закрывает соединение с базой"""
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,196 @@
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from article_jsonl import article_files, iter_articles
+
+logger = logging.getLogger(__name__)
+
+def url_hash(url):
+    """Stable key of an article URL"""
+    return hashlib.sha1((url or '').strip().encode('utf-8')).hexdigest()
+
+def content_hash(article):
+    """Hash of an article's title and body, empty if the body was not scraped yet"""
+    if not article.get('content'):
+        return ''
+    payload = json.dumps([article.get('title', ''), article['content']], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+class ArticleCorpus:
+    """All scraped articles in one SQLite file, indexed by URL hash, scrape date and content hash
+
+    The scraper appends to it instead of rewriting a per-day articles_*.json file, and the
+    generators query it by date range and processing status. A known URL is a primary key
+    lookup, so deduplication costs the same no matter how many articles are stored.
+    On first use the corpus is seeded from existing data/articles_*.json(l) files.
+    """
+
+    # One instance per database file, so scrapers running in parallel share a connection
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, db_path="data/articles.db", data_dir=None):
+        """Get the shared corpus for a database file"""
+        with cls._instances_lock:
+            key = os.path.abspath(db_path)
+            if key not in cls._instances:
+                cls._instances[key] = cls(db_path, data_dir)
+            return cls._instances[key]
+
+    def __init__(self, db_path="data/articles.db", data_dir=None):
+        self.db_path = db_path
+        self.data_dir = data_dir if data_dir is not None else (os.path.dirname(db_path) or '.')
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        is_new = not os.path.exists(self.db_path)
+
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self._lock = threading.RLock()
+        self._create_schema()
+
+        if is_new:
+            self.import_files()
+
+    def _create_schema(self):
+        with self._lock, self.conn:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS articles (
+                    url_hash TEXT PRIMARY KEY,
+                    link TEXT NOT NULL,
+                    title TEXT,
+                    source TEXT,
+                    scraped_date TEXT NOT NULL,
+                    content_hash TEXT NOT NULL DEFAULT '',
+                    status TEXT NOT NULL DEFAULT 'new',
+                    data TEXT NOT NULL
+                )''')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_articles_scraped_date ON articles (scraped_date)')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_articles_status ON articles (status, scraped_date)')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_articles_content_hash ON articles (content_hash)')
+
+    def add_many(self, articles, scraped_date=None):
+        """Add articles, skipping known URLs; a known article without content gets the new body
+
+        Returns:
+            list: articles that were not in the corpus before
+        """
+        scraped_date = scraped_date or datetime.now().strftime("%Y-%m-%d")
+        added = []
+        with self._lock, self.conn:
+            for article in articles:
+                if not article.get('link'):
+                    continue
+                key, digest = url_hash(article['link']), content_hash(article)
+                data = json.dumps(article, ensure_ascii=False)
+                cursor = self.conn.execute(
+                    'INSERT OR IGNORE INTO articles (url_hash, link, title, source, scraped_date, content_hash, data) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (key, article['link'], article.get('title', ''), article.get('source', ''), scraped_date, digest, data))
+                if cursor.rowcount:
+                    added.append(article)
+                elif digest:
+                    # The article was stored from the listing before its details were fetched
+                    self.conn.execute("UPDATE articles SET data = ?, content_hash = ? WHERE url_hash = ? AND content_hash = ''",
+                                      (data, digest, key))
+        return added
+
+    def __contains__(self, url):
+        with self._lock:
+            return self.conn.execute('SELECT 1 FROM articles WHERE url_hash = ?', (url_hash(url),)).fetchone() is not None
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM articles').fetchone()[0]
+
+    def get(self, url):
+        """Get an article by URL, or None"""
+        with self._lock:
+            row = self.conn.execute('SELECT data FROM articles WHERE url_hash = ?', (url_hash(url),)).fetchone()
+        return json.loads(row['data']) if row else None
+
+    def find_by_content_hash(self, digest):
+        """Get articles with the given content hash (the same story under different URLs)"""
+        with self._lock:
+            rows = self.conn.execute('SELECT data FROM articles WHERE content_hash = ?', (digest,)).fetchall()
+        return [json.loads(row['data']) for row in rows]
+
+    def query(self, start_date=None, end_date=None, status=None, limit=None):
+        """Get articles scraped between start_date and end_date (YYYY-MM-DD, inclusive), oldest first
+
+        Args:
+            start_date (str): First scrape date
+            end_date (str): Last scrape date
+            status (str): Processing status, e.g. 'new' or 'processed'
+            limit (int): Maximum number of articles
+        """
+        conditions, params = [], []
+        if start_date:
+            conditions.append('scraped_date >= ?')
+            params.append(start_date)
+        if end_date:
+            conditions.append('scraped_date <= ?')
+            params.append(end_date)
+        if status:
+            conditions.append('status = ?')
+            params.append(status)
+
+        query = 'SELECT data FROM articles'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY scraped_date, rowid'
+        if limit:
+            query += f' LIMIT {int(limit)}'
+
+        with self._lock:
+            rows = self.conn.execute(query, params).fetchall()
+        return [json.loads(row['data']) for row in rows]
+
+    def set_status(self, url, status):
+        """Set the processing status of an article, return True if it is in the corpus"""
+        with self._lock, self.conn:
+            cursor = self.conn.execute('UPDATE articles SET status = ? WHERE url_hash = ?', (status, url_hash(url)))
+        return cursor.rowcount > 0
+
+    def reset_status(self, title=None):
+        """Mark articles as new again, all of them or those with the given title; return how many"""
+        with self._lock, self.conn:
+            if title is None:
+                cursor = self.conn.execute("UPDATE articles SET status = 'new' WHERE status != 'new'")
+            else:
+                cursor = self.conn.execute("UPDATE articles SET status = 'new' WHERE title = ?", (title,))
+        return cursor.rowcount
+
+    def import_files(self, paths=None, batch_size=500):
+        """Import articles_YYYY-MM-DD.json / .jsonl files, using the date in the file name as the scrape date
+
+        Files are streamed and written in batches, so months of archives import in flat memory.
+        """
+        imported = 0
+        for filename in paths or article_files(self.data_dir):
+            match = re.search(r'articles_(\d{4}-\d{2}-\d{2})', os.path.basename(filename))
+            scraped_date = match.group(1) if match else None
+            try:
+                batch = []
+                for article in iter_articles(filename):
+                    batch.append(article)
+                    if len(batch) >= batch_size:
+                        imported += len(self.add_many(batch, scraped_date))
+                        batch = []
+                imported += len(self.add_many(batch, scraped_date))
+            except Exception as e:
+                logger.warning(f"Error importing articles from {filename}: {e}")
+
+        if imported:
+            logger.info(f"Imported {imported} articles into {self.db_path}")
+        return imported
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,131 @@
+import os
+import json
+import glob
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Size of the chunks read from a legacy JSON array file
+READ_CHUNK_SIZE = 64 * 1024
+
+def append_articles(path, articles):
+    """Append articles to a JSON Lines file, one article per line; return how many were written"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    count = 0
+    with open(path, 'a', encoding='utf-8') as f:
+        for article in articles:
+            f.write(json.dumps(article, ensure_ascii=False) + '\n')
+            count += 1
+    return count
+
+def iter_jsonl(path):
+    """Yield articles from a JSON Lines file one at a time, skipping a torn last line"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping malformed line {line_number} in {path}")
+
+def iter_json_array(path):
+    """Yield the elements of a JSON array file without loading the whole file
+
+    The file is read in chunks and each element is decoded as soon as it is complete,
+    so memory stays at about one article plus one chunk.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = ''
+        started = False
+        eof = False
+        while True:
+            buffer = buffer.lstrip()
+            if not started:
+                if buffer.startswith('['):
+                    buffer = buffer[1:]
+                    started = True
+                    continue
+                if buffer:
+                    raise ValueError(f"{path} does not contain a JSON array")
+            elif buffer.startswith(','):
+                buffer = buffer[1:]
+                continue
+            elif buffer.startswith(']'):
+                return
+            elif buffer:
+                try:
+                    item, end = decoder.raw_decode(buffer)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    # A number may be cut at the chunk boundary, wait for the delimiter
+                    if end < len(buffer) or eof:
+                        yield item
+                        buffer = buffer[end:]
+                        continue
+
+            if eof:
+                if started:
+                    raise ValueError(f"Unexpected end of JSON array in {path}")
+                return
+            chunk = f.read(READ_CHUNK_SIZE)
+            eof = not chunk
+            buffer += chunk
+
+def iter_articles(path):
+    """Yield articles from a .jsonl file or a legacy .json array file"""
+    if path.endswith('.jsonl'):
+        return iter_jsonl(path)
+    return iter_json_array(path)
+
+def article_files(data_dir="data"):
+    """Article batch files in data_dir in date order, one per day
+
+    When a day has both a legacy .json and a .jsonl (after convert_to_jsonl without removing
+    the source), only the .jsonl is returned: it already holds the converted articles.
+    """
+    files = {}
+    for path in glob.glob(os.path.join(data_dir, "articles_*.json")) + glob.glob(os.path.join(data_dir, "articles_*.jsonl")):
+        stem = os.path.splitext(path)[0]
+        if stem not in files or path.endswith('.jsonl'):
+            files[stem] = path
+    return sorted(files.values())
+
+def _article_key(article):
+    """Identity of an article when merging files: its link, or the whole record when it has none"""
+    return article.get('link') or json.dumps(article, ensure_ascii=False, sort_keys=True)
+
+def convert_to_jsonl(json_path, remove_source=False):
+    """Convert a JSON array file to JSON Lines next to it, streaming; return the new path and article count
+
+    Articles already in an existing .jsonl of the same day are kept after the converted ones
+    and not written twice, so running the conversion again does not duplicate them.
+    """
+    jsonl_path = f"{os.path.splitext(json_path)[0]}.jsonl"
+    tmp_path = f"{jsonl_path}.tmp"
+
+    existing_keys = set()
+    if os.path.exists(jsonl_path):
+        existing_keys = {_article_key(article) for article in iter_jsonl(jsonl_path)}
+
+    count = 0
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for article in iter_json_array(json_path):
+            if _article_key(article) in existing_keys:
+                continue
+            f.write(json.dumps(article, ensure_ascii=False) + '\n')
+            count += 1
+
+    if existing_keys:
+        with open(tmp_path, 'a', encoding='utf-8') as out, open(jsonl_path, 'r', encoding='utf-8') as existing:
+            for line in existing:
+                out.write(line)
+    os.replace(tmp_path, jsonl_path)
+
+    if remove_source:
+        os.remove(json_path)
+    return jsonl_path, count
@@ -1,6 +1,7 @@
 import os
 import json
 import logging
+import threading
 from datetime import datetime
 
 # Configure logging
@@ -16,17 +17,33 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class ArticleTracker:
-    """Class to track processed articles and avoid duplicates"""
+    """Class to track processed articles and avoid duplicates
+
+    Lookups go through in-memory URL and title indexes. Changes are appended to a journal
+    (one JSON line per operation) instead of rewriting processed_articles.json; the journal
+    is folded back into the JSON snapshot every ARTICLE_TRACKER_COMPACT_EVERY operations.
+    """
     
-    def __init__(self):
-        self.db_file = "data/processed_articles.json"
+    def __init__(self, db_file="data/processed_articles.json", compact_every=None):
+        self.db_file = db_file
+        self.journal_file = f"{os.path.splitext(db_file)[0]}.journal.jsonl"
+        self.compact_every = compact_every if compact_every is not None else int(os.getenv("ARTICLE_TRACKER_COMPACT_EVERY", "100"))
+        self._lock = threading.RLock()
+        self._journal_damaged = False
         self.processed_articles = self._load_db()
+        self._journal_size = self._replay_journal()
+        self._rebuild_indexes()
+        
+        # Fold a long or damaged journal left over from previous runs into the snapshot,
+        # a damaged one must not get new lines appended after its torn tail
+        if self._journal_size >= self.compact_every or self._journal_damaged:
+            self.compact()
     
     def _load_db(self):
-        """Load the database of processed articles"""
+        """Load the snapshot of processed articles"""
         if not os.path.exists(self.db_file):
             # Create the file if it doesn't exist
-            os.makedirs(os.path.dirname(self.db_file), exist_ok=True)
+            os.makedirs(os.path.dirname(self.db_file) or '.', exist_ok=True)
             with open(self.db_file, 'w', encoding='utf-8') as f:
                 json.dump([], f)
             return []
@@ -38,14 +55,89 @@ class ArticleTracker:
             logger.error(f"Error loading article database: {e}")
             return []
     
+    def _replay_journal(self):
+        """Apply journal operations on top of the snapshot, return the number of operations"""
+        if not os.path.exists(self.journal_file):
+            return 0
+        
+        # Records already in the snapshot, in case a compaction was interrupted before the journal was cleared
+        known = {self._record_key(record) for record in self.processed_articles}
+        operations = 0
+        self._journal_damaged = False
+        with open(self.journal_file, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn last line from a crash mid-write, the rest of the journal is still valid
+                    logger.warning(f"Skipping corrupt journal line {line_number} in {self.journal_file}")
+                    self._journal_damaged = True
+                    continue
+                
+                operations += 1
+                if entry['op'] == 'add':
+                    record = entry['article']
+                    if self._record_key(record) not in known:
+                        known.add(self._record_key(record))
+                        self.processed_articles.append(record)
+                elif entry['op'] == 'remove':
+                    self._remove_by_title(entry['title'])
+        return operations
+    
+    @staticmethod
+    def _record_key(record):
+        return (record.get('url'), record.get('title'), record.get('date_processed'))
+    
+    def _rebuild_indexes(self):
+        """Build URL and title indexes, the first record wins like in the old linear scans"""
+        self._by_url = {}
+        self._by_title = {}
+        for record in self.processed_articles:
+            self._by_url.setdefault(record['url'], record)
+            self._by_title.setdefault(record['title'], record)
+    
+    def _remove_by_title(self, title):
+        """Remove the first record with the given title, return True if one was removed"""
+        for i, record in enumerate(self.processed_articles):
+            if record['title'] == title:
+                self.processed_articles.pop(i)
+                return True
+        return False
+    
+    def _append_journal(self, entry):
+        """Append one operation to the journal and compact when it grows too long"""
+        try:
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self._journal_size += 1
+        except Exception as e:
+            logger.error(f"Error writing article journal: {e}")
+            return
+        
+        if self._journal_size >= self.compact_every:
+            self.compact()
+    
     def _save_db(self):
-        """Save the database of processed articles"""
+        """Atomically write the snapshot of processed articles"""
         try:
-            with open(self.db_file, 'w', encoding='utf-8') as f:
+            tmp_file = f"{self.db_file}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
                 json.dump(self.processed_articles, f, indent=2)
+            os.replace(tmp_file, self.db_file)
             logger.info(f"Article database saved to {self.db_file}")
+            return True
         except Exception as e:
             logger.error(f"Error saving article database: {e}")
+            return False
+    
+    def compact(self):
+        """Write the full snapshot and clear the journal"""
+        with self._lock:
+            if self._save_db() and os.path.exists(self.journal_file):
+                os.remove(self.journal_file)
+            self._journal_size = 0
     
     def is_article_processed(self, article):
         """Check if an article has already been processed"""
@@ -53,10 +145,9 @@ class ArticleTracker:
         article_title = article.get('title', '')
         
         # Check if the article is in the database
-        for processed in self.processed_articles:
-            if processed['url'] == article_url or processed['title'] == article_title:
-                logger.info(f"Article already processed: {article_title}")
-                return True
+        if article_url in self._by_url or article_title in self._by_title:
+            logger.info(f"Article already processed: {article_title}")
+            return True
                 
         logger.info(f"Article not processed yet: {article_title}")
         return False
@@ -70,8 +161,11 @@ class ArticleTracker:
             'output_path': output_path
         }
         
-        self.processed_articles.append(article_data)
-        self._save_db()
+        with self._lock:
+            self.processed_articles.append(article_data)
+            self._by_url.setdefault(article_data['url'], article_data)
+            self._by_title.setdefault(article_data['title'], article_data)
+            self._append_journal({'op': 'add', 'article': article_data})
         logger.info(f"Article marked as processed: {article['title']}")
     
     def get_processed_articles(self):
@@ -80,25 +174,20 @@ class ArticleTracker:
     
     def get_processed_article_by_url(self, url):
         """Get a processed article by URL"""
-        for article in self.processed_articles:
-            if article['url'] == url:
-                return article
-        return None
+        return self._by_url.get(url)
     
     def get_processed_article_by_title(self, title):
         """Get a processed article by title"""
-        for article in self.processed_articles:
-            if article['title'] == title:
-                return article
-        return None
+        return self._by_title.get(title)
 
     def reset_article_processed(self, article_title):
         """Reset the processed status of an article by title"""
-        for i, article in enumerate(self.processed_articles):
-            if article['title'] == article_title:
+        with self._lock:
+            if article_title in self._by_title and self._remove_by_title(article_title):
                 logger.info(f"Resetting processed status for article: {article_title}")
-                self.processed_articles.pop(i)
-                self._save_db()
+                # Removal is rare, so the indexes are simply rebuilt
+                self._rebuild_indexes()
+                self._append_journal({'op': 'remove', 'title': article_title})
                 return True
                 
         logger.warning(f"Article not found in processed database: {article_title}")
@@ -0,0 +1,110 @@
+import re
+
+def _trie_pattern(keywords):
+    """Build a regex alternation with shared prefixes factored out, e.g. f(?:intech|unding)
+
+    Python's re tries alternatives one by one, so a flat list of N keywords costs N attempts
+    at every position; the trie form rejects most positions after a single character.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        if '' in node:
+            return f"(?:{body})?" if len(branches) == 1 else f"{body}?"
+        return body
+
+    return build(trie)
+
+class KeywordMatcher:
+    """Finds keywords of a fixed list in texts, built once and shared by the scraper and generators
+
+    By default keywords match as substrings (the behaviour of the old `keyword in text` loops):
+    the texts are lowercased and joined once, then each keyword is looked up with str's C-level
+    search, which in CPython beats a regex alternation for a few dozen short keywords.
+    With word_boundary=True a single precompiled regex finds whole-word hits in one pass.
+    """
+
+    def __init__(self, keywords, word_boundary=False):
+        # Keep the caller's order, it defines priority in first_match()
+        self.keywords = tuple(dict.fromkeys(keyword.lower() for keyword in keywords))
+        self.word_boundary = word_boundary
+        # An empty list must not compile to an empty pattern, which would match every text
+        alternation = _trie_pattern(self.keywords) or '(?!)'
+        self.pattern = re.compile(rf'\b(?:{alternation})\b') if word_boundary else None
+
+    def _prepare(self, texts):
+        """Lowercase and join the texts; keywords never contain newlines, so no match spans two texts"""
+        if len(texts) == 1:
+            return (texts[0] or '').lower()
+        return '\n'.join(text for text in texts if text).lower()
+
+    def find_all(self, *texts):
+        """Return the set of keywords found in any of the texts (case-insensitive)"""
+        text = self._prepare(texts)
+        if self.pattern is not None:
+            return set(self.pattern.findall(text))
+        return {keyword for keyword in self.keywords if keyword in text}
+
+    # Substring mode uses plain for loops: a generator inside any()/sum() costs a resume per keyword,
+    # which on short titles is as much as the searches themselves
+
+    def matches(self, *texts):
+        """Check if any keyword occurs in any of the texts"""
+        if self.pattern is not None:
+            return self.pattern.search(self._prepare(texts)) is not None
+        # Any hit will do, so each text is searched on its own and the join is skipped
+        for text in texts:
+            if text:
+                text = text.lower()
+                for keyword in self.keywords:
+                    if keyword in text:
+                        return True
+        return False
+
+    def count(self, *texts):
+        """Count distinct keywords found in the texts"""
+        text = self._prepare(texts)
+        if self.pattern is not None:
+            return len(set(self.pattern.findall(text)))
+        found = 0
+        for keyword in self.keywords:
+            if keyword in text:
+                found += 1
+        return found
+
+    def first_match(self, *texts):
+        """Return the first keyword in list order that occurs in the texts, or None"""
+        text = self._prepare(texts)
+        if self.pattern is not None:
+            hits = set(self.pattern.findall(text))
+            return next((keyword for keyword in self.keywords if keyword in hits), None)
+        for keyword in self.keywords:
+            if keyword in text:
+                return keyword
+        return None
+
+# Keywords that mark an article as startup-related (scraper)
+STARTUP_KEYWORDS = KeywordMatcher([
+    'startup', 'funding', 'investment', 'seed', 'series', 'venture', 'raised',
+    'million', 'fintech', 'techstars', 'accelerator', 'incubator', 'founder',
+    'entrepreneur', 'launch', 'acquisition', 'exit'
+])
+
+# Keywords that raise an article's score when choosing what to write about (both generators)
+IMPORTANT_KEYWORDS = KeywordMatcher([
+    'million', 'funding', 'investment', 'launch', 'startup', 'innovation', 'technology'
+])
+
+# Industries detected by the reel generator, in priority order
+INDUSTRY_KEYWORDS = KeywordMatcher([
+    'fintech', 'healthtech', 'edtech', 'proptech', 'ecommerce', 'saas', 'ai', 'blockchain'
+])
@@ -0,0 +1,145 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+def cache_key(model, messages, temperature, max_tokens):
+    """Content address of a chat completion request"""
+    payload = json.dumps({
+        'model': model,
+        'messages': messages,
+        'temperature': temperature,
+        'max_tokens': max_tokens
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class LLMResponseCache:
+    """Persistent cache of chat completion texts keyed by model, messages, temperature and max_tokens
+
+    Re-running the generators after reset_article.py or a crash sends the same prompts again;
+    with the cache those calls cost nothing. Entries expire after LLM_CACHE_TTL_DAYS and the
+    least recently used ones are dropped above LLM_CACHE_MAX_ENTRIES. LLM_CACHE=0 turns the
+    cache off; LLM_CACHE_BYPASS=1 ignores stored answers but still stores fresh ones.
+    """
+
+    # One instance per database file, shared by both generators and their worker threads
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    # Evict every this many writes instead of on each one
+    EVICT_EVERY = 100
+
+    @classmethod
+    def shared(cls, db_path="data/llm_cache.db"):
+        """Get the shared cache for a database file"""
+        with cls._instances_lock:
+            key = os.path.abspath(db_path)
+            if key not in cls._instances:
+                cls._instances[key] = cls(db_path)
+            return cls._instances[key]
+
+    def __init__(self, db_path="data/llm_cache.db", ttl_days=None, max_entries=None, enabled=None, bypass=None):
+        self.db_path = db_path
+        self.ttl_seconds = float(ttl_days if ttl_days is not None else os.getenv("LLM_CACHE_TTL_DAYS", 30)) * 86400
+        self.max_entries = int(max_entries if max_entries is not None else os.getenv("LLM_CACHE_MAX_ENTRIES", 5000))
+        if enabled is None:
+            enabled = os.getenv("LLM_CACHE", "1").lower() in ("1", "true", "yes")
+        if bypass is None:
+            bypass = os.getenv("LLM_CACHE_BYPASS", "0").lower() in ("1", "true", "yes")
+        self.enabled = enabled
+        self.bypass = bypass
+        self.stats = {'hits': 0, 'misses': 0, 'saved_prompt_tokens': 0, 'saved_completion_tokens': 0}
+        self._lock = threading.RLock()
+        self._writes = 0
+
+        if not self.enabled:
+            self.conn = None
+            return
+
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        with self._lock, self.conn:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    response TEXT NOT NULL,
+                    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+                    completion_tokens INTEGER NOT NULL DEFAULT 0,
+                    created REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )''')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used)')
+        self.evict()
+
+    def get(self, key):
+        """Get a stored response text, or None when missing, expired or bypassed (counted as a miss)"""
+        if not self.enabled or self.bypass:
+            with self._lock:
+                self.stats['misses'] += 1
+            return None
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT response, prompt_tokens, completion_tokens FROM responses WHERE key = ? AND created >= ?',
+                (key, now - self.ttl_seconds)).fetchone()
+            if row is None:
+                self.stats['misses'] += 1
+                return None
+            with self.conn:
+                self.conn.execute('UPDATE responses SET last_used = ? WHERE key = ?', (now, key))
+            self.stats['hits'] += 1
+            self.stats['saved_prompt_tokens'] += row[1]
+            self.stats['saved_completion_tokens'] += row[2]
+        return row[0]
+
+    def put(self, key, model, response, prompt_tokens=0, completion_tokens=0):
+        """Store a response text"""
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            with self.conn:
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO responses (key, model, response, prompt_tokens, completion_tokens, created, last_used) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (key, model, response, prompt_tokens or 0, completion_tokens or 0, now, now))
+            self._writes += 1
+            if self._writes % self.EVICT_EVERY == 0:
+                self.evict()
+
+    def evict(self):
+        """Drop expired entries and the least recently used ones above max_entries"""
+        if not self.enabled:
+            return 0
+        with self._lock, self.conn:
+            removed = self.conn.execute('DELETE FROM responses WHERE created < ?', (time.time() - self.ttl_seconds,)).rowcount
+            removed += self.conn.execute(
+                'DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)).rowcount
+        if removed:
+            logger.info(f"Evicted {removed} entries from the LLM response cache")
+        return removed
+
+    def snapshot(self):
+        """Copy of the counters, to report one run with report(since=...)"""
+        with self._lock:
+            return dict(self.stats)
+
+    def report(self, since=None):
+        """Summary of hits, misses and saved tokens since a snapshot"""
+        current = self.snapshot()
+        delta = {name: value - (since or {}).get(name, 0) for name, value in current.items()}
+        return (f"LLM cache: {delta['hits']} hits, {delta['misses']} misses, "
+                f"saved {delta['saved_prompt_tokens']} prompt + {delta['saved_completion_tokens']} completion tokens")
+
+    def close(self):
+        if self.conn is not None:
+            with self._lock:
+                self.conn.close()
@@ -0,0 +1,395 @@
+import os
+import time
+import random
+import logging
+import threading
+from collections import deque
+import httpx
+import openai
+from llm_cache import cache_key
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying: rate limits and temporary server errors
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class PartialCompletionError(Exception):
+    """A streamed completion stopped before it was finished
+
+    partial_text holds the text received so far; partial_path is set by stream_to_file
+    to the file the partial text was kept in.
+    """
+
+    def __init__(self, message, partial_text, ttft=None, latency=None):
+        super().__init__(message)
+        self.partial_text = partial_text
+        self.ttft = ttft
+        self.latency = latency
+        self.partial_path = None
+
+def partial_path(path):
+    """File the text of an unfinished stream into path is kept in, e.g. post.md -> post.partial.md"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.partial{ext}"
+
+def stream_to_file(gateway, request, path, on_chunk=None, cache=None):
+    """Stream a chat completion into path as it arrives and return the whole text
+
+    Every chunk is flushed to the file and passed to on_chunk. When the stream stops early the
+    partial text is moved to partial_path(path) and PartialCompletionError is raised.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            def write(delta):
+                f.write(delta)
+                f.flush()
+                if on_chunk is not None:
+                    on_chunk(delta)
+            return gateway.stream_chat_completion(**request, on_chunk=write, cache=cache)
+    except PartialCompletionError as e:
+        e.partial_path = partial_path(path)
+        os.replace(path, e.partial_path)
+        raise
+    except Exception:
+        if os.path.exists(path) and not os.path.getsize(path):
+            os.remove(path)
+        raise
+
+def estimate_tokens(messages):
+    """Rough prompt size in tokens, about four characters per token"""
+    return sum(len(str(message.get('content', ''))) for message in messages) // 4 + 4 * len(messages)
+
+def openai_provider(api_key, base_url, timeout, http_client):
+    """Client of the OpenAI API or of any OpenAI-compatible server at base_url"""
+    return openai.OpenAI(api_key=api_key, base_url=base_url, timeout=timeout, max_retries=0, http_client=http_client)
+
+# Provider name -> factory(api_key, base_url, timeout, http_client) returning an object
+# with chat.completions.create(...) that answers like the OpenAI client
+PROVIDERS = {'openai': openai_provider}
+
+def register_provider(name, factory):
+    """Make a client factory available as LLM_PROVIDER=name"""
+    PROVIDERS[name] = factory
+
+class LLMGateway:
+    """Single entry point of both generators to the LLM API
+
+    One pooled HTTP client is shared by every generator and worker thread. Each request has a
+    timeout (LLM_TIMEOUT); 429/5xx answers, timeouts and connection errors are retried with
+    jittered exponential backoff, honouring Retry-After (LLM_MAX_RETRIES). Requests are held back
+    while the tokens of the last minute would exceed LLM_TOKENS_PER_MINUTE; the budget is reserved
+    with an estimate and corrected with the usage of the answer. Prompt and completion tokens,
+    latency and attempts of every call are kept in calls and summed in stats.
+
+    The client comes from a provider factory (LLM_PROVIDER, see register_provider) and can point at
+    any OpenAI-compatible server with LLM_BASE_URL, e.g. openai_stub_server.py.
+
+    stream_chat_completion() passes the text on as it arrives and records the time to the first
+    token; a stream has LLM_STREAM_TIMEOUT seconds in total, LLM_TIMEOUT applies to each chunk.
+    """
+
+    WINDOW_SECONDS = 60
+
+    # One gateway per process, so the pool and the token budget cover all generators
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls):
+        """Get the process-wide gateway"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def __init__(self, api_key=None, base_url=None, provider=None, timeout=None, stream_timeout=None, max_retries=None,
+                 tokens_per_minute=None, pool_size=None, base_delay=1.0, max_delay=30.0,
+                 sleep=time.sleep, clock=time.monotonic):
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.base_url = base_url or os.getenv("LLM_BASE_URL") or os.getenv("OPENAI_BASE_URL") or None
+        self.provider = provider or os.getenv("LLM_PROVIDER", "openai")
+        self.timeout = float(timeout or os.getenv("LLM_TIMEOUT", 60))
+        self.stream_timeout = float(stream_timeout or os.getenv("LLM_STREAM_TIMEOUT", 120))
+        self.max_retries = int(max_retries if max_retries is not None else os.getenv("LLM_MAX_RETRIES", 4))
+        self.tokens_per_minute = int(tokens_per_minute if tokens_per_minute is not None else os.getenv("LLM_TOKENS_PER_MINUTE", 60000))
+        # The orchestrator never runs more than LLM_MAX_IN_FLIGHT requests, the pool matches it
+        self.pool_size = int(pool_size or os.getenv("LLM_POOL_SIZE") or os.getenv("LLM_MAX_IN_FLIGHT", 4))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        # Clock and sleep are replaced in checks so that nobody waits real minutes
+        self._sleep = sleep
+        self._clock = clock
+
+        self.http_client = httpx.Client(
+            limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+            timeout=self.timeout
+        )
+        self.client = None
+        if self.api_key:
+            if self.provider not in PROVIDERS:
+                raise ValueError(f"Unknown LLM provider: {self.provider}")
+            self.client = PROVIDERS[self.provider](self.api_key, self.base_url, self.timeout, self.http_client)
+
+        # (time, tokens) of the requests of the last minute
+        self._window = deque()
+        self._window_tokens = 0
+        self._throttle_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.calls = deque(maxlen=1000)
+        self.stats = {
+            'calls': 0,
+            'cached': 0,
+            'errors': 0,
+            'retries': 0,
+            'prompt_tokens': 0,
+            'completion_tokens': 0,
+            'latency': 0.0,
+            'streams': 0,
+            'ttft': 0.0,
+            'throttle_waits': 0,
+            'throttle_seconds': 0.0
+        }
+
+    @property
+    def available(self):
+        return self.client is not None
+
+    def _reserve(self, tokens):
+        """Wait until tokens fit into the budget of the last minute and book them
+
+        Returns:
+            list: The booked [time, tokens] entry, to be corrected with the actual usage
+        """
+        if self.tokens_per_minute <= 0:
+            return None
+        while True:
+            with self._throttle_lock:
+                now = self._clock()
+                while self._window and now - self._window[0][0] >= self.WINDOW_SECONDS:
+                    self._window_tokens -= self._window.popleft()[1]
+                # A request larger than the whole budget still goes through on an empty window
+                if not self._window or self._window_tokens + tokens <= self.tokens_per_minute:
+                    entry = [now, tokens]
+                    self._window.append(entry)
+                    self._window_tokens += tokens
+                    return entry
+                wait = self.WINDOW_SECONDS - (now - self._window[0][0])
+
+            with self._lock:
+                self.stats['throttle_waits'] += 1
+                self.stats['throttle_seconds'] += wait
+            logger.info(f"LLM token budget of {self.tokens_per_minute}/min used up, waiting {wait:.1f}s")
+            # Sleep without the lock: finished calls settle their usage meanwhile, and the budget is checked again
+            self._sleep(wait)
+
+    def _settle(self, entry, tokens):
+        """Replace the estimate of a booked entry with the tokens actually used"""
+        if entry is None:
+            return
+        with self._throttle_lock:
+            self._window_tokens += tokens - entry[1]
+            entry[1] = tokens
+
+    def _retry_delay(self, error, attempt):
+        """Retry-After of the answer when given, otherwise jittered exponential backoff"""
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        try:
+            return min(self.max_delay, float(retry_after))
+        except (TypeError, ValueError):
+            return min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+    def _is_retryable(self, error):
+        if isinstance(error, (TimeoutError, ConnectionError, openai.APITimeoutError, openai.APIConnectionError, httpx.TimeoutException, httpx.TransportError)):
+            return True
+        return getattr(error, 'status_code', None) in RETRYABLE_STATUS_CODES
+
+    def _record(self, model, prompt_tokens, completion_tokens, latency, attempts, cached=False, error=None, ttft=None):
+        call = {
+            'model': model,
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'latency': latency,
+            'ttft': ttft,
+            'attempts': attempts,
+            'cached': cached,
+            'error': error
+        }
+        with self._lock:
+            self.calls.append(call)
+            self.stats['calls'] += 1
+            self.stats['cached'] += cached
+            self.stats['errors'] += error is not None
+            self.stats['retries'] += max(0, attempts - 1)
+            self.stats['prompt_tokens'] += prompt_tokens
+            self.stats['completion_tokens'] += completion_tokens
+            self.stats['latency'] += latency
+            if ttft is not None:
+                self.stats['streams'] += 1
+                self.stats['ttft'] += ttft
+        return call
+
+    def chat_completion(self, model, messages, temperature, max_tokens, cache=None):
+        """Return the text of a chat completion, from the cache when given or from the API
+
+        Raises:
+            RuntimeError: no API key is configured
+            openai.APIError: the request failed after all retries or with a non-retryable error
+        """
+        key = cache_key(model, messages, temperature, max_tokens)
+        if cache is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                logger.info(f"LLM cache hit for {model} request {key[:12]}")
+                self._record(model, 0, 0, 0.0, 0, cached=True)
+                return cached
+
+        if self.client is None:
+            raise RuntimeError("LLM API key not set")
+
+        entry = self._reserve(estimate_tokens(messages) + max_tokens)
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                response = self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    timeout=self.timeout
+                )
+                break
+            except Exception as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    self._settle(entry, 0)
+                    self._record(model, 0, 0, time.perf_counter() - start, attempt + 1, error=str(e))
+                    raise
+
+                delay = self._retry_delay(e, attempt)
+                attempt += 1
+                logger.warning(f"LLM request failed ({getattr(e, 'status_code', None) or type(e).__name__}), "
+                               f"retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                self._sleep(delay)
+
+        latency = time.perf_counter() - start
+        text = response.choices[0].message.content.strip()
+        usage = getattr(response, 'usage', None)
+        prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+        completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+        self._settle(entry, prompt_tokens + completion_tokens)
+        self._record(model, prompt_tokens, completion_tokens, latency, attempt + 1)
+        logger.info(f"LLM call {model}: {prompt_tokens} prompt + {completion_tokens} completion tokens "
+                    f"in {latency:.2f}s, {attempt + 1} attempt(s)")
+
+        if cache is not None:
+            cache.put(key, model, text, prompt_tokens, completion_tokens)
+        return text
+
+    def stream_chat_completion(self, model, messages, temperature, max_tokens, on_chunk=None, cache=None):
+        """Stream a chat completion, passing each piece of text to on_chunk as it arrives; return the whole text
+
+        A request that fails before any text has arrived is retried like chat_completion(). Once text
+        has arrived, an error or the end of LLM_STREAM_TIMEOUT raises PartialCompletionError with it.
+        A cached answer is passed to on_chunk in one piece.
+        """
+        key = cache_key(model, messages, temperature, max_tokens)
+        if cache is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                logger.info(f"LLM cache hit for {model} request {key[:12]}")
+                self._record(model, 0, 0, 0.0, 0, cached=True)
+                if on_chunk is not None:
+                    on_chunk(cached)
+                return cached
+
+        if self.client is None:
+            raise RuntimeError("LLM API key not set")
+
+        entry = self._reserve(estimate_tokens(messages) + max_tokens)
+        start = time.perf_counter()
+        attempt = 0
+        parts, ttft, usage = [], None, None
+        while True:
+            try:
+                stream = self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True,
+                    stream_options={'include_usage': True},
+                    timeout=self.timeout
+                )
+                finished = False
+                try:
+                    for chunk in stream:
+                        if getattr(chunk, 'usage', None):
+                            usage = chunk.usage
+                        if chunk.choices and chunk.choices[0].finish_reason:
+                            finished = True
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            if ttft is None:
+                                ttft = time.perf_counter() - start
+                            parts.append(delta)
+                            if on_chunk is not None:
+                                on_chunk(delta)
+                        if time.perf_counter() - start > self.stream_timeout:
+                            raise TimeoutError(f"Stream took longer than {self.stream_timeout}s")
+                finally:
+                    stream.close()
+                if not finished:
+                    raise ConnectionError("Stream ended without a finish reason")
+                break
+            except Exception as e:
+                latency = time.perf_counter() - start
+                if parts:
+                    text = ''.join(parts)
+                    self._settle(entry, estimate_tokens(messages) + len(text) // 4)
+                    self._record(model, 0, 0, latency, attempt + 1, error=str(e), ttft=ttft)
+                    logger.error(f"LLM stream {model} stopped after {len(text)} characters in {latency:.2f}s: {e}")
+                    raise PartialCompletionError(f"Stream stopped after {len(text)} characters: {e}", text, ttft, latency) from e
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    self._settle(entry, 0)
+                    self._record(model, 0, 0, latency, attempt + 1, error=str(e))
+                    raise
+
+                delay = self._retry_delay(e, attempt)
+                attempt += 1
+                logger.warning(f"LLM stream failed ({getattr(e, 'status_code', None) or type(e).__name__}), "
+                               f"retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                self._sleep(delay)
+
+        latency = time.perf_counter() - start
+        text = ''.join(parts).strip()
+        prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+        completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+        self._settle(entry, prompt_tokens + completion_tokens if usage else estimate_tokens(messages) + len(text) // 4)
+        self._record(model, prompt_tokens, completion_tokens, latency, attempt + 1, ttft=ttft)
+        logger.info(f"LLM stream {model}: first token after {ttft or 0:.2f}s, {latency:.2f}s total, "
+                    f"{prompt_tokens} prompt + {completion_tokens} completion tokens, {attempt + 1} attempt(s)")
+
+        if cache is not None:
+            cache.put(key, model, text, prompt_tokens, completion_tokens)
+        return text
+
+    def snapshot(self):
+        """Copy of the counters, to report one run with report(since=...)"""
+        with self._lock:
+            return dict(self.stats)
+
+    def report(self, since=None):
+        """Summary of calls, tokens, latency, retries and throttling since a snapshot"""
+        current = self.snapshot()
+        delta = {name: value - (since or {}).get(name, 0) for name, value in current.items()}
+        sent = delta['calls'] - delta['cached']
+        average = delta['latency'] / sent if sent else 0.0
+        streams = f", avg time to first token {delta['ttft'] / delta['streams']:.2f}s" if delta['streams'] else ""
+        return (f"LLM gateway: {sent} API calls ({delta['errors']} failed, {delta['retries']} retries), "
+                f"{delta['cached']} from cache, {delta['prompt_tokens']} prompt + {delta['completion_tokens']} completion tokens, "
+                f"avg latency {average:.2f}s{streams}, throttled {delta['throttle_waits']} times for {delta['throttle_seconds']:.1f}s")
+
+    def close(self):
+        self.http_client.close()
@@ -0,0 +1,293 @@
+"""Local stand-in for the OpenAI chat completions, files and batches endpoints, to run generation without network
+
+Chat completions are answered by reply(body) after latency seconds; fail_next() makes the next
+requests fail with a given status (and Retry-After), like a rate-limited or overloaded API.
+With stream=True the answer is sent as server-sent events, one word per chunk every chunk_delay
+seconds; stall_next() makes the next stream stop sending after a number of chunks.
+Input files are kept in memory. A batch finishes after it has been retrieved complete_after_polls
+times; every request line is then answered by reply(body), a deterministic text by default, and
+custom_ids listed in fail_ids go to the error file with status 500. Every request is recorded
+in OpenAIStubServer.calls.
+
+Example:
+    server = OpenAIStubServer().start()
+    client = openai.OpenAI(api_key='stub', base_url=server.base_url)
+    ...
+    server.stop()
+
+or from the command line, with LLM_BASE_URL=http://127.0.0.1:8765/v1 for the generators:
+    python src/utils/openai_stub_server.py --port 8765
+"""
+import re
+import json
+import time
+import uuid
+import argparse
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+def default_reply(body):
+    """Deterministic completion text: the model and the first line of the user prompt"""
+    prompt = next((m['content'] for m in reversed(body.get('messages', [])) if m.get('role') == 'user'), '')
+    first_line = next((line.strip() for line in prompt.splitlines() if line.strip()), '')
+    return f"[stub {body.get('model', '')}] {first_line}"
+
+def chat_completion_chunk(body, chunk_id, delta=None, finish_reason=None, usage=None):
+    """One chunk of a streamed chat completion"""
+    chunk = {'id': chunk_id, 'object': 'chat.completion.chunk', 'created': int(time.time()), 'model': body.get('model', ''),
+             'choices': [] if usage else [{'index': 0, 'delta': delta or {}, 'finish_reason': finish_reason}]}
+    if usage:
+        chunk['usage'] = usage
+    return chunk
+
+def chat_completion(body, text):
+    """Chat completion object for a request body and an answer text"""
+    prompt_tokens = sum(len(str(m.get('content', '')).split()) for m in body.get('messages', []))
+    completion_tokens = len(text.split())
+    return {
+        'id': f"chatcmpl-{uuid.uuid4().hex[:24]}",
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': body.get('model', ''),
+        'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': text}, 'finish_reason': 'stop'}],
+        'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                  'total_tokens': prompt_tokens + completion_tokens}
+    }
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "OpenAIStub/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload=None, raw=None):
+        data = raw if raw is not None else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/octet-stream' if raw is not None else 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, request, completion, stall):
+        """Send a completion as server-sent events, word by word"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+
+        text = completion['choices'][0]['message']['content']
+        words = re.findall(r'\S+\s*', text)
+        chunks = [chat_completion_chunk(request, completion['id'], {'role': 'assistant', 'content': ''})]
+        chunks += [chat_completion_chunk(request, completion['id'], {'content': word}) for word in words]
+        chunks.append(chat_completion_chunk(request, completion['id'], finish_reason='stop'))
+        if (request.get('stream_options') or {}).get('include_usage'):
+            chunks.append(chat_completion_chunk(request, completion['id'], usage=completion['usage']))
+
+        try:
+            for number, chunk in enumerate(chunks):
+                if stall is not None and number == stall[0] + 1:
+                    time.sleep(stall[1])
+                    return
+                self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8'))
+                self.wfile.flush()
+                time.sleep(self.server.stub.chunk_delay)
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _not_found(self):
+        self._send(404, {'error': {'message': f"Unknown path {self.path}", 'type': 'invalid_request_error'}})
+
+    def _body(self):
+        return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+    def do_GET(self):
+        stub = self.server.stub
+        stub._record('GET', self.path)
+        match = re.fullmatch(r'/v1/files/([^/]+)/content', self.path)
+        if match and match.group(1) in stub.files:
+            return self._send(200, raw=stub.files[match.group(1)]['content'])
+        match = re.fullmatch(r'/v1/files/([^/]+)', self.path)
+        if match and match.group(1) in stub.files:
+            return self._send(200, stub.files[match.group(1)]['object'])
+        match = re.fullmatch(r'/v1/batches/([^/]+)', self.path)
+        if match and match.group(1) in stub.batches:
+            return self._send(200, stub._poll(match.group(1)))
+        self._not_found()
+
+    def do_POST(self):
+        stub = self.server.stub
+        stub._record('POST', self.path)
+        body = self._body()
+        if self.path == '/v1/chat/completions':
+            request = json.loads(body or b'{}')
+            failure = stub._take_failure()
+            if failure is not None:
+                status, retry_after = failure
+                data = json.dumps({'error': {'message': 'Stub failure', 'type': 'server_error' if status >= 500 else 'rate_limit_error'}}).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                if retry_after is not None:
+                    self.send_header('Retry-After', str(retry_after))
+                self.end_headers()
+                self.wfile.write(data)
+                return
+            time.sleep(stub.latency)
+            completion = chat_completion(request, stub.reply(request))
+            if request.get('stream'):
+                return self._stream(request, completion, stub._take_stall())
+            return self._send(200, completion)
+        if self.path == '/v1/files':
+            message = BytesParser(policy=HTTP).parsebytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode('utf-8') + body)
+            fields = {part.get_param('name', header='content-disposition'): part for part in message.iter_parts()}
+            upload = fields['file']
+            purpose = fields['purpose'].get_payload(decode=True).decode('utf-8')
+            return self._send(200, stub.add_file(upload.get_payload(decode=True), upload.get_filename() or 'upload.jsonl', purpose))
+        if self.path == '/v1/batches':
+            request = json.loads(body or b'{}')
+            if request.get('input_file_id') not in stub.files:
+                return self._send(400, {'error': {'message': 'Unknown input_file_id', 'type': 'invalid_request_error'}})
+            return self._send(200, stub.create_batch(request))
+        match = re.fullmatch(r'/v1/batches/([^/]+)/cancel', self.path)
+        if match and match.group(1) in stub.batches:
+            batch = stub.batches[match.group(1)]
+            batch['status'] = 'cancelled'
+            batch['cancelled_at'] = int(time.time())
+            return self._send(200, batch)
+        self._not_found()
+
+class OpenAIStubServer:
+    """OpenAI-compatible HTTP server with /v1/chat/completions, /v1/files and /v1/batches, served from a background thread"""
+
+    def __init__(self, host="127.0.0.1", port=0, reply=None, complete_after_polls=1, fail_ids=None, latency=0.0, chunk_delay=0.0):
+        self.reply = reply or default_reply
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self._failures = []
+        self._stalls = []
+        self.complete_after_polls = complete_after_polls
+        self.fail_ids = set(fail_ids or ())
+        self.files = {}
+        self.batches = {}
+        self.calls = []
+        self._polls = {}
+        self._lock = threading.RLock()
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.stub = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="openai-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _record(self, method, path):
+        with self._lock:
+            self.calls.append((method, path))
+
+    def fail_next(self, status=429, count=1, retry_after=None):
+        """Make the next count chat completion requests fail with status"""
+        with self._lock:
+            self._failures.extend([(status, retry_after)] * count)
+
+    def _take_failure(self):
+        with self._lock:
+            return self._failures.pop(0) if self._failures else None
+
+    def stall_next(self, after_chunks=3, seconds=30.0):
+        """Make the next streamed answer stop after after_chunks words and hang for seconds"""
+        with self._lock:
+            self._stalls.append((after_chunks, seconds))
+
+    def _take_stall(self):
+        with self._lock:
+            return self._stalls.pop(0) if self._stalls else None
+
+    def add_file(self, content, filename, purpose):
+        file_id = f"file-{uuid.uuid4().hex[:24]}"
+        obj = {'id': file_id, 'object': 'file', 'bytes': len(content), 'created_at': int(time.time()),
+               'filename': filename, 'purpose': purpose, 'status': 'processed'}
+        with self._lock:
+            self.files[file_id] = {'object': obj, 'content': content}
+        return obj
+
+    def create_batch(self, request):
+        batch_id = f"batch_{uuid.uuid4().hex[:24]}"
+        batch = {
+            'id': batch_id, 'object': 'batch', 'endpoint': request.get('endpoint', '/v1/chat/completions'),
+            'input_file_id': request['input_file_id'], 'completion_window': request.get('completion_window', '24h'),
+            'status': 'validating', 'created_at': int(time.time()), 'metadata': request.get('metadata'),
+            'output_file_id': None, 'error_file_id': None,
+            'request_counts': {'total': 0, 'completed': 0, 'failed': 0}
+        }
+        with self._lock:
+            self.batches[batch_id] = batch
+            self._polls[batch_id] = 0
+        return batch
+
+    def _poll(self, batch_id):
+        """Advance a batch one step per retrieval and run it on the last one"""
+        with self._lock:
+            batch = self.batches[batch_id]
+            if batch['status'] in ('completed', 'failed', 'expired', 'cancelled'):
+                return batch
+            self._polls[batch_id] += 1
+            if self._polls[batch_id] < self.complete_after_polls:
+                batch['status'] = 'in_progress'
+                return batch
+            lines = self.files[batch['input_file_id']]['content'].decode('utf-8').splitlines()
+
+        outputs, errors = [], []
+        for line in filter(str.strip, lines):
+            request = json.loads(line)
+            record = {'id': f"batch_req_{uuid.uuid4().hex[:24]}", 'custom_id': request['custom_id'], 'error': None}
+            if request['custom_id'] in self.fail_ids:
+                record['response'] = {'status_code': 500, 'request_id': uuid.uuid4().hex,
+                                      'body': {'error': {'message': 'Stub failure', 'type': 'server_error'}}}
+                errors.append(record)
+            else:
+                body = request['body']
+                record['response'] = {'status_code': 200, 'request_id': uuid.uuid4().hex,
+                                      'body': chat_completion(body, self.reply(body))}
+                outputs.append(record)
+
+        def dump(records):
+            return ''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in records).encode('utf-8')
+
+        with self._lock:
+            batch['output_file_id'] = self.add_file(dump(outputs), f"{batch_id}_output.jsonl", 'batch_output')['id'] if outputs else None
+            batch['error_file_id'] = self.add_file(dump(errors), f"{batch_id}_error.jsonl", 'batch_output')['id'] if errors else None
+            batch['request_counts'] = {'total': len(outputs) + len(errors), 'completed': len(outputs), 'failed': len(errors)}
+            batch['status'] = 'completed'
+            batch['completed_at'] = int(time.time())
+            return batch
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Local OpenAI chat completions/files/batches stand-in')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--complete-after-polls', type=int, default=1, help='Retrievals before a batch completes')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds before a chat completion is answered')
+    parser.add_argument('--chunk-delay', type=float, default=0.0, help='Seconds between streamed chunks')
+    args = parser.parse_args()
+
+    server = OpenAIStubServer(args.host, args.port, complete_after_polls=args.complete_after_polls,
+                              latency=args.latency, chunk_delay=args.chunk_delay)
+    print(f"Serving on {server.base_url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,73 @@
+import os
+import json
+import logging
+import threading
+from article_jsonl import article_files, iter_articles
+
+logger = logging.getLogger(__name__)
+
+class SeenURLIndex:
+    """Persistent set of article URLs that have already been scraped"""
+
+    # One instance per index file, so scrapers running in parallel share the same set
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, index_file="data/seen_urls.json", data_dir="data"):
+        """Get the shared index for a file"""
+        with cls._instances_lock:
+            key = os.path.abspath(index_file)
+            if key not in cls._instances:
+                cls._instances[key] = cls(index_file, data_dir)
+            return cls._instances[key]
+
+    def __init__(self, index_file="data/seen_urls.json", data_dir="data"):
+        self.index_file = index_file
+        self.data_dir = data_dir
+        self._lock = threading.Lock()
+        self.urls = self._load_index()
+
+    def _load_index(self):
+        """Load the index, seeding it from existing articles_*.json(l) files on first use"""
+        if os.path.exists(self.index_file):
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    return set(json.load(f))
+            except Exception as e:
+                logger.error(f"Error loading seen URL index: {e}")
+                return set()
+
+        urls = set()
+        for filename in article_files(self.data_dir):
+            try:
+                urls.update(article['link'] for article in iter_articles(filename) if article.get('link'))
+            except Exception as e:
+                logger.warning(f"Error seeding seen URL index from {filename}: {e}")
+
+        logger.info(f"Seeded seen URL index with {len(urls)} URLs")
+        return urls
+
+    def __contains__(self, url):
+        return url in self.urls
+
+    def __len__(self):
+        return len(self.urls)
+
+    def add_many(self, urls):
+        """Add URLs to the index"""
+        with self._lock:
+            self.urls.update(url for url in urls if url)
+
+    def save(self):
+        """Atomically write the index to disk"""
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.index_file) or '.', exist_ok=True)
+                tmp_file = f"{self.index_file}.tmp"
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(sorted(self.urls), f, ensure_ascii=False)
+                os.replace(tmp_file, self.index_file)
+                logger.info(f"Seen URL index saved to {self.index_file}")
+            except Exception as e:
+                logger.error(f"Error saving seen URL index: {e}")